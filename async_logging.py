@@ -0,0 +1,99 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `rate` INFO/DEBUG records per second through from each call site.
+
+    Warnings and errors always pass. The first record let through in a new
+    second says how many lines from its call site were suppressed before it.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.windows = {}  # (pathname, lineno) -> [window start, passed, suppressed]
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        window = self.windows.get(key)
+        if window is None or record.created - window[0] >= 1.0:
+            if window and window[2]:
+                record.msg = f"{record.msg} ({window[2]} similar lines suppressed)"
+            self.windows[key] = [record.created, 1, 0]
+            return True
+        if window[1] < self.rate:
+            window[1] += 1
+            return True
+        window[2] += 1
+        self.suppressed += 1
+        return False
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to a bounded queue and drops them, counted, when it is full"""
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+class AsyncLogging:
+    """Moves the root logger's handlers onto a background thread.
+
+    install() puts a DroppingQueueHandler on the root logger in place of its
+    handlers, and a QueueListener thread feeds the records to the original
+    handlers, so the event loop never waits on stream or file I/O. The
+    message is still formatted on the caller's thread, so expensive payloads
+    should be guarded with logger.isEnabledFor(). With `rate_limit` above 0,
+    INFO and DEBUG lines are capped per call site per second before they are
+    queued.
+    """
+
+    def __init__(self, queue_size: int = 10000, rate_limit: float = 0):
+        self.queue_size = queue_size
+        self.rate_filter = RateLimitFilter(rate_limit)
+        self.handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        self.handlers = []
+
+    def install(self):
+        root = logging.getLogger()
+        self.handlers = root.handlers[:]
+        for handler in self.handlers:
+            root.removeHandler(handler)
+        self.handler = DroppingQueueHandler(queue.Queue(self.queue_size))
+        self.handler.addFilter(self.rate_filter)
+        root.addHandler(self.handler)
+        self.listener = QueueListener(self.handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        return self
+
+    def uninstall(self):
+        """Write out what is still queued and give the root logger its handlers back"""
+        if not self.listener:
+            return
+        root = logging.getLogger()
+        root.removeHandler(self.handler)
+        self.listener.stop()
+        self.listener = None
+        for handler in self.handlers:
+            root.addHandler(handler)
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.handler.enqueued if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0,
+            "suppressed": self.rate_filter.suppressed,
+            "queue_depth": self.handler.queue.qsize() if self.handler else 0,
+        }
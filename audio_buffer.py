@@ -0,0 +1,111 @@
+import logging
+from typing import List, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class AudioRingBuffer:
+    """Bounded PCM16 sample buffer backed by a single NumPy array.
+
+    Storage starts small and doubles until it reaches `capacity` samples;
+    after that the oldest samples are overwritten, so memory per session is
+    bounded no matter how long the recording runs. Reads hand out memoryview
+    slices of the backing array instead of copies.
+    """
+
+    def __init__(self, capacity: int, initial_capacity: int = 24000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = np.zeros(min(initial_capacity, capacity), dtype=np.int16)
+        self._start = 0
+        self._size = 0
+        self.dropped_samples = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of audio currently held"""
+        return self._size * 2
+
+    @property
+    def allocated_bytes(self) -> int:
+        """Bytes reserved by the backing array"""
+        return self._data.nbytes
+
+    def _grow(self, needed: int):
+        new_size = min(self.capacity, max(needed, 2 * len(self._data)))
+        data = np.zeros(new_size, dtype=np.int16)
+        head = min(self._size, len(self._data) - self._start)
+        data[:head] = self._data[self._start:self._start + head]
+        data[head:self._size] = self._data[:self._size - head]
+        self._data = data
+        self._start = 0
+
+    def append(self, audio: Union[bytes, bytearray, memoryview, np.ndarray]):
+        if isinstance(audio, np.ndarray):
+            samples = audio.astype(np.int16, copy=False)
+        else:
+            samples = np.frombuffer(audio, dtype=np.int16)
+        n = len(samples)
+        if n == 0:
+            return
+
+        if n >= self.capacity:
+            # The chunk alone fills the buffer; keep only its newest samples
+            self.dropped_samples += self._size + n - self.capacity
+            samples = samples[n - self.capacity:]
+            n = self.capacity
+            self._start = 0
+            self._size = 0
+
+        if self._size + n > len(self._data) and len(self._data) < self.capacity:
+            self._grow(self._size + n)
+
+        overflow = self._size + n - len(self._data)
+        if overflow > 0:
+            self.consume(overflow)
+            self.dropped_samples += overflow
+
+        end = (self._start + self._size) % len(self._data)
+        first = min(n, len(self._data) - end)
+        self._data[end:end + first] = samples[:first]
+        self._data[:n - first] = samples[first:]
+        self._size += n
+
+    def consume(self, n: int):
+        """Discard the oldest n samples"""
+        n = min(n, self._size)
+        self._start = (self._start + n) % len(self._data)
+        self._size -= n
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+
+    def segments(self) -> List[memoryview]:
+        """Return the held audio, oldest first, as one or two zero-copy byte views.
+
+        The views alias the backing array and are only valid until the next append.
+        """
+        head = min(self._size, len(self._data) - self._start)
+        views = [memoryview(self._data[self._start:self._start + head]).cast('B')]
+        if head < self._size:
+            views.append(memoryview(self._data[:self._size - head]).cast('B'))
+        return [view for view in views if len(view)]
+
+    def view(self) -> memoryview:
+        """Return all held audio as a single byte view.
+
+        Zero-copy unless the contents wrap around the end of the array, in
+        which case the backing array is linearized once first.
+        """
+        if self._start + self._size > len(self._data):
+            self._data = np.roll(self._data, -self._start)
+            self._start = 0
+        return memoryview(self._data[self._start:self._start + self._size]).cast('B')
+
+    def tobytes(self) -> bytes:
+        return b''.join(self.segments())
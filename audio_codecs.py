@@ -0,0 +1,147 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Codecs the browser may negotiate in start_recording; all decode to PCM16
+CODECS = ("pcm", "mulaw", "adpcm")
+
+# G.711 mu-law
+MULAW_BIAS = 0x84
+MULAW_CLIP = 32635
+
+def _build_mulaw_tables():
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + MULAW_BIAS) << exponent) - MULAW_BIAS
+    decode = np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+    # Position of the highest set bit of (biased magnitude >> 7)
+    exponent_lut = np.zeros(256, dtype=np.int32)
+    for i in range(1, 256):
+        exponent_lut[i] = i.bit_length() - 1
+    return decode, exponent_lut
+
+MULAW_DECODE_TABLE, _MULAW_EXPONENT_TABLE = _build_mulaw_tables()
+
+def mulaw_encode(samples: np.ndarray) -> bytes:
+    samples = np.asarray(samples, dtype=np.int32)
+    sign = np.where(samples < 0, 0x80, 0)
+    magnitude = np.minimum(np.abs(samples), MULAW_CLIP) + MULAW_BIAS
+    exponent = _MULAW_EXPONENT_TABLE[magnitude >> 7]
+    mantissa = (magnitude >> (exponent + 3)) & 0x0F
+    return (~(sign | (exponent << 4) | mantissa) & 0xFF).astype(np.uint8).tobytes()
+
+def mulaw_decode(data) -> np.ndarray:
+    return MULAW_DECODE_TABLE[np.frombuffer(data, dtype=np.uint8)]
+
+# IMA-ADPCM in self-contained blocks: int16 first sample, uint8 step index,
+# one reserved byte, then 4-bit codes (low nibble first) for the rest
+ADPCM_BLOCK_BYTES = 68
+ADPCM_SAMPLES_PER_BLOCK = (ADPCM_BLOCK_BYTES - 4) * 2 + 1
+
+ADPCM_STEP_TABLE = np.array([
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487,
+    12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767,
+], dtype=np.int32)
+ADPCM_INDEX_TABLE = np.array([-1, -1, -1, -1, 2, 4, 6, 8] * 2, dtype=np.int32)
+
+def _build_adpcm_tables():
+    # Signed reconstructed difference and next step index for every
+    # (step index, code) pair, flattened as index * 16 + code, so each decode
+    # step is two table lookups instead of the bitwise reference arithmetic
+    step = ADPCM_STEP_TABLE[:, None]
+    code = np.arange(16, dtype=np.int32)[None, :]
+    diff = ((step >> 3) + ((code >> 2) & 1) * step + ((code >> 1) & 1) * (step >> 1)
+            + (code & 1) * (step >> 2))
+    diff = np.where(code & 8, -diff, diff)
+    next_index = np.clip(np.arange(89)[:, None] + ADPCM_INDEX_TABLE[None, :], 0, 88) * 16
+    return diff.ravel().astype(np.int32), next_index.ravel().astype(np.int32)
+
+_ADPCM_DIFF_TABLE, _ADPCM_NEXT_STATE = _build_adpcm_tables()
+
+def _adpcm_update(predictor, state, code):
+    # state is step index * 16
+    key = state + code
+    predictor = np.clip(predictor + _ADPCM_DIFF_TABLE[key], -32768, 32767)
+    return predictor, _ADPCM_NEXT_STATE[key]
+
+def adpcm_encode(samples: np.ndarray) -> bytes:
+    """Encode PCM16 into ADPCM blocks, zero-padding the last block.
+
+    Blocks are independent, so they are encoded in parallel: the loop runs
+    once per sample position with one vector element per block.
+    """
+    samples = np.asarray(samples, dtype=np.int16)
+    padded = -len(samples) % ADPCM_SAMPLES_PER_BLOCK
+    blocks = np.concatenate((samples, np.zeros(padded, dtype=np.int16)))
+    blocks = blocks.reshape(-1, ADPCM_SAMPLES_PER_BLOCK).astype(np.int32)
+
+    predictor = blocks[:, 0].copy()
+    # Start each block with a step size matched to its typical sample delta
+    typical_delta = np.mean(np.abs(np.diff(blocks, axis=1)), axis=1)
+    index = np.clip(np.searchsorted(ADPCM_STEP_TABLE, typical_delta), 0, 88).astype(np.int32)
+    first_index = index.copy()
+    state = index * 16
+
+    codes = np.empty((len(blocks), ADPCM_SAMPLES_PER_BLOCK - 1), dtype=np.int32)
+    for i in range(1, ADPCM_SAMPLES_PER_BLOCK):
+        step = ADPCM_STEP_TABLE[state >> 4]
+        diff = blocks[:, i] - predictor
+        code = np.where(diff < 0, 8, 0)
+        diff = np.abs(diff)
+        for bit, shift in ((4, 0), (2, 1), (1, 2)):
+            hit = diff >= (step >> shift)
+            code |= np.where(hit, bit, 0)
+            diff = np.where(hit, diff - (step >> shift), diff)
+        codes[:, i - 1] = code
+        predictor, state = _adpcm_update(predictor, state, code)
+
+    out = np.zeros((len(blocks), ADPCM_BLOCK_BYTES), dtype=np.uint8)
+    out[:, 0:2] = blocks[:, 0].astype('<i2').view(np.uint8).reshape(-1, 2)
+    out[:, 2] = first_index
+    out[:, 4:] = (codes[:, 0::2] | (codes[:, 1::2] << 4)).astype(np.uint8)
+    return out.tobytes()
+
+def adpcm_decode(data) -> np.ndarray:
+    """Decode ADPCM blocks to PCM16, all blocks in parallel"""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) % ADPCM_BLOCK_BYTES:
+        raise ValueError(f"ADPCM data must be a multiple of {ADPCM_BLOCK_BYTES} bytes")
+    blocks = raw.reshape(-1, ADPCM_BLOCK_BYTES)
+
+    predictor = blocks[:, 0:2].copy().view('<i2')[:, 0].astype(np.int32)
+    state = np.minimum(blocks[:, 2].astype(np.int32), 88) * 16
+    codes = np.empty((len(blocks), ADPCM_SAMPLES_PER_BLOCK - 1), dtype=np.int32)
+    codes[:, 0::2] = blocks[:, 4:] & 0x0F
+    codes[:, 1::2] = blocks[:, 4:] >> 4
+
+    out = np.empty((len(blocks), ADPCM_SAMPLES_PER_BLOCK), dtype=np.int16)
+    out[:, 0] = predictor
+    for i in range(ADPCM_SAMPLES_PER_BLOCK - 1):
+        predictor, state = _adpcm_update(predictor, state, codes[:, i])
+        out[:, i + 1] = predictor
+    return out.ravel()
+
+def decode_audio(data, codec: str):
+    """Turn an uplink frame in the negotiated codec into PCM16 bytes"""
+    if codec == "pcm":
+        return data
+    if codec == "mulaw":
+        return mulaw_decode(data).tobytes()
+    if codec == "adpcm":
+        return adpcm_decode(data).tobytes()
+    raise ValueError(f"Unsupported codec: {codec}")
+
+def check_codec(codec: str, channels: int = 1, sample_format: str = "pcm16"):
+    """Validate a codec negotiated in start_recording against the stream format"""
+    if codec not in CODECS:
+        raise ValueError(f"Unsupported codec: {codec}")
+    if codec != "pcm" and sample_format != "pcm16":
+        raise ValueError(f"Codec {codec} decodes to pcm16, not {sample_format}")
+    if codec == "adpcm" and channels != 1:
+        raise ValueError("ADPCM uplink supports mono audio only")
@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, Optional
+from audio_processor import create_audio_processor
+from batch_resampler import BatchResampler
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "thread", "process", "batch")
+
+# Per-session shared memory: first half carries the input chunk, second half the output.
+# A half fits the browser's half-second chunks up to 48 kHz PCM16 (48000 bytes) and
+# their 24 kHz output; larger chunks or outputs are pickled instead
+SHARED_BUFFER_BYTES = 2 * 64 * 1024
+
+# State that lives inside each worker process, keyed by session id
+_worker_processors = {}
+_worker_buffers = {}
+
+def _worker_open(session_id, processor_options):
+    _worker_processors[session_id] = create_audio_processor(**processor_options)
+
+def _worker_attach(session_id, shm_name):
+    _worker_buffers[session_id] = SharedMemory(name=shm_name)
+
+def _worker_call(session_id, method, args, kwargs):
+    return getattr(_worker_processors[session_id], method)(*args, **kwargs)
+
+def _worker_process_shared(session_id, length):
+    shm = _worker_buffers[session_id]
+    half = shm.size // 2
+    with shm.buf[:length] as chunk:
+        processed = _worker_processors[session_id].process_audio_chunk(chunk)
+    if len(processed) > half:
+        return processed
+    shm.buf[half:half + len(processed)] = processed
+    return len(processed)
+
+def _worker_close(session_id):
+    _worker_processors.pop(session_id, None)
+    shm = _worker_buffers.pop(session_id, None)
+    if shm is not None:
+        shm.close()
+
+class AudioExecutor:
+    """Runs the per-session AudioProcessor off (or on) the event loop.
+
+    - inline: call the processor directly on the event loop
+    - thread: run calls on a shared thread pool; NumPy releases the GIL for
+      the heavy parts, so sessions resample in parallel
+    - process: each session is pinned to one worker process that owns its
+      processor state; audio crosses the process boundary through a
+      per-session shared memory block, created with the first chunk,
+      instead of being pickled
+    - batch: decoding and VAD run inline, while resampling for all sessions
+      is gathered over `batch_window_ms` and done in one stacked operation
+      off the loop; `on_batch` is passed on to the BatchResampler
+    """
+
+    def __init__(self, mode: str = "inline", max_workers: Optional[int] = None,
+                 batch_window_ms: float = 5.0, on_batch: Optional[Callable[[int, float], None]] = None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown audio execution mode: {mode}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.thread_pool = None
+        self.batcher = None
+        self.workers = []
+        self.worker_sessions = []
+        self._session_ids = itertools.count()
+        if mode == "thread":
+            self.thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="audio")
+        elif mode == "batch":
+            self.batcher = BatchResampler(window_ms=batch_window_ms, on_batch=on_batch)
+        elif mode == "process":
+            context = multiprocessing.get_context("spawn")
+            # One single-process pool per worker so a session's calls stay on
+            # the process that holds its state, in submission order
+            self.workers = [ProcessPoolExecutor(max_workers=1, mp_context=context)
+                            for _ in range(self.max_workers)]
+            self.worker_sessions = [0] * self.max_workers
+        logger.info(f"Audio executor running in {mode} mode with {self.max_workers} workers")
+
+    async def open_session(self, **processor_options) -> "AudioSession":
+        session = AudioSession(self, next(self._session_ids), processor_options)
+        await session.open()
+        return session
+
+    def shutdown(self):
+        if self.thread_pool:
+            self.thread_pool.shutdown(wait=False, cancel_futures=True)
+        for worker in self.workers:
+            worker.shutdown(wait=False, cancel_futures=True)
+
+class AudioSession:
+    """One connection's view of the AudioExecutor.
+
+    Calls are serialized with a FIFO lock, so chunks are processed and
+    returned strictly in the order they were submitted.
+    """
+
+    def __init__(self, executor: AudioExecutor, session_id: int, processor_options: dict):
+        self.executor = executor
+        self.session_id = session_id
+        self.target_sample_rate = processor_options.get("target_sample_rate", 24000)
+        self.has_vad = processor_options.get("vad_options") is not None
+        self.processor_options = processor_options
+        self.processor = None
+        self.worker = None
+        self.worker_index = None
+        self.shm = None
+        self.lock = asyncio.Lock()
+
+    async def open(self):
+        if self.executor.mode != "process":
+            self.processor = create_audio_processor(**self.processor_options)
+            return
+        sessions = self.executor.worker_sessions
+        self.worker_index = sessions.index(min(sessions))
+        sessions[self.worker_index] += 1
+        self.worker = self.executor.workers[self.worker_index]
+        await asyncio.wrap_future(self.worker.submit(_worker_open, self.session_id, self.processor_options))
+
+    async def _call(self, method, *args, **kwargs):
+        async with self.lock:
+            if self.executor.mode in ("inline", "batch"):
+                return getattr(self.processor, method)(*args, **kwargs)
+            if self.executor.mode == "thread":
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    self.executor.thread_pool, lambda: getattr(self.processor, method)(*args, **kwargs))
+            return await asyncio.wrap_future(self.worker.submit(
+                _worker_call, self.session_id, method, args, kwargs))
+
+    async def _process_batched(self, audio_data) -> bytes:
+        async with self.lock:
+            processor = self.processor
+            if processor.path == "passthrough" or processor.resampler is None:
+                return processor.process_audio_chunk(audio_data)
+            float_data = await self.executor.batcher.resample(processor.resampler, processor.decode(audio_data))
+            return processor.encode(float_data)
+
+    async def process_audio_chunk(self, audio_data) -> bytes:
+        if self.executor.mode == "batch":
+            return await self._process_batched(audio_data)
+        if self.executor.mode != "process" or len(audio_data) > SHARED_BUFFER_BYTES // 2:
+            return await self._call("process_audio_chunk", audio_data)
+        async with self.lock:
+            if self.shm is None:
+                # Connections that never record never hold a segment
+                self.shm = SharedMemory(create=True, size=SHARED_BUFFER_BYTES)
+                await asyncio.wrap_future(self.worker.submit(_worker_attach, self.session_id, self.shm.name))
+            self.shm.buf[:len(audio_data)] = audio_data
+            result = await asyncio.wrap_future(self.worker.submit(
+                _worker_process_shared, self.session_id, len(audio_data)))
+            if isinstance(result, int):
+                half = SHARED_BUFFER_BYTES // 2
+                return bytes(self.shm.buf[half:half + result])
+            return result
+
+    async def configure(self, **audio_format):
+        return await self._call("configure", **audio_format)
+
+    async def flush(self) -> bytes:
+        return await self._call("flush")
+
+    async def stats(self) -> dict:
+        return await self._call("stats")
+
+    async def close(self):
+        if self.executor.mode != "process" or self.worker is None:
+            return
+        async with self.lock:
+            try:
+                await asyncio.wrap_future(self.worker.submit(_worker_close, self.session_id))
+            except Exception as e:
+                logger.error(f"Error closing audio worker session: {e}")
+            self.executor.worker_sessions[self.worker_index] -= 1
+            self.worker = None
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = None
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+from latency_tracker import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+class _Barrier:
+    """Passes through every stage untouched; resolved when it leaves the last one"""
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = asyncio.get_running_loop().create_future()
+
+class PipelineStage:
+    """One step of an AudioPipeline: a handler fed from a bounded queue"""
+
+    def __init__(self, name: str, handler: Callable[[object], Awaitable[Optional[object]]], maxsize: int):
+        self.name = name
+        self.handler = handler
+        self.queue = asyncio.Queue(maxsize)
+        self.latency = LatencyHistogram()  # Time spent in the handler
+        self.wait = LatencyHistogram()     # Time spent queued for this stage
+        self.items = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    def stats(self) -> dict:
+        return {
+            "items": self.items,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "latency": self.latency.stats(),
+            "wait": self.wait.stats(),
+        }
+
+class AudioPipeline:
+    """A session's audio path as stages linked by bounded queues.
+
+    Each stage runs in its own task and passes what its handler returns on to
+    the next stage; returning None drops the item. put() waits while the first
+    queue is full, and a full queue further down stalls the stage feeding it,
+    so a slow upstream pushes back on the WebSocket reader instead of growing
+    memory. flush() returns once everything put before it has left the last
+    stage.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable[[object], Awaitable[Optional[object]]]]], maxsize: int = 32):
+        self.stages = [PipelineStage(name, handler, maxsize) for name, handler in stages]
+        self.tasks = []
+
+    def start(self):
+        for i, stage in enumerate(self.stages):
+            next_stage = self.stages[i + 1] if i + 1 < len(self.stages) else None
+            self.tasks.append(asyncio.create_task(self._run(stage, next_stage)))
+        return self
+
+    async def put(self, item):
+        await self._enqueue(self.stages[0], item)
+
+    async def flush(self):
+        barrier = _Barrier()
+        await self.put(barrier)
+        await barrier.done
+
+    async def _enqueue(self, stage: PipelineStage, item):
+        await stage.queue.put((time.perf_counter(), item))
+        stage.max_depth = max(stage.max_depth, stage.queue.qsize())
+
+    async def _run(self, stage: PipelineStage, next_stage: Optional[PipelineStage]):
+        while True:
+            queued_at, item = await stage.queue.get()
+            if isinstance(item, _Barrier):
+                if next_stage:
+                    await self._enqueue(next_stage, item)
+                elif not item.done.done():
+                    item.done.set_result(None)
+                continue
+            started = time.perf_counter()
+            stage.wait.observe((started - queued_at) * 1000)
+            try:
+                result = await stage.handler(item)
+            except Exception as e:
+                # One bad chunk must not take the stage down with it
+                stage.errors += 1
+                logger.error(f"Error in {stage.name} stage: {e}", exc_info=True)
+                result = None
+            stage.latency.observe((time.perf_counter() - started) * 1000)
+            stage.items += 1
+            if next_stage is None:
+                continue
+            if result is None:
+                stage.dropped += 1
+            else:
+                await self._enqueue(next_stage, result)
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        # Nothing will pass queued barriers along any more
+        for stage in self.stages:
+            while not stage.queue.empty():
+                _, item = stage.queue.get_nowait()
+                if isinstance(item, _Barrier) and not item.done.done():
+                    item.done.cancel()
+
+    def stats(self) -> dict:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+class PipelineStats:
+    """Process-wide per-stage totals, fed one closed pipeline at a time"""
+
+    def __init__(self):
+        self.stages = {}
+        self.sessions = 0
+
+    def merge(self, pipeline: AudioPipeline):
+        self.sessions += 1
+        for stage in pipeline.stages:
+            totals = self.stages.setdefault(stage.name, {
+                "items": 0, "dropped": 0, "errors": 0, "max_depth": 0,
+                "latency": LatencyHistogram(), "wait": LatencyHistogram(),
+            })
+            totals["items"] += stage.items
+            totals["dropped"] += stage.dropped
+            totals["errors"] += stage.errors
+            totals["max_depth"] = max(totals["max_depth"], stage.max_depth)
+            totals["latency"].merge(stage.latency)
+            totals["wait"].merge(stage.wait)
+
+    def stats(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "stages": {
+                name: {**totals, "latency": totals["latency"].stats(), "wait": totals["wait"].stats()}
+                for name, totals in self.stages.items()
+            },
+        }
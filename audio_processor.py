@@ -0,0 +1,130 @@
+import logging
+import wave
+import numpy as np
+from audio_resampler import StreamingResampler
+from voice_activity import VoiceActivityDetector
+from audio_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Sample formats the browser may negotiate in start_recording
+SAMPLE_FORMATS = {
+    "pcm16": np.int16,
+    "float32": np.float32,
+}
+
+class AudioProcessor:
+    def __init__(self, target_sample_rate=24000, vad=None):
+        self.target_sample_rate = target_sample_rate
+        self.resampler = None
+        # Optional VoiceActivityDetector applied to the resampled stream
+        self.vad = vad
+        self.configure(sample_rate=48000)  # Most common sample rate for microphones
+
+    def configure(self, sample_rate=48000, channels=1, sample_format="pcm16"):
+        """Set the input format for the next recording and pick the cheapest path.
+
+        - passthrough: input is already mono PCM16 at the target rate
+        - decimate: integer rate ratio, one strided dot product per chunk
+        - resample: rational polyphase resampling (e.g. 44.1kHz -> 24kHz)
+        Multi-channel input is downmixed to mono before any of these.
+        """
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format: {sample_format}")
+        if not isinstance(sample_rate, int) or not 8000 <= sample_rate <= 192000:
+            raise ValueError(f"Unsupported sample rate: {sample_rate}")
+        if not isinstance(channels, int) or not 1 <= channels <= 8:
+            raise ValueError(f"Unsupported channel count: {channels}")
+
+        self.source_sample_rate = sample_rate
+        self.channels = channels
+        self.sample_format = sample_format
+        self.dtype = SAMPLE_FORMATS[sample_format]
+
+        if sample_rate == self.target_sample_rate:
+            self.resampler = None
+        elif (self.resampler is None or self.resampler.source_rate != sample_rate
+              or self.resampler.target_rate != self.target_sample_rate):
+            # One resampler per connection so filter state carries across chunk boundaries
+            self.resampler = StreamingResampler(sample_rate, self.target_sample_rate)
+        else:
+            self.resampler.reset()
+        if self.vad:
+            self.vad.reset()
+
+        if self.resampler is None:
+            self.path = "passthrough" if channels == 1 and sample_format == "pcm16" else "convert"
+        else:
+            self.path = "decimate" if self.resampler.up == 1 else "resample"
+        logger.info(f"Audio input {sample_rate}Hz, {channels}ch, {sample_format}: using {self.path} path")
+
+    def _to_int16(self, float_data):
+        # Convert back to int16 while preserving amplitude
+        return (float_data * 32768.0).clip(-32768, 32767).astype(np.int16)
+
+    def _finish(self, pcm_data):
+        if self.vad:
+            pcm_data = self.vad.process(pcm_data)
+        return pcm_data.tobytes()
+
+    def decode(self, audio_data):
+        """Convert a raw chunk in the negotiated format to mono float32"""
+        samples = np.frombuffer(audio_data, dtype=self.dtype)
+        if self.channels > 1:
+            # Interleaved frames -> one row per frame, averaged to mono
+            samples = samples.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+
+        # Convert to float32 for better precision during resampling
+        if self.sample_format == "pcm16":
+            return samples.astype(np.float32) / 32768.0
+        return samples.astype(np.float32, copy=False)
+
+    def encode(self, float_data):
+        """Convert resampled float32 audio to the PCM16 bytes sent upstream"""
+        return self._finish(self._to_int16(float_data))
+
+    def process_audio_chunk(self, audio_data):
+        if self.path == "passthrough":
+            if self.vad is None:
+                return bytes(audio_data)
+            return self._finish(np.frombuffer(audio_data, dtype=np.int16))
+
+        float_data = self.decode(audio_data)
+        if self.resampler is not None:
+            # The last few output samples stay in the filter until the
+            # next chunk (or flush) supplies their look-ahead
+            float_data = self.resampler.process(float_data)
+        return self.encode(float_data)
+
+    def flush(self):
+        """Return the audio still held by the resampler/VAD and start a new stream"""
+        tail = b''
+        if self.resampler is not None:
+            tail = self._finish(self._to_int16(self.resampler.flush()))
+        if self.vad:
+            tail += self.vad.flush().tobytes()
+        return tail
+
+    def stats(self):
+        return self.vad.stats() if self.vad else {}
+
+    def save_audio_buffer(self, audio_buffer, filename):
+        with wave.open(filename, 'wb') as wf:
+            wf.setnchannels(1)  # Mono audio
+            wf.setsampwidth(2)  # 2 bytes per sample (16-bit)
+            wf.setframerate(self.target_sample_rate)
+            if isinstance(audio_buffer, AudioRingBuffer):
+                # Write straight from the backing array without joining chunks
+                for segment in audio_buffer.segments():
+                    wf.writeframes(segment)
+            else:
+                for chunk in audio_buffer:
+                    wf.writeframes(chunk)
+        logger.info(f"Saved audio buffer to {filename}")
+
+def create_audio_processor(target_sample_rate=24000, vad_options=None):
+    """Build an AudioProcessor from plain (picklable) options"""
+    vad = None
+    if vad_options is not None:
+        vad = VoiceActivityDetector(sample_rate=target_sample_rate, **vad_options)
+    return AudioProcessor(target_sample_rate=target_sample_rate, vad=vad)
@@ -0,0 +1,116 @@
+import json
+import logging
+import queue
+import threading
+import wave
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class StreamingRecorder:
+    """Archives a recording to disk as it arrives, off the event loop.
+
+    write() only enqueues the chunk on a bounded queue; a background thread
+    appends it to the file. close() finalizes the WAV header (or writes the
+    JSON sidecar for raw PCM). If the disk falls behind and the queue fills,
+    chunks are dropped and counted rather than blocking the caller or
+    growing memory.
+    """
+
+    def __init__(self, filename: str, sample_rate: int = 24000, channels: int = 1,
+                 file_format: str = "wav", max_queue_chunks: int = 64):
+        if file_format not in ("wav", "raw"):
+            raise ValueError(f"Unsupported recording format: {file_format}")
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.file_format = file_format
+        self.queue = queue.Queue(maxsize=max_queue_chunks)
+        self.thread = None
+        self.bytes_written = 0
+        self.dropped_chunks = 0
+        self.error = None
+
+    def start(self):
+        # Open in the caller so a bad path fails immediately
+        if self.file_format == "wav":
+            out = wave.open(self.filename, 'wb')
+            out.setnchannels(self.channels)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+        else:
+            out = open(self.filename, 'wb')
+        self.thread = threading.Thread(target=self._run, args=(out,), name="audio-recorder", daemon=True)
+        self.thread.start()
+        return self
+
+    def _run(self, out):
+        try:
+            while True:
+                chunk = self.queue.get()
+                if chunk is _STOP:
+                    break
+                if self.file_format == "wav":
+                    out.writeframesraw(chunk)
+                else:
+                    out.write(chunk)
+                self.bytes_written += len(chunk)
+        except Exception as e:
+            self.error = e
+            logger.error(f"Error writing recording {self.filename}: {e}", exc_info=True)
+        finally:
+            # wave patches the RIFF/data sizes in the header on close
+            out.close()
+            if self.file_format == "raw":
+                self._write_sidecar()
+
+    def _write_sidecar(self):
+        with open(f"{self.filename}.json", 'w') as f:
+            json.dump({
+                "sample_rate": self.sample_rate,
+                "channels": self.channels,
+                "sample_format": "pcm16",
+                "frames": self.bytes_written // (2 * self.channels),
+            }, f)
+
+    def write(self, audio_data):
+        """Queue a chunk for writing; never blocks"""
+        if self.thread is None:
+            raise RuntimeError("Recorder has not been started")
+        try:
+            self.queue.put_nowait(bytes(audio_data))
+        except queue.Full:
+            self.dropped_chunks += 1
+            if self.dropped_chunks == 1:
+                logger.warning(f"Recorder queue full, dropping audio for {self.filename}")
+
+    def close(self):
+        """Flush queued audio, finalize the file and stop the writer thread.
+
+        Blocks until the writer finishes, so call it via asyncio.to_thread
+        from the event loop.
+        """
+        if self.thread is None:
+            return
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.thread = None
+        logger.info(f"Saved recording to {self.filename} ({self.bytes_written} bytes, "
+                    f"{self.dropped_chunks} chunks dropped)")
+
+def open_recording(filename: str) -> np.memmap:
+    """Memory-map an archived recording's samples without reading the whole file"""
+    if filename.endswith(".wav"):
+        with wave.open(filename, 'rb') as wf:
+            frames, channels = wf.getnframes(), wf.getnchannels()
+        # The wave module writes a canonical 44-byte header
+        offset = 44
+    else:
+        with open(f"{filename}.json") as f:
+            header = json.load(f)
+        frames, channels, offset = header["frames"], header["channels"], 0
+    if frames == 0:
+        return np.zeros((0, channels), dtype=np.int16)
+    return np.memmap(filename, dtype=np.int16, mode='r', offset=offset, shape=(frames, channels))
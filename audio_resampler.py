@@ -0,0 +1,128 @@
+import math
+import logging
+from functools import lru_cache
+from typing import Tuple
+import numpy as np
+import scipy.signal
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=32)
+def design_polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """Design the anti-aliasing filter used by scipy.signal.resample_poly.
+
+    Returns the polyphase tap matrix (one row per phase, taps reversed so a
+    row can be dotted directly against a window of input samples) and the
+    number of leading output samples that belong to the filter delay.
+    The result is cached per (up, down) pair and shared by every resampler.
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    h = scipy.signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0)) * up
+
+    # Same centring as resample_poly so streaming output lines up with it
+    n_pre_pad = down - half_len % down
+    n_pre_remove = (half_len + n_pre_pad) // down
+    h = np.concatenate((np.zeros(n_pre_pad), h))
+
+    taps_per_phase = -(-len(h) // up)
+    h = np.concatenate((h, np.zeros(taps_per_phase * up - len(h))))
+    # Row p holds h[p], h[p + up], h[p + 2*up], ... reversed for windowed dot products
+    polyphase = h.reshape(taps_per_phase, up).T[:, ::-1].astype(np.float32)
+    polyphase = np.ascontiguousarray(polyphase)
+    polyphase.flags.writeable = False
+    return polyphase, n_pre_remove
+
+class StreamingResampler:
+    """Rational polyphase resampler that keeps filter state between chunks.
+
+    Feeding a stream chunk by chunk through process() and then calling
+    flush() yields the same samples as resample_poly over the whole stream.
+    """
+
+    def __init__(self, source_rate: int, target_rate: int):
+        g = math.gcd(source_rate, target_rate)
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.up = target_rate // g
+        self.down = source_rate // g
+        if self.up == self.down:
+            self.polyphase, self.delay = np.ones((1, 1), dtype=np.float32), 0
+        else:
+            self.polyphase, self.delay = design_polyphase_filter(self.up, self.down)
+        self.taps_per_phase = self.polyphase.shape[1]
+        self.reset()
+
+    def reset(self):
+        """Forget all carried state and start a new stream"""
+        self.history = np.zeros(self.taps_per_phase - 1, dtype=np.float32)
+        self.samples_in = 0
+        self.next_output = 0
+
+    def prepare(self, samples: np.ndarray, end: int = None):
+        """Consume input samples and describe the outputs that became ready.
+
+        Returns (windows, starts, phases, skip): output i is the dot product of
+        windows[starts[i]] with polyphase[phases[i]], and the first `skip`
+        outputs are filter delay to discard. Used directly by the batching
+        engine, which computes many streams' outputs in one operation.
+        """
+        if end is None:
+            end = np.iinfo(np.int64).max
+        # Output m depends on input samples up to index (m * down) // up
+        available = ((self.samples_in + len(samples)) * self.up - 1) // self.down + 1
+        end = min(end, available)
+        buf = np.concatenate((self.history, samples))
+        base = self.samples_in - (self.taps_per_phase - 1)
+        self.samples_in += len(samples)
+        if self.taps_per_phase > 1:
+            self.history = buf[len(buf) - (self.taps_per_phase - 1):].copy()
+
+        first_output = self.next_output
+        positions = np.arange(first_output, max(end, first_output), dtype=np.int64) * self.down
+        self.next_output = max(end, first_output)
+        windows = sliding_window_view(buf, min(self.taps_per_phase, len(buf)))
+        starts = positions // self.up - (self.taps_per_phase - 1) - base
+        phases = positions % self.up
+        # Drop the samples that only exist because of the filter delay
+        skip = min(max(self.delay - first_output, 0), len(positions))
+        return windows, starts, phases, skip
+
+    def _filter(self, samples: np.ndarray, end: int = None) -> np.ndarray:
+        windows, starts, phases, skip = self.prepare(samples, end)
+        count = len(starts)
+        if count >= 8 * self.up:
+            # Outputs r, r + up, r + 2*up, ... share a phase and their windows are
+            # exactly `down` samples apart, so each phase is one strided dot product
+            out = np.empty(count, dtype=np.float32)
+            for r in range(self.up):
+                n = (count - r + self.up - 1) // self.up
+                first = starts[r]
+                out[r::self.up] = np.dot(windows[first:first + (n - 1) * self.down + 1:self.down],
+                                         self.polyphase[phases[r]])
+        elif count:
+            out = np.einsum('ij,ij->i', windows[starts], self.polyphase[phases])
+        else:
+            return np.zeros(0, dtype=np.float32)
+        return out[skip:].astype(np.float32, copy=False)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample a chunk of float samples, returning every output that is ready"""
+        samples = np.asarray(samples, dtype=np.float32)
+        if self.up == self.down:
+            return samples
+        return self._filter(samples)
+
+    def flush(self) -> np.ndarray:
+        """Emit the tail still held in the filter and reset for the next stream"""
+        if self.up == self.down or self.samples_in == 0:
+            self.reset()
+            return np.zeros(0, dtype=np.float32)
+
+        n_out = -(-self.samples_in * self.up // self.down)
+        end = self.delay + n_out
+        needed = ((end - 1) * self.down) // self.up + 1 - self.samples_in
+        out = self._filter(np.zeros(max(needed, 0), dtype=np.float32), end)
+        self.reset()
+        return out
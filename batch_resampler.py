@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from audio_resampler import StreamingResampler
+
+logger = logging.getLogger(__name__)
+
+def _alignment_key(resampler: StreamingResampler, samples: np.ndarray):
+    # Streams whose read positions match modulo one filter period and that
+    # receive equally long chunks need identical window offsets and phases
+    # relative to their own position, wherever they are in their stream
+    return (resampler.up, resampler.down, len(samples),
+            resampler.samples_in % resampler.down,
+            resampler.next_output - (resampler.samples_in * resampler.up + resampler.down - 1) // resampler.down)
+
+def _resample_aligned(resamplers: List[StreamingResampler], chunks: List[np.ndarray]) -> List[np.ndarray]:
+    first = resamplers[0]
+    up, down, taps = first.up, first.down, first.taps_per_phase
+    start_input, start_output, n = first.samples_in, first.next_output, len(chunks[0])
+
+    # The key makes window offsets, phases and output count relative to each
+    # row identical, so they are taken from the first stream. Absolute output
+    # positions and the filter-delay skip still differ between streams that
+    # started at different times, so those are tracked per stream.
+    count = max(((start_input + n) * up - 1) // down + 1 - start_output, 0)
+    positions = np.arange(start_output, start_output + count, dtype=np.int64) * down
+    starts = positions // up - start_input
+    skips = [min(max(r.delay - r.next_output, 0), count) for r in resamplers]
+
+    # One row per stream: carried history followed by the new chunk
+    buf = np.concatenate((np.stack([r.history for r in resamplers]), np.stack(chunks)), axis=1)
+    history = buf[:, buf.shape[1] - (taps - 1):].copy() if taps > 1 else None
+    for row, resampler in enumerate(resamplers):
+        if history is not None:
+            resampler.history = history[row]
+        resampler.samples_in += n
+        resampler.next_output += count
+
+    if not count:
+        return [np.zeros(0, dtype=np.float32) for _ in resamplers]
+    windows = sliding_window_view(buf, taps, axis=1)
+    if up == 1:
+        # Integer decimation: every output uses the same taps and the
+        # windows are a plain strided view, so nothing is gathered
+        out = np.einsum('kil,l->ki', windows[:, starts[0]:starts[-1] + 1:down], first.polyphase[0])
+    else:
+        out = np.einsum('kil,il->ki', windows[:, starts], first.polyphase[positions % up])
+    return [row[skip:] for row, skip in zip(out, skips)]
+
+def resample_batch(requests: List[Tuple[StreamingResampler, np.ndarray]]) -> List[np.ndarray]:
+    """Resample chunks from many streams, stacking aligned streams into one 2-D array.
+
+    Requests are grouped by rate pair, chunk length and filter position;
+    each group's histories and chunks are stacked row-wise and filtered
+    with the shared polyphase taps in a single einsum. A stream may appear
+    more than once; its chunks are applied in list order. Returns one
+    output array per request, in the same order.
+    """
+    results = [None] * len(requests)
+    remaining = list(enumerate(requests))
+    while remaining:
+        groups = defaultdict(list)
+        deferred = []
+        seen = set()
+        for index, (resampler, samples) in remaining:
+            # A stream's second chunk must wait until its first has been applied
+            if id(resampler) in seen:
+                deferred.append((index, (resampler, samples)))
+                continue
+            seen.add(id(resampler))
+            samples = np.asarray(samples, dtype=np.float32)
+            if resampler.up == resampler.down:
+                results[index] = samples
+                continue
+            groups[_alignment_key(resampler, samples)].append((index, resampler, samples))
+
+        for members in groups.values():
+            if len(members) == 1:
+                index, resampler, samples = members[0]
+                results[index] = resampler.process(samples)
+                continue
+            outputs = _resample_aligned([m[1] for m in members], [m[2] for m in members])
+            for (index, _, _), output in zip(members, outputs):
+                results[index] = output
+        remaining = deferred
+    return results
+
+class BatchResampler:
+    """Collects resampling work from all sessions and runs it in batches.
+
+    The first chunk to arrive opens a batch window of `window_ms`; every
+    chunk submitted before it closes (or until `max_batch` chunks are
+    waiting) is resampled together by resample_batch() on `executor`
+    (the loop's default executor when None), so the event loop keeps
+    serving sockets meanwhile. Batches run one at a time, in the order
+    they closed, which keeps each stream's chunks in order. A chunk
+    therefore waits at most `window_ms` plus the compute time of its own
+    batch and any still ahead of it. `on_batch(size, wait_seconds)` is
+    called as each batch starts, with how long its oldest chunk waited.
+    """
+
+    def __init__(self, window_ms: float = 5.0, max_batch: int = 256, executor=None,
+                 on_batch: Optional[Callable[[int, float], None]] = None):
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.executor = executor
+        self.on_batch = on_batch
+        self.pending = []
+        self.timer = None
+        self.lock = asyncio.Lock()
+        self.tasks = set()
+        self.batches = 0
+        self.chunks = 0
+        self.max_wait = 0.0
+
+    async def resample(self, resampler: StreamingResampler, samples: np.ndarray) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((resampler, samples, future, time.perf_counter()))
+        if len(self.pending) >= self.max_batch:
+            self._run_batch()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.window, self._run_batch)
+        return await future
+
+    def _run_batch(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._resample(batch))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _resample(self, batch):
+        # The lock is FIFO, so batches reach the executor in the order they closed
+        async with self.lock:
+            started = time.perf_counter()
+            wait = started - min(submitted for _, _, _, submitted in batch)
+            self.batches += 1
+            self.chunks += len(batch)
+            self.max_wait = max(self.max_wait, wait)
+            if self.on_batch:
+                self.on_batch(len(batch), wait)
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(
+                    self.executor, resample_batch, [(resampler, samples) for resampler, samples, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Batch resampling failed: {e}", exc_info=True)
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        for (_, _, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "chunks": self.chunks,
+            "mean_batch_size": self.chunks / self.batches if self.batches else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
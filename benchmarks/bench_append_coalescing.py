@@ -0,0 +1,54 @@
+"""Append messages and client CPU per audio-second, with and without coalescing.
+
+Streams 24 kHz PCM16 through OpenAIRealtimeAudioTextClient.send_audio into
+a socket stub that discards frames, so only the client's own cost
+(base64, json.dumps, frame handling) is measured. Run from the repository
+root:
+
+    python benchmarks/bench_append_coalescing.py
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai_realtime_client import OpenAIRealtimeAudioTextClient
+
+class NullSocket:
+    open = True
+
+    async def send(self, message):
+        pass
+
+async def run(chunk_ms, threshold, seconds):
+    client = OpenAIRealtimeAudioTextClient("unused", append_threshold_bytes=threshold, append_max_delay=60)
+    client.ws = NullSocket()
+    chunk = bytes(24000 * 2 * chunk_ms // 1000)
+    start = time.process_time()
+    for _ in range(int(seconds * 1000 / chunk_ms)):
+        await client.send_audio(chunk)
+    await client.commit_audio()
+    cpu = time.process_time() - start
+    return client.append_messages / seconds, cpu / seconds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=120.0, help="Audio streamed per run")
+    parser.add_argument("--threshold", type=int, default=48000, help="Coalescing threshold in bytes")
+    args = parser.parse_args()
+    # Per-message INFO logging would dominate the measurement
+    logging.getLogger("openai_realtime_client").setLevel(logging.WARNING)
+
+    print(f"{'chunk':>7} {'msgs/s':>8} {'coalesced':>10} {'cpu/audio-s':>12} {'coalesced':>10}")
+    for chunk_ms in (20, 100, 500):
+        messages, cpu = asyncio.run(run(chunk_ms, 0, args.seconds))
+        coalesced_messages, coalesced_cpu = asyncio.run(run(chunk_ms, args.threshold, args.seconds))
+        print(f"{chunk_ms:>5}ms {messages:>8.1f} {coalesced_messages:>10.1f} "
+              f"{cpu * 1e-3:>9.2f} ms {coalesced_cpu * 1e-3:>7.2f} ms")
+
+if __name__ == '__main__':
+    main()
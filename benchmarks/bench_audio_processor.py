@@ -0,0 +1,207 @@
+"""Throughput, latency and memory of AudioProcessor.process_audio_chunk.
+
+Covers chunk sizes from 10 ms to 1 s, several capture rates and, through
+the AudioExecutor, several concurrency levels. Results are printed as a
+table and, with --output, written as JSON; --compare prints the change
+against an earlier JSON run. Run from the repository root:
+
+    python benchmarks/bench_audio_processor.py --output before.json
+    python benchmarks/bench_audio_processor.py --compare before.json
+
+Memory is measured with tracemalloc (which also sees NumPy buffers):
+peak_bytes is the high-water mark while streaming, and retained_blocks is
+the net number of Python memory blocks still allocated afterwards, which
+should stay near zero for a path that does not leak per chunk.
+"""
+import os
+import sys
+import gc
+import json
+import time
+import asyncio
+import platform
+import argparse
+import subprocess
+import tracemalloc
+import numpy as np
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_processor import create_audio_processor
+from audio_executor import AudioExecutor, EXECUTION_MODES
+
+CHUNK_MS = (10, 20, 50, 100, 500, 1000)
+SAMPLE_RATES = (24000, 44100, 48000)
+CONCURRENCY = (1, 8, 32)
+
+def make_chunks(sample_rate, chunk_ms, seconds):
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(int(sample_rate * seconds)) * 3000).astype(np.int16)
+    size = sample_rate * chunk_ms // 1000
+    return [audio[i:i + size].tobytes() for i in range(0, len(audio), size)]
+
+def bench_single(sample_rate, chunk_ms, seconds, repeats):
+    chunks = make_chunks(sample_rate, chunk_ms, seconds)
+    best_cpu, best_wall, latencies = float('inf'), float('inf'), []
+    for _ in range(repeats):
+        processor = create_audio_processor()
+        processor.configure(sample_rate=sample_rate)
+        run_latencies = []
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for chunk in chunks:
+            call_start = time.perf_counter()
+            processor.process_audio_chunk(chunk)
+            run_latencies.append(time.perf_counter() - call_start)
+        processor.flush()
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        if wall < best_wall:
+            best_wall, latencies = wall, run_latencies
+        best_cpu = min(best_cpu, cpu)
+    latencies_us = np.array(latencies) * 1e6
+    return {
+        "chunks_per_sec": len(chunks) / best_wall,
+        "us_per_audio_second": best_cpu / seconds * 1e6,
+        "p50_latency_us": float(np.percentile(latencies_us, 50)),
+        "p99_latency_us": float(np.percentile(latencies_us, 99)),
+    }
+
+def bench_memory(sample_rate, chunk_ms, seconds):
+    chunks = make_chunks(sample_rate, chunk_ms, seconds)
+    processor = create_audio_processor()
+    processor.configure(sample_rate=sample_rate)
+    # Warm up caches (filter design, lookup tables) so they are not counted
+    processor.process_audio_chunk(chunks[0])
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        for chunk in chunks[1:]:
+            processor.process_audio_chunk(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    return {"peak_bytes": peak, "retained_blocks": sys.getallocatedblocks() - blocks_before}
+
+async def bench_concurrent(mode, sessions, sample_rate, chunk_ms, seconds, workers):
+    chunks = make_chunks(sample_rate, chunk_ms, seconds)
+    executor = AudioExecutor(mode, max_workers=workers)
+    try:
+        audio_sessions = [await executor.open_session() for _ in range(sessions)]
+        for session in audio_sessions:
+            await session.configure(sample_rate=sample_rate)
+        latencies = []
+
+        async def stream(session):
+            # As fast as the executor allows, to find the throughput ceiling
+            for chunk in chunks:
+                call_start = time.perf_counter()
+                await session.process_audio_chunk(chunk)
+                latencies.append(time.perf_counter() - call_start)
+            await session.flush()
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        await asyncio.gather(*(stream(session) for session in audio_sessions))
+        cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        for session in audio_sessions:
+            await session.close()
+    finally:
+        executor.shutdown()
+    latencies_us = np.array(latencies) * 1e6
+    return {
+        "chunks_per_sec": len(latencies) / wall,
+        "audio_seconds_per_sec": sessions * seconds / wall,
+        # process_time misses worker processes, so this is only meaningful in-process
+        "us_per_audio_second": cpu / (sessions * seconds) * 1e6 if mode != "process" else None,
+        "p50_latency_us": float(np.percentile(latencies_us, 50)),
+        "p99_latency_us": float(np.percentile(latencies_us, 99)),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def result_key(result):
+    return (result["benchmark"], result.get("mode"), result.get("sessions"),
+            result["sample_rate"], result["chunk_ms"])
+
+def print_comparison(results, baseline_file):
+    with open(baseline_file) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+    print(f"\nChange vs {baseline_file} (negative is better for cost, positive for throughput)")
+    print(f"{'benchmark':>11} {'mode':>7} {'n':>4} {'rate':>6} {'chunk':>7} {'metric':>20} {'change':>8}")
+    for result in results:
+        before = baseline.get(result_key(result))
+        if before is None:
+            continue
+        for metric in ("chunks_per_sec", "us_per_audio_second", "p99_latency_us", "peak_bytes"):
+            if result.get(metric) is None or not before.get(metric):
+                continue
+            change = 100 * (result[metric] / before[metric] - 1)
+            print(f"{result['benchmark']:>11} {result.get('mode') or '-':>7} {result.get('sessions') or '-':>4} "
+                  f"{result['sample_rate']:>6} {result['chunk_ms']:>5}ms {metric:>20} {change:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0, help="Audio streamed per run and session")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--chunk-ms", type=int, nargs="+", default=list(CHUNK_MS))
+    parser.add_argument("--sample-rates", type=int, nargs="+", default=list(SAMPLE_RATES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY))
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "batch"], choices=EXECUTION_MODES)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Compare against a JSON file from an earlier run")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rate':>6} {'chunk':>7} {'chunks/s':>10} {'us/audio-s':>11} {'p99':>10} {'peak mem':>10} {'blocks':>7}")
+    for sample_rate in args.sample_rates:
+        for chunk_ms in args.chunk_ms:
+            single = bench_single(sample_rate, chunk_ms, args.seconds, args.repeats)
+            memory = bench_memory(sample_rate, chunk_ms, args.seconds)
+            results.append({"benchmark": "single", "sample_rate": sample_rate, "chunk_ms": chunk_ms,
+                            **single, **memory})
+            print(f"{sample_rate:>6} {chunk_ms:>5}ms {single['chunks_per_sec']:>10.0f} "
+                  f"{single['us_per_audio_second']:>8.1f} us {single['p99_latency_us']:>7.1f} us "
+                  f"{memory['peak_bytes'] / 1024:>7.0f} KiB {memory['retained_blocks']:>7}")
+
+    # Concurrency at the browser's default capture rate and chunk size
+    sample_rate, chunk_ms = 48000, 500
+    print(f"\n{'mode':>7} {'sessions':>8} {'chunks/s':>10} {'audio-s/s':>10} {'p50':>11} {'p99':>11}")
+    for sessions in args.concurrency:
+        for mode in args.modes:
+            concurrent = asyncio.run(bench_concurrent(mode, sessions, sample_rate, chunk_ms,
+                                                      args.seconds, args.workers))
+            results.append({"benchmark": "concurrent", "mode": mode, "sessions": sessions,
+                            "sample_rate": sample_rate, "chunk_ms": chunk_ms, **concurrent})
+            print(f"{mode:>7} {sessions:>8} {concurrent['chunks_per_sec']:>10.0f} "
+                  f"{concurrent['audio_seconds_per_sec']:>10.0f} {concurrent['p50_latency_us']:>8.0f} us "
+                  f"{concurrent['p99_latency_us']:>8.0f} us")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "metadata": {
+                    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                    "git_revision": git_revision(),
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "scipy": scipy.__version__,
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "seconds": args.seconds,
+                    "repeats": args.repeats,
+                },
+                "results": results,
+            }, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+if __name__ == '__main__':
+    main()
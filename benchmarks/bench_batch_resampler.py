@@ -0,0 +1,57 @@
+"""CPU cost of resampling many sessions' chunks one by one vs. in one batch.
+
+Every session contributes one chunk per round, as it would within a single
+batch window. Sessions start a few chunks apart, as real browsers do, so the
+batch mixes streams at different positions. Run from the repository root:
+
+    python benchmarks/bench_batch_resampler.py --sessions 10 50 200
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_resampler import StreamingResampler
+from batch_resampler import resample_batch
+
+def run(sessions, source_rate, chunk_ms, rounds, batched):
+    rng = np.random.default_rng(0)
+    size = source_rate * chunk_ms // 1000
+    chunk = (rng.standard_normal(size) * 0.1).astype(np.float32)
+    resamplers = [StreamingResampler(source_rate, 24000) for _ in range(sessions)]
+    for i, resampler in enumerate(resamplers):
+        for _ in range(i % 4):
+            resampler.process(chunk)
+    start = time.process_time()
+    for _ in range(rounds):
+        if batched:
+            resample_batch([(resampler, chunk) for resampler in resamplers])
+        else:
+            for resampler in resamplers:
+                resampler.process(chunk)
+    elapsed = time.process_time() - start
+    audio_seconds = sessions * rounds * chunk_ms / 1000
+    return elapsed / audio_seconds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--chunk-ms", type=int, nargs="+", default=[10, 20, 100])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rate':>6} {'chunk':>6} {'sessions':>8} {'per-session':>12} {'batched':>10} {'speedup':>8}")
+    for source_rate in (48000, 44100):
+        for chunk_ms in args.chunk_ms:
+            for sessions in args.sessions:
+                single = run(sessions, source_rate, chunk_ms, args.rounds, batched=False)
+                batched = run(sessions, source_rate, chunk_ms, args.rounds, batched=True)
+                print(f"{source_rate:>6} {chunk_ms:>4}ms {sessions:>8} {single:>9.1f}us {batched:>7.1f}us "
+                      f"{single / batched:>7.2f}x")
+    print("(CPU microseconds per audio-second; lower means more sessions per process)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Uplink bandwidth and server decode cost of each browser audio codec.
+
+For every capture rate the browser may use, reports the bitrate on the
+WebSocket, the bandwidth saved per session compared to raw PCM16, and
+the server CPU spent decoding one second of audio sent in 500 ms chunks.
+Run from the repository root:
+
+    python benchmarks/bench_codecs.py
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_codecs import ADPCM_SAMPLES_PER_BLOCK, adpcm_encode, decode_audio, mulaw_encode
+
+ENCODERS = {
+    "pcm": lambda pcm: pcm.tobytes(),
+    "mulaw": mulaw_encode,
+    "adpcm": adpcm_encode,
+}
+
+def speech_like(n, sample_rate, rng):
+    t = np.arange(n) / sample_rate
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    audio = envelope * (6000 * np.sin(2 * np.pi * 180 * t) + 1500 * np.sin(2 * np.pi * 2400 * t))
+    return (audio + rng.normal(0, 200, n)).astype(np.int16)
+
+def cpu_us_per_audio_second(frames, codec, audio_seconds, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.process_time()
+        for frame in frames:
+            decode_audio(frame, codec)
+        best = min(best, time.process_time() - start)
+    return best / audio_seconds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0, help="Audio duration per run")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rate':>6} {'codec':>6} {'kbit/s':>8} {'saved':>7} {'decode':>12} {'SNR':>8}")
+    for sample_rate in (24000, 48000):
+        audio = speech_like(int(sample_rate * args.seconds), sample_rate, rng)
+        # Chunked like main.js: half a second, rounded down to whole ADPCM blocks
+        chunk = sample_rate // 2
+        chunk -= chunk % ADPCM_SAMPLES_PER_BLOCK
+        chunks = [audio[i:i + chunk] for i in range(0, len(audio), chunk)]
+        for codec, encode in ENCODERS.items():
+            frames = [encode(c) for c in chunks]
+            uplink = sum(len(f) for f in frames)
+            decoded = np.concatenate([np.frombuffer(decode_audio(f, codec), dtype=np.int16)[:len(c)]
+                                      for f, c in zip(frames, chunks)])
+            noise = decoded.astype(np.float64) - audio
+            snr = 10 * np.log10(np.mean(audio.astype(np.float64) ** 2) / max(np.mean(noise ** 2), 1e-12))
+            cost = cpu_us_per_audio_second(frames, codec, args.seconds, args.repeats)
+            print(f"{sample_rate:>6} {codec:>6} {uplink * 8 / args.seconds / 1000:>8.1f} "
+                  f"{100 * (1 - uplink / audio.nbytes):>6.1f}% {cost:>9.1f} us {min(snr, 99):>6.1f}dB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Event-loop lag while many sessions push audio through the AudioExecutor.
+
+Each simulated session sends 0.5 s chunks of 48 kHz audio at real-time pace
+while a probe coroutine measures how late a 5 ms sleep wakes up. Run from
+the repository root:
+
+    python benchmarks/bench_event_loop_lag.py --sessions 10 50 200
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_executor import AudioExecutor, EXECUTION_MODES
+
+CHUNK_SECONDS = 0.5
+PROBE_INTERVAL = 0.005
+
+async def simulate_session(session, chunk, chunks_to_send, start_delay):
+    await asyncio.sleep(start_delay)
+    next_send = time.perf_counter()
+    for _ in range(chunks_to_send):
+        await session.process_audio_chunk(chunk)
+        next_send += CHUNK_SECONDS
+        await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+    await session.flush()
+
+async def probe_lag(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+async def run(mode, sessions, seconds, workers):
+    executor = AudioExecutor(mode, max_workers=workers)
+    rng = np.random.default_rng(0)
+    chunk = (rng.standard_normal(int(48000 * CHUNK_SECONDS)) * 3000).astype(np.int16).tobytes()
+    try:
+        audio_sessions = [await executor.open_session() for _ in range(sessions)]
+        lags, stop = [], asyncio.Event()
+        probe = asyncio.create_task(probe_lag(lags, stop))
+        chunks_to_send = int(seconds / CHUNK_SECONDS)
+        await asyncio.gather(*(
+            # Spread session start times over one chunk period, as real traffic would be
+            simulate_session(session, chunk, chunks_to_send, CHUNK_SECONDS * i / sessions)
+            for i, session in enumerate(audio_sessions)
+        ))
+        stop.set()
+        await probe
+        for session in audio_sessions:
+            await session.close()
+    finally:
+        executor.shutdown()
+    lags_ms = np.array(lags) * 1000
+    return np.percentile(lags_ms, 50), np.percentile(lags_ms, 99), lags_ms.max()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--modes", nargs="+", default=list(EXECUTION_MODES), choices=EXECUTION_MODES)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Audio streamed per session")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'sessions':>8} {'p50 lag':>10} {'p99 lag':>10} {'max lag':>10}")
+    for sessions in args.sessions:
+        for mode in args.modes:
+            p50, p99, worst = asyncio.run(run(mode, sessions, args.seconds, args.workers))
+            print(f"{mode:>8} {sessions:>8} {p50:>8.2f}ms {p99:>8.2f}ms {worst:>8.2f}ms")
+
+if __name__ == '__main__':
+    main()
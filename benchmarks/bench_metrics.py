@@ -0,0 +1,71 @@
+"""Cost of recording a metric on the hot path.
+
+Times Counter.inc on an unlabelled counter and on a bound labelled child,
+Gauge.set and Histogram.observe against an empty loop, so only the metric
+call is counted. These are what the audio path uses and must stay under a
+microsecond. A labels() lookup on every update, as the REST endpoints do
+once per request, and render(), paid once per scrape, are shown for
+reference. Run from the repository root:
+
+    python benchmarks/bench_metrics.py --iterations 1000000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+
+BUDGET_NS = 1000
+
+def per_call_ns(func, arg, iterations):
+    def loop(f):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            f(arg)
+        return time.perf_counter_ns() - start
+    baseline = min(loop(lambda _: None) for _ in range(3))
+    elapsed = min(loop(func) for _ in range(3))
+    return max(0, elapsed - baseline) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    registry = MetricsRegistry()
+    counter = registry.counter("chunks_total", "Chunks")
+    errors = registry.counter("errors_total", "Errors", ["type"])
+    gauge = registry.gauge("depth", "Queue depth")
+    histogram = registry.histogram("resample_seconds", "Resample time")
+    routes = registry.histogram("request_seconds", "Request time", ["route", "model"])
+    upstream = errors.labels("upstream")
+
+    # (name, call, argument, held to the budget)
+    cases = [
+        ("Counter.inc", counter.inc, 1, True),
+        ("labelled child inc", upstream.inc, 1, True),
+        ("Gauge.set", gauge.set, 3, True),
+        ("Histogram.observe", histogram.observe, 0.0042, True),
+        ("labels().inc", lambda _: errors.labels("upstream").inc(), None, False),
+        ("labels().observe", lambda s: routes.labels("/api/v1/readability", "gpt-4o").observe(s), 0.0042, False),
+    ]
+    print(f"{'operation':<22} {'ns/call':>8}")
+    over = []
+    for name, func, arg, hot in cases:
+        ns = per_call_ns(func, arg, args.iterations)
+        print(f"{name:<22} {ns:>8.0f}{'' if hot else '  (per request, not held to the budget)'}")
+        if hot and ns >= BUDGET_NS:
+            over.append(name)
+
+    start = time.perf_counter()
+    text = registry.render()
+    print(f"\nrender(): {(time.perf_counter() - start) * 1e6:.0f} µs for {len(text.splitlines())} lines")
+    if over:
+        raise SystemExit(f"Over the {BUDGET_NS} ns budget: {', '.join(over)}")
+    print(f"All hot-path recording calls are under {BUDGET_NS} ns")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""CPU cost per audio-second of the resampling step in AudioProcessor.
+
+Compares the old per-chunk scipy.signal.resample_poly call with the
+stateful StreamingResampler. Run from the repository root:
+
+    python benchmarks/bench_resampler.py
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import scipy.signal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_resampler import StreamingResampler
+
+def per_chunk_resample_poly(chunks, source_rate, target_rate):
+    for chunk in chunks:
+        scipy.signal.resample_poly(chunk, target_rate, source_rate)
+
+def streaming(chunks, source_rate, target_rate):
+    resampler = StreamingResampler(source_rate, target_rate)
+    for chunk in chunks:
+        resampler.process(chunk)
+    resampler.flush()
+
+def cpu_us_per_audio_second(func, chunks, source_rate, target_rate, audio_seconds, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.process_time()
+        func(chunks, source_rate, target_rate)
+        best = min(best, time.process_time() - start)
+    return best / audio_seconds * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=30.0, help="Audio duration per run")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'rate':>14} {'chunk':>8} {'resample_poly':>14} {'streaming':>12} {'speedup':>8}")
+    for source_rate in (48000, 44100):
+        signal = (rng.standard_normal(int(source_rate * args.seconds)) * 0.1).astype(np.float32)
+        for chunk_ms in (10, 100, 500):
+            size = source_rate * chunk_ms // 1000
+            chunks = [signal[i:i + size] for i in range(0, len(signal), size)]
+            before = cpu_us_per_audio_second(per_chunk_resample_poly, chunks, source_rate, 24000, args.seconds, args.repeats)
+            after = cpu_us_per_audio_second(streaming, chunks, source_rate, 24000, args.seconds, args.repeats)
+            print(f"{source_rate:>8}->24000 {chunk_ms:>6}ms {before:>11.1f} us {after:>9.1f} us {before / after:>7.2f}x")
+
+if __name__ == '__main__':
+    main()
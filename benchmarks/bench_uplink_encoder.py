@@ -0,0 +1,64 @@
+"""Cost of turning an audio chunk into the bytes of an append frame.
+
+Compares the original path (dict, base64 to str, json.dumps, then the
+UTF-8 encode websockets does for str messages) with AppendFrameEncoder,
+whose buffer is framed directly. Masking happens on both paths and is
+left out. "copied" counts the bytes written into intermediate objects
+for one frame, and "peak" is the tracemalloc high-water mark. Run from
+the repository root:
+
+    python benchmarks/bench_uplink_encoder.py
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from realtime_frames import AppendFrameEncoder
+
+def original(audio):
+    audio_str = base64.b64encode(audio).decode('utf-8')
+    message = json.dumps({"type": "input_audio_buffer.append", "audio": audio_str})
+    frame = message.encode('utf-8')
+    return frame, len(audio_str) + len(audio_str) + len(message) + len(frame)
+
+def make_encoded(encoder):
+    def encoded(audio):
+        frame = encoder.encode(audio)
+        # b2a_base64 output, then the copy into the reusable buffer
+        payload = 4 * ((len(audio) + 2) // 3)
+        return frame, 2 * payload
+    return encoded
+
+def measure(func, audio, frames):
+    func(audio)
+    start = time.perf_counter()
+    for _ in range(frames):
+        func(audio)
+    us = (time.perf_counter() - start) / frames * 1e6
+    tracemalloc.start()
+    _, copied = func(audio)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return us, copied, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    encoder = AppendFrameEncoder()
+    print(f"{'audio':>8} {'path':>9} {'us/frame':>9} {'copied':>10} {'peak':>10}")
+    for audio_ms in (20, 100, 500, 1000):
+        audio = os.urandom(24000 * 2 * audio_ms // 1000)
+        for name, func in (("original", original), ("encoder", make_encoded(encoder))):
+            us, copied, peak = measure(func, audio, args.frames)
+            print(f"{audio_ms:>6}ms {name:>9} {us:>9.1f} {copied / 1024:>7.0f} KiB {peak / 1024:>6.0f} KiB")
+
+if __name__ == '__main__':
+    main()
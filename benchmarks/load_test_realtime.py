@@ -0,0 +1,211 @@
+"""Concurrent browser sessions against realtime_server backed by a mock realtime API.
+
+Starts mock_realtime_server.MockRealtimeServer in this process and
+realtime_server in a uvicorn subprocess pointed at it (OPENAI_REALTIME_URL),
+then opens N simulated browser sessions that stream a mono 16-bit WAV file
+(or synthetic tone bursts) at real-time pace and press Stop. Reports
+time-to-first-token (Stop to the first text message) and stop-to-final
+(Stop to the idle status after response.done) at p50/p95/p99, and the
+server process's CPU time under load and peak RSS, read from /proc on Linux. Each
+session count runs against a fresh server. Run from the repository root:
+
+    python benchmarks/load_test_realtime.py --sessions 1 10 50 --seconds 10
+    python benchmarks/load_test_realtime.py --wav speech.wav --token-rate 30 --jitter 0.5
+"""
+import os
+import sys
+import json
+import time
+import wave
+import socket
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+import numpy as np
+import websockets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mock_realtime_server import MockRealtimeServer
+
+CHUNK_MS = 100
+
+def load_audio(path, seconds):
+    if path:
+        with wave.open(path, 'rb') as f:
+            if f.getnchannels() != 1 or f.getsampwidth() != 2:
+                raise SystemExit(f"{path}: only mono 16-bit WAV is supported")
+            return f.readframes(f.getnframes()), f.getframerate()
+    # 1.5 s tone bursts separated by 0.5 s of quiet noise, so VAD keeps the speech
+    sample_rate = 48000
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    audio = np.sin(2 * np.pi * 220 * t) * 8000 * ((t % 2.0) < 1.5)
+    audio += np.random.default_rng(0).standard_normal(len(t)) * 20
+    return audio.astype(np.int16).tobytes(), sample_rate
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def process_usage(pid):
+    """CPU seconds and peak RSS of a process, or (None, None) off Linux"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{pid}/status") as f:
+            peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+        return cpu, peak_kb * 1024
+    except (OSError, StopIteration):
+        return None, None
+
+async def wait_until_up(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"realtime_server did not start on port {port}")
+
+async def browser_session(url, audio, sample_rate, start_delay, timeout):
+    """One recording; returns (seconds to first text, seconds to final) after Stop"""
+    await asyncio.sleep(start_delay)
+    chunk_bytes = sample_rate * 2 * CHUNK_MS // 1000
+    async with websockets.connect(url, max_size=None) as ws:
+        statuses = asyncio.Queue()
+        stopped_at = first_text_at = None
+        final = asyncio.Event()
+
+        async def read():
+            nonlocal first_text_at
+            async for message in ws:
+                data = json.loads(message)
+                if data["type"] == "status":
+                    statuses.put_nowait(data["status"])
+                    if stopped_at and data["status"] == "idle":
+                        final.set()
+                elif data["type"] == "text" and stopped_at and first_text_at is None and data["content"]:
+                    first_text_at = time.perf_counter()
+                elif data["type"] == "error":
+                    raise RuntimeError(data["content"])
+
+        reader = asyncio.create_task(read())
+        try:
+            while await statuses.get() != "idle":
+                pass
+            await ws.send(json.dumps({"type": "start_recording", "sampleRate": sample_rate, "codec": "pcm"}))
+            while await statuses.get() != "connected":
+                pass
+            next_send = time.perf_counter()
+            chunks = 0
+            for start in range(0, len(audio), chunk_bytes):
+                await ws.send(audio[start:start + chunk_bytes])
+                chunks += 1
+                next_send += CHUNK_MS / 1000
+                await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+            stopped_at = time.perf_counter()
+            await ws.send(json.dumps({"type": "stop_recording", "lastSeq": chunks}))
+            await asyncio.wait_for(final.wait(), timeout)
+            final_at = time.perf_counter()
+        finally:
+            reader.cancel()
+    return (first_text_at or final_at) - stopped_at, final_at - stopped_at
+
+async def run(sessions, audio, sample_rate, args):
+    mock = MockRealtimeServer(token_rate=args.token_rate, jitter=args.jitter,
+                              first_token_delay=args.first_token_delay, seed=0)
+    await mock.start()
+    port = free_port()
+    env = {**os.environ, "OPENAI_REALTIME_URL": mock.url,
+           "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "load-test"),
+           "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "load-test")}
+    server_log = open(args.server_log, 'a') if args.server_log else subprocess.DEVNULL
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "realtime_server:app", "--port", str(port),
+                               "--log-level", "warning"], cwd=ROOT, env=env,
+                              stdout=server_log, stderr=subprocess.STDOUT)
+    try:
+        await wait_until_up(port)
+        # Startup (imports, pool warm-up) is not part of the load
+        startup_cpu, _ = process_usage(server.pid)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            # Spread session starts over one second, as real traffic would be
+            browser_session(f"ws://127.0.0.1:{port}/api/v1/ws", audio, sample_rate, i / sessions,
+                            timeout=args.timeout)
+            for i in range(sessions)
+        ), return_exceptions=True)
+        wall = time.perf_counter() - started
+        cpu, peak_rss = process_usage(server.pid)
+        if cpu is not None:
+            cpu -= startup_cpu
+        server_latency = await asyncio.to_thread(
+            lambda: json.load(urllib.request.urlopen(f"http://127.0.0.1:{port}/api/v1/latency")))
+    finally:
+        server.terminate()
+        # The server closes its upstream sessions on shutdown; keep the mock responsive
+        await asyncio.to_thread(server.wait)
+        await mock.close()
+        if args.server_log:
+            server_log.close()
+
+    ok = [r for r in results if not isinstance(r, BaseException)]
+    for error in (r for r in results if isinstance(r, BaseException)):
+        print(f"  session failed: {error!r}")
+    ttft = np.array([r[0] for r in ok]) * 1000
+    final = np.array([r[1] for r in ok]) * 1000
+    percentiles = lambda values: ({f"p{q}_ms": float(np.percentile(values, q)) for q in (50, 95, 99)}
+                                  if len(values) else {})
+    return {
+        "sessions": sessions,
+        "completed": len(ok),
+        "time_to_first_token": percentiles(ttft),
+        "stop_to_final": percentiles(final),
+        "server_cpu_seconds": cpu,
+        "server_cpu_percent": 100 * cpu / wall if cpu is not None else None,
+        "server_peak_rss_bytes": peak_rss,
+        "server_since_stop": {stage: stats["p50_ms"] for stage, stats in server_latency["since_stop"].items()},
+        "mock_appends": mock.appends,
+        "mock_responses": mock.responses,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--wav", help="Mono 16-bit WAV to stream (default: synthetic audio)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Length of the synthetic audio")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Mock tokens per second")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Mock token gap jitter (fraction)")
+    parser.add_argument("--first-token-delay", type=float, default=0.15, help="Mock seconds before the first token")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a final transcript")
+    parser.add_argument("--server-log", help="Append the server's log output to this file")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    audio, sample_rate = load_audio(args.wav, args.seconds)
+    print(f"Streaming {len(audio) / 2 / sample_rate:.1f}s of {sample_rate} Hz audio per session")
+    print(f"{'sessions':>8} {'ok':>4} {'ttft p50':>9} {'p95':>8} {'p99':>8} {'final p50':>10} {'p95':>8} "
+          f"{'p99':>8} {'cpu':>7} {'rss':>9}")
+    results = []
+    for sessions in args.sessions:
+        result = asyncio.run(run(sessions, audio, sample_rate, args))
+        results.append(result)
+        ttft, final = result["time_to_first_token"], result["stop_to_final"]
+        cpu = f"{result['server_cpu_percent']:.0f}%" if result["server_cpu_percent"] is not None else "-"
+        rss = f"{result['server_peak_rss_bytes'] / 2**20:.0f} MiB" if result["server_peak_rss_bytes"] else "-"
+        print(f"{sessions:>8} {result['completed']:>4} {ttft.get('p50_ms', 0):>6.0f} ms {ttft.get('p95_ms', 0):>5.0f} ms "
+              f"{ttft.get('p99_ms', 0):>5.0f} ms {final.get('p50_ms', 0):>7.0f} ms {final.get('p95_ms', 0):>5.0f} ms "
+              f"{final.get('p99_ms', 0):>5.0f} ms {cpu:>7} {rss:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"results": results}, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+if __name__ == '__main__':
+    main()
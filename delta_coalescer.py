@@ -0,0 +1,82 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+class DeltaCoalescer:
+    """Merges response.text.delta tokens into fewer text frames for the browser.
+
+    The first delta of a response is sent at once, so coalescing never
+    delays the first text on screen. Later deltas are held for at most
+    `window` seconds, or until `max_chars` characters are pending, and then
+    sent as one {"type": "text", "isNewResponse": false} frame. Call
+    start_response() when a response begins, and flush() before sending any
+    other frame so the browser sees text in order. A window of 0 sends every
+    delta as it arrives.
+    """
+
+    def __init__(self, send: Callable[[str], Awaitable], window: float = 0.05, max_chars: int = 200):
+        self.send = send
+        self.window = window
+        self.max_chars = max_chars
+        self.pending = []
+        self.pending_chars = 0
+        self.timer = None
+        self.first_delta = True  # The next delta opens a response
+        self.tasks = set()  # Timer-driven flushes still running
+        self.lock = asyncio.Lock()
+        self.deltas = 0
+        self.frames = 0
+
+    async def add(self, delta: str):
+        if not delta:
+            return
+        self.deltas += 1
+        self.pending.append(delta)
+        self.pending_chars += len(delta)
+        if self.window <= 0 or self.first_delta or self.pending_chars >= self.max_chars:
+            self.first_delta = False
+            await self.flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self._on_timer)
+
+    def start_response(self):
+        """Send the next delta without waiting for the window"""
+        self.first_delta = True
+
+    def _on_timer(self):
+        self.timer = None
+        task = asyncio.create_task(self.flush())
+        self.tasks.add(task)
+        task.add_done_callback(self._on_flush_done)
+
+    def _on_flush_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to send coalesced text: {task.exception()}")
+
+    def _cancel_timer(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+    async def flush(self):
+        """Send pending text now; returns once any frame already being sent has gone out"""
+        self._cancel_timer()
+        async with self.lock:
+            if not self.pending:
+                return
+            content, self.pending, self.pending_chars = "".join(self.pending), [], 0
+            self.frames += 1
+            await self.send(json.dumps({"type": "text", "content": content, "isNewResponse": False}))
+
+    def close(self):
+        self._cancel_timer()
+        for task in self.tasks:
+            task.cancel()
+        self.pending, self.pending_chars = [], 0
+
+    def stats(self) -> dict:
+        return {"deltas": self.deltas, "frames": self.frames}
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event types whose handlers depend on each other's order share one lane: a
+# transcript's deltas must land between its response.created and
+# response.done, and conversation items must be recorded before the
+# response.done that releases them. Reconnect and failure notices are ordered
+# with them so handlers see them between the old session's events and the new one's
+ORDERED_PREFIXES = ("response.", "conversation.", "input_audio_buffer.", "error", "session.reconnect",
+                    "session.failed")
+ORDERED_LANE = "conversation"
+
+def lane_for(event_type: str) -> str:
+    if event_type.startswith(ORDERED_PREFIXES):
+        return ORDERED_LANE
+    return event_type
+
+def _mergeable(last: dict, event: dict) -> bool:
+    return (last.get("type") == event.get("type") == "response.text.delta"
+            and all(last.get(key) == event.get(key)
+                    for key in ("response_id", "item_id", "output_index", "content_index")))
+
+class EventDispatcher:
+    """Runs realtime event handlers off the socket-reading path.
+
+    put() queues an event and returns as soon as there is room, so a slow
+    handler no longer stops the client from reading the socket. Each lane
+    (see lane_for) is drained by its own worker in arrival order, while
+    different lanes run concurrently. At most `max_queue` events wait
+    across all lanes; when full, a response.text.delta is merged into the
+    delta queued just before it, and any other event waits for room.
+
+    `on_depth(lane, change)` is called whenever a lane's queue grows or
+    shrinks, and `on_handled(event_type, seconds)` after each handler, so
+    process-wide metrics can follow every client's dispatcher.
+    """
+
+    def __init__(self, get_handler: Callable[[str], Optional[Callable[[dict], Awaitable]]],
+                 max_queue: int = 256, on_depth: Optional[Callable[[str, int], None]] = None,
+                 on_handled: Optional[Callable[[str, float], None]] = None):
+        self.get_handler = get_handler
+        self.max_queue = max_queue
+        self.on_depth = on_depth
+        self.on_handled = on_handled
+        self.lanes = {}
+        self.wakeups = {}
+        self.workers = {}
+        self.busy = set()
+        self.closed = False
+        self.depth = 0
+        self.space = asyncio.Event()
+        self.space.set()
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.max_depth = 0
+        self.dispatched = 0
+        self.merged = 0
+        self.blocked = 0
+        self.handler_calls = defaultdict(int)
+        self.handler_seconds = defaultdict(float)
+        self.handler_max_seconds = defaultdict(float)
+
+    async def put(self, event: dict):
+        if self.closed:
+            return  # No worker would ever run it
+        lane = lane_for(event.get("type", "default"))
+        queue = self.lanes.get(lane)
+        if queue is None:
+            queue = self.lanes[lane] = deque()
+            self.wakeups[lane] = asyncio.Event()
+            self.workers[lane] = asyncio.create_task(self._run_lane(lane))
+
+        if self.depth >= self.max_queue:
+            if queue and _mergeable(queue[-1], event):
+                queue[-1] = {**queue[-1], "delta": queue[-1].get("delta", "") + event.get("delta", "")}
+                self.merged += 1
+                return
+            self.blocked += 1
+            while self.depth >= self.max_queue:
+                self.space.clear()
+                await self.space.wait()
+
+        queue.append(event)
+        self.depth += 1
+        if self.on_depth:
+            self.on_depth(lane, 1)
+        self.max_depth = max(self.max_depth, self.depth)
+        self.idle.clear()
+        self.wakeups[lane].set()
+
+    async def _run_lane(self, lane: str):
+        queue, wakeup = self.lanes[lane], self.wakeups[lane]
+        while not self.closed:
+            while not queue:
+                wakeup.clear()
+                await wakeup.wait()
+            event = queue.popleft()
+            self.depth -= 1
+            if self.on_depth:
+                self.on_depth(lane, -1)
+            self.space.set()
+            self.busy.add(lane)
+            try:
+                await self._handle(event)
+            finally:
+                self.busy.discard(lane)
+                if self.depth == 0 and not self.busy:
+                    self.idle.set()
+
+    async def _handle(self, event: dict):
+        message_type = event.get("type", "default")
+        handler = self.get_handler(message_type)
+        if handler is None:
+            logger.warning(f"No handler for message type: {message_type}")
+            return
+        started = time.perf_counter()
+        try:
+            await handler(event)
+        except Exception as e:
+            logger.error(f"Error in handler for {message_type}: {e}", exc_info=True)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.dispatched += 1
+            self.handler_calls[message_type] += 1
+            self.handler_seconds[message_type] += elapsed
+            self.handler_max_seconds[message_type] = max(self.handler_max_seconds[message_type], elapsed)
+            if self.on_handled:
+                self.on_handled(message_type, elapsed)
+
+    async def join(self):
+        """Wait until every queued event has been handled"""
+        await self.idle.wait()
+
+    def in_worker(self) -> bool:
+        """Whether the calling task is one of this dispatcher's lane workers"""
+        return asyncio.current_task() in self.workers.values()
+
+    async def close(self):
+        """Stop the lane workers; safe to call again, or from a handler"""
+        self.closed = True
+        # A handler may close its own client; let that worker finish on its own
+        current = asyncio.current_task()
+        workers = [worker for worker in self.workers.values() if worker is not current]
+        self.workers = {}
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        # Events left queued will never be handled
+        for lane, queue in self.lanes.items():
+            if queue and self.on_depth:
+                self.on_depth(lane, -len(queue))
+            self.depth -= len(queue)
+            queue.clear()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "dispatched": self.dispatched,
+            "merged_deltas": self.merged,
+            "blocked_puts": self.blocked,
+            "handlers": {
+                message_type: {
+                    "calls": calls,
+                    "mean_ms": self.handler_seconds[message_type] / calls * 1000,
+                    "max_ms": self.handler_max_seconds[message_type] * 1000,
+                }
+                for message_type, calls in self.handler_calls.items()
+            },
+        }
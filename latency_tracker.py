@@ -0,0 +1,129 @@
+import json
+import logging
+import math
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in milliseconds; the last one catches everything slower
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, math.inf)
+
+# What happens after the user presses Stop, in order. Each later stage is
+# reported as the time since stop_received
+STOP_STAGES = ("stop_received", "commit_sent", "response_created", "first_delta",
+               "first_text_sent", "response_done")
+
+# Timed for every audio chunk: decode and resample, the send_audio call,
+# and how long audio waited to be coalesced before its append went out
+CHUNK_STAGES = ("resample", "upstream_send", "append_wait")
+
+class LatencyHistogram:
+    """Counts of observed latencies in fixed millisecond buckets"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (capped at the max seen)"""
+        if not self.count:
+            return 0.0
+        rank = math.ceil(q / 100 * self.count)
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.sum_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }
+
+class RecordingTimeline:
+    """Stage timestamps and per-chunk timings of one recording.
+
+    Stop-path marks are ignored until stop_received, so segments answered
+    while the user was still speaking do not count. Each stage keeps its
+    first time after Stop, except response_done, which keeps its last.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.marks = {}
+        self.chunks = {stage: LatencyHistogram() for stage in CHUNK_STAGES}
+
+    def mark(self, stage: str, at: Optional[float] = None):
+        if stage != "stop_received" and "stop_received" not in self.marks:
+            return
+        if stage == "response_done" or stage not in self.marks:
+            self.marks[stage] = time.perf_counter() if at is None else at
+
+    def observe_chunk(self, stage: str, seconds: float):
+        self.chunks[stage].observe(seconds * 1000)
+
+    def since_stop_ms(self) -> dict:
+        stop = self.marks.get("stop_received")
+        if stop is None:
+            return {}
+        return {stage: (self.marks[stage] - stop) * 1000 for stage in STOP_STAGES[1:] if stage in self.marks}
+
+    def summary(self) -> dict:
+        return {
+            "started": self.started,
+            "since_stop_ms": self.since_stop_ms(),
+            "chunks": {stage: histogram.stats() for stage, histogram in self.chunks.items()},
+        }
+
+class LatencyStats:
+    """Process-wide latency histograms, fed one finished recording at a time"""
+
+    def __init__(self, recent: int = 50):
+        self.stages = {stage: LatencyHistogram() for stage in STOP_STAGES[1:]}
+        self.chunks = {stage: LatencyHistogram() for stage in CHUNK_STAGES}
+        self.recent = deque(maxlen=recent)
+        self.recordings = 0
+
+    def record(self, timeline: RecordingTimeline, **fields) -> dict:
+        """Add a finished recording and write its structured log line"""
+        summary = {**fields, **timeline.summary()}
+        for stage, ms in summary["since_stop_ms"].items():
+            self.stages[stage].observe(ms)
+        for stage, histogram in timeline.chunks.items():
+            self.chunks[stage].merge(histogram)
+        self.recordings += 1
+        self.recent.append(summary)
+        logger.info(json.dumps({"event": "recording_latency", **summary}, default=str))
+        return summary
+
+    def stats(self) -> dict:
+        return {
+            "recordings": self.recordings,
+            "since_stop": {stage: histogram.stats() for stage, histogram in self.stages.items()},
+            "chunks": {stage: histogram.stats() for stage, histogram in self.chunks.items()},
+            "recent": list(self.recent),
+        }
@@ -0,0 +1,243 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import AsyncGenerator, Callable, Optional
+from llm_processor import LLMProcessor
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Text that differs only in line endings, Unicode form or surrounding whitespace gets one entry"""
+    return unicodedata.normalize("NFC", text.replace("\r\n", "\n")).strip()
+
+def cache_key(model: str, prompt: str, text: str) -> str:
+    # The prompt's hash is its version: editing a prompt starts a fresh set of entries
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+    text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model}:{prompt_hash}:{text_hash}"
+
+class LLMResponseCache:
+    """Finished LLM answers in a memory LRU, with an optional SQLite tier behind it.
+
+    The memory tier holds at most `max_bytes` of UTF-8 answer text and drops
+    the least recently used entries first. Entries in both tiers expire
+    `ttl` seconds after they are stored. When `db_path` is set, a memory miss
+    falls through to that SQLite file and a hit there is copied back into
+    memory. `on_lookup` is called with "memory", "disk" or "miss" for every
+    lookup.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_bytes: int = 64 * 2**20, db_path: Optional[str] = None,
+                 on_lookup: Optional[Callable[[str], None]] = None):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.on_lookup = on_lookup
+        self.entries = OrderedDict()  # key -> (expires_at, value, size)
+        self.memory_bytes = 0
+        # ask_ai runs in a worker thread, so the memory tier is shared across threads
+        self.lock = threading.Lock()
+        self.db = None
+        self.db_lock = threading.Lock()
+        if db_path:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS responses "
+                            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self.db.commit()
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory_get(key)
+        if value is None and self.db:
+            value = self._promote(key, self._disk_get(key))
+        return value
+
+    def put(self, key: str, value: str):
+        self._memory_put(key, value)
+        if self.db:
+            self._disk_put(key, value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get() with the SQLite read kept off the event loop"""
+        value = self._memory_get(key)
+        if value is None and self.db:
+            value = self._promote(key, await asyncio.to_thread(self._disk_get, key))
+        return value
+
+    async def aput(self, key: str, value: str):
+        self._memory_put(key, value)
+        if self.db:
+            await asyncio.to_thread(self._disk_put, key, value)
+
+    def _lookup(self, result: str):
+        if result == "miss":
+            self.misses += 1
+        else:
+            self.hits[result] += 1
+        if self.on_lookup:
+            self.on_lookup(result)
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self.entries[key]
+                self.memory_bytes -= entry[2]
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+        if entry is None:
+            if not self.db:
+                self._lookup("miss")
+            return None
+        self._lookup("memory")
+        return entry[1]
+
+    def _memory_put(self, key: str, value: str, expires_at: Optional[float] = None):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old:
+                self.memory_bytes -= old[2]
+            self.entries[key] = (expires_at or time.time() + self.ttl, value, size)
+            self.memory_bytes += size
+            while self.memory_bytes > self.max_bytes:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.memory_bytes -= evicted
+                self.evictions += 1
+
+    def _promote(self, key: str, row) -> Optional[str]:
+        """Copy a live SQLite row into memory"""
+        if row is None or row[1] <= time.time():
+            self._lookup("miss")
+            return None
+        self._memory_put(key, row[0], expires_at=row[1])
+        self._lookup("disk")
+        return row[0]
+
+    def _disk_get(self, key: str):
+        with self.db_lock:
+            return self.db.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+
+    def _disk_put(self, key: str, value: str):
+        now = time.time()
+        with self.db_lock:
+            self.db.execute("INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+                            (key, value, now + self.ttl))
+            self.db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self.db.commit()
+
+    def close(self):
+        if self.db:
+            with self.db_lock:
+                self.db.close()
+            self.db = None
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "memory_bytes": self.memory_bytes,
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+class _SyncFlight:
+    """An answer being fetched on a worker thread, for identical requests to wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.answer: Optional[str] = None
+
+class CachedLLMProcessor(LLMProcessor):
+    """Answers a repeated (model, prompt, text) request from an LLMResponseCache.
+
+    A streamed answer is stored only once its stream has finished, so a
+    failed or abandoned response is never cached. A cached answer is
+    replayed as a stream of `replay_chunk_chars`-character parts. A request
+    that arrives while an identical one is still being answered, such as a
+    double click, waits for that answer instead of calling the model again;
+    if the first request fails, the next waiting one asks the model itself.
+    `on_model_part` is called with the model name for every streamed part
+    that came from the model rather than from the cache.
+    """
+
+    def __init__(self, processor: LLMProcessor, cache: LLMResponseCache, replay_chunk_chars: int = 200,
+                 on_model_part: Optional[Callable[[str], None]] = None):
+        self.processor = processor
+        self.cache = cache
+        self.replay_chunk_chars = replay_chunk_chars
+        self.on_model_part = on_model_part
+        self.flights = {}  # key -> future of the answer being streamed
+        self.sync_flights = {}  # key -> _SyncFlight
+        self.sync_lock = threading.Lock()
+        self.shared = 0
+
+    @property
+    def default_model(self) -> str:
+        return self.processor.default_model
+
+    async def process_text(self, text: str, prompt: str, model: Optional[str] = None) -> AsyncGenerator[str, None]:
+        key = cache_key(model or self.default_model, prompt, text)
+        cached = await self.cache.aget(key)
+        while cached is None and key in self.flights:
+            self.shared += 1
+            # Shielded so a waiter that goes away does not cancel the answer for the others
+            cached = await asyncio.shield(self.flights[key])
+        if cached is not None:
+            logger.info(f"Replaying cached answer for {model or self.default_model} ({len(cached)} chars)")
+            for start in range(0, len(cached), self.replay_chunk_chars):
+                yield cached[start:start + self.replay_chunk_chars]
+            return
+        flight = self.flights[key] = asyncio.get_running_loop().create_future()
+        answer = None
+        try:
+            parts = []
+            async for part in self.processor.process_text(text, prompt, model=model):
+                parts.append(part)
+                if self.on_model_part:
+                    self.on_model_part(model or self.default_model)
+                yield part
+            if parts:
+                answer = "".join(parts)
+                await self.cache.aput(key, answer)
+        finally:
+            del self.flights[key]
+            flight.set_result(answer)
+
+    def process_text_sync(self, text: str, prompt: str, model: Optional[str] = None) -> str:
+        key = cache_key(model or self.default_model, prompt, text)
+        cached = self.cache.get(key)
+        while cached is None:
+            with self.sync_lock:
+                flight = self.sync_flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self.sync_flights[key] = _SyncFlight()
+            if leader:
+                break
+            self.shared += 1
+            flight.done.wait()
+            cached = flight.answer
+        if cached is not None:
+            logger.info(f"Returning cached answer for {model or self.default_model} ({len(cached)} chars)")
+            return cached
+        try:
+            answer = self.processor.process_text_sync(text, prompt, model=model)
+            if answer:
+                self.cache.put(key, answer)
+                flight.answer = answer
+            return answer
+        finally:
+            with self.sync_lock:
+                del self.sync_flights[key]
+            flight.done.set()
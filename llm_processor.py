@@ -28,8 +28,8 @@ class GeminiProcessor(LLMProcessor):
     async def process_text(self, text: str, prompt: str, model: Optional[str] = None) -> AsyncGenerator[str, None]:
         all_prompt = f"{prompt}\n\n{text}"
         model_name = model or self.default_model
-        logger.info(f"Using model: {model_name} for processing")
-        logger.info(f"Prompt: {all_prompt}")
+        logger.info(f"Using model: {model_name} for processing ({len(text)} chars of text)")
+        logger.debug("Prompt: %s", all_prompt)  # Formatted only when debug logging is on
         genai_model = genai.GenerativeModel(model_name)
         response = await genai_model.generate_content_async(
             all_prompt,
@@ -42,8 +42,8 @@ class GeminiProcessor(LLMProcessor):
     def process_text_sync(self, text: str, prompt: str, model: Optional[str] = None) -> str:
         all_prompt = f"{prompt}\n\n{text}"
         model_name = model or self.default_model
-        logger.info(f"Using model: {model_name} for sync processing")
-        logger.info(f"Prompt: {all_prompt}")
+        logger.info(f"Using model: {model_name} for sync processing ({len(text)} chars of text)")
+        logger.debug("Prompt: %s", all_prompt)
         genai_model = genai.GenerativeModel(model_name)
         response = genai_model.generate_content(all_prompt)
         return response.text
@@ -59,8 +59,8 @@ class GPTProcessor(LLMProcessor):
     async def process_text(self, text: str, prompt: str, model: Optional[str] = None) -> AsyncGenerator[str, None]:
         all_prompt = f"{prompt}\n\n{text}"
         model_name = model or self.default_model
-        logger.info(f"Using model: {model_name} for processing")
-        logger.info(f"Prompt: {all_prompt}")
+        logger.info(f"Using model: {model_name} for processing ({len(text)} chars of text)")
+        logger.debug("Prompt: %s", all_prompt)
         response = await self.async_client.chat.completions.create(
             model=model_name,
             messages=[
@@ -75,8 +75,8 @@ class GPTProcessor(LLMProcessor):
     def process_text_sync(self, text: str, prompt: str, model: Optional[str] = None) -> str:
         all_prompt = f"{prompt}\n\n{text}"
         model_name = model or self.default_model
-        logger.info(f"Using model: {model_name} for sync processing")
-        logger.info(f"Prompt: {all_prompt}")
+        logger.info(f"Using model: {model_name} for sync processing ({len(text)} chars of text)")
+        logger.debug("Prompt: %s", all_prompt)
         response = self.sync_client.chat.completions.create(
             model=model_name,
             messages=[
@@ -0,0 +1,137 @@
+import asyncio
+import base64
+import json
+import logging
+import random
+import uuid
+import websockets
+
+logger = logging.getLogger(__name__)
+
+class MockRealtimeServer:
+    """Local stand-in for the OpenAI realtime WebSocket API.
+
+    Speaks the subset of the protocol OpenAIRealtimeAudioTextClient uses:
+    session.created/updated, input_audio_buffer append, commit and clear,
+    conversation.item.delete and response.create. A response streams
+    `tokens_per_audio_second` text deltas per second of committed audio at
+    `token_rate` tokens per second, after `first_token_delay` seconds, with
+    each gap scaled by a random factor within +/-`jitter`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, token_rate: float = 50.0,
+                 jitter: float = 0.2, first_token_delay: float = 0.15,
+                 tokens_per_audio_second: float = 3.0, sample_rate: int = 24000, seed=None):
+        self.host = host
+        self.port = port
+        self.token_rate = token_rate
+        self.jitter = jitter
+        self.first_token_delay = first_token_delay
+        self.tokens_per_audio_second = tokens_per_audio_second
+        self.bytes_per_second = sample_rate * 2
+        self.random = random.Random(seed)
+        self.server = None
+        self.sockets = set()
+        self.connections = 0
+        self.appends = 0
+        self.audio_bytes = 0
+        self.commits = 0
+        self.responses = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/v1/realtime"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info(f"Mock realtime server listening on {self.url}")
+        return self
+
+    async def close(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def drop_connections(self):
+        """Close every client socket abnormally, as a network failure would"""
+        for ws in list(self.sockets):
+            ws.transport.abort()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _delay(self, seconds: float) -> float:
+        return max(0.0, seconds * (1 + self.random.uniform(-self.jitter, self.jitter)))
+
+    async def _handle(self, ws):
+        self.connections += 1
+        self.sockets.add(ws)
+        send_lock = asyncio.Lock()
+
+        async def send(event):
+            async with send_lock:
+                await ws.send(json.dumps(event))
+
+        buffered = 0     # Bytes appended since the last commit
+        unanswered = 0   # Committed bytes no response has covered yet
+        responses = set()
+        await send({"type": "session.created", "session": {"id": f"sess_{uuid.uuid4().hex[:12]}"}})
+        try:
+            async for message in ws:
+                event = json.loads(message)
+                event_type = event.get("type")
+                if event_type == "session.update":
+                    await send({"type": "session.updated", "session": event.get("session", {})})
+                elif event_type == "input_audio_buffer.append":
+                    audio = len(base64.b64decode(event["audio"]))
+                    buffered += audio
+                    self.appends += 1
+                    self.audio_bytes += audio
+                elif event_type == "input_audio_buffer.commit":
+                    item_id = f"item_{uuid.uuid4().hex[:12]}"
+                    unanswered += buffered
+                    buffered = 0
+                    self.commits += 1
+                    await send({"type": "input_audio_buffer.committed", "item_id": item_id})
+                    await send({"type": "conversation.item.created", "item": {"id": item_id}})
+                elif event_type == "input_audio_buffer.clear":
+                    buffered = 0
+                    await send({"type": "input_audio_buffer.cleared"})
+                elif event_type == "conversation.item.delete":
+                    await send({"type": "conversation.item.deleted", "item_id": event.get("item_id")})
+                elif event_type == "response.create":
+                    seconds, unanswered = unanswered / self.bytes_per_second, 0
+                    task = asyncio.create_task(self._respond(send, seconds))
+                    responses.add(task)
+                    task.add_done_callback(responses.discard)
+                else:
+                    await send({"type": "error", "error": {"message": f"Unsupported event: {event_type}"}})
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.sockets.discard(ws)
+            for task in responses:
+                task.cancel()
+
+    async def _respond(self, send, audio_seconds: float):
+        self.responses += 1
+        response_id = f"resp_{uuid.uuid4().hex[:12]}"
+        output_id = f"item_{uuid.uuid4().hex[:12]}"
+        await send({"type": "response.created", "response": {"id": response_id}})
+        tokens = max(1, round(audio_seconds * self.tokens_per_audio_second))
+        await asyncio.sleep(self._delay(self.first_token_delay))
+        text = []
+        for i in range(tokens):
+            if i:
+                await asyncio.sleep(self._delay(1 / self.token_rate))
+            delta = f"word{i} "
+            text.append(delta)
+            await send({"type": "response.text.delta", "response_id": response_id, "item_id": output_id,
+                        "output_index": 0, "content_index": 0, "delta": delta})
+        await send({"type": "response.text.done", "response_id": response_id, "text": "".join(text)})
+        await send({"type": "response.done", "response": {"id": response_id, "output": [{"id": output_id}]}})
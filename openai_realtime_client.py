@@ -1,29 +1,109 @@
 import websockets
 import json
-import base64
 import logging
 import time
 from typing import Optional, Callable, Dict, List
+from collections import deque
 import asyncio
+import realtime_frames
+from realtime_frames import AppendFrameEncoder, send_text_frame
+from event_dispatcher import EventDispatcher
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+# Replayed audio is re-sent in appends of at most this many bytes (10 s at 24 kHz)
+REPLAY_APPEND_BYTES = 480000
+RECONNECT_MAX_DELAY = 8.0
+
+# Upstream events whose arrival is marked on the recording timeline
+TIMELINE_EVENTS = {
+    "response.created": "response_created",
+    "response.text.delta": "first_delta",
+    "response.done": "response_done",
+}
+
 class OpenAIRealtimeAudioTextClient:
-    def __init__(self, api_key: str, model: str = "gpt-4o-realtime-preview"):
+    """Client for OpenAI's realtime API.
+
+    With `append_threshold_bytes` > 0, send_audio() coalesces chunks into
+    fewer, larger input_audio_buffer.append messages: pending audio is sent
+    once it reaches the threshold or has waited `append_max_delay` seconds,
+    and always before a commit.
+
+    Incoming events are handed to an EventDispatcher so slow handlers do
+    not hold up reading the socket; at most `dispatch_queue_size` events
+    wait for their handlers; `on_dispatch_depth` and `on_event_handled`
+    are passed on to it as its on_depth and on_handled hooks.
+
+    If the socket drops, the client reconnects up to `reconnect_attempts`
+    times with exponential backoff and replays what the new session is
+    missing: the audio, commits and response.create of every response that
+    has not completed yet, plus the audio sent since. Sends made while
+    reconnecting are only recorded and go out with the replay. At most
+    `replay_max_bytes` of audio are kept; beyond that the oldest is dropped.
+    Handlers see a session.reconnecting event when the socket drops and a
+    session.reconnected event once the replay has been sent, or a
+    session.failed event when the socket is lost for good.
+
+    While `timeline` is set to a RecordingTimeline, the client records when
+    the commit went out and when response events arrived, before any
+    handler runs, and how long audio waited to be coalesced.
+    """
+
+    def __init__(self, api_key: str, model: str = "gpt-4o-realtime-preview",
+                 append_threshold_bytes: int = 0, append_max_delay: float = 0.2,
+                 dispatch_queue_size: int = 256, reconnect_attempts: int = 5,
+                 reconnect_delay: float = 0.5, replay_max_bytes: int = 48000 * 300,
+                 base_url: str = "wss://api.openai.com/v1/realtime",
+                 on_dispatch_depth: Optional[Callable[[str, int], None]] = None,
+                 on_event_handled: Optional[Callable[[str, float], None]] = None):
         self.api_key = api_key
         self.model = model
         self.ws = None
         self.session_id = None
-        self.base_url = "wss://api.openai.com/v1/realtime"
+        self.base_url = base_url
         self.last_audio_time = None 
         self.auto_commit_interval = 5
         self.receive_task = None
         self.handlers: Dict[str, Callable[[dict], asyncio.Future]] = {}
-        self.queue = asyncio.Queue()
+        self.dispatcher = EventDispatcher(self.get_handler, max_queue=dispatch_queue_size,
+                                          on_depth=on_dispatch_depth, on_handled=on_event_handled)
+        self.append_threshold_bytes = append_threshold_bytes
+        self.append_max_delay = append_max_delay
+        self.pending_audio = bytearray()
+        self.append_timer = None
+        self.append_tasks = set()  # Timer-driven flushes still running
+        self.send_lock = asyncio.Lock()
+        self.append_encoder = AppendFrameEncoder(max(append_threshold_bytes, 48000))
+        self.audio_chunks = 0
+        self.append_messages = 0
+        self.pending_since = None
+        self.timeline = None
+        self.modalities = ["text"]
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+        self.replay_max_bytes = replay_max_bytes
+        self.replay_log = deque()  # ["audio", bytearray] | ["commit"] | ["response", instructions]
+        self.replay_bytes = 0
+        self.reconnecting = False
+        self.closing = False
+        self.reconnects = 0
+        self.replayed_bytes = 0
+        self.dropped_replay_bytes = 0
         
     async def connect(self, modalities: List[str] = ["text"]):
         """Connect to OpenAI's realtime API and configure the session"""
+        self.modalities = modalities
+        await self._open_session()
+        
+        # Register the default handler
+        self.register_handler("default", self.default_handler)
+        
+        # Start the receiver coroutine
+        self.receive_task = asyncio.create_task(self.receive_messages())
+    
+    async def _open_session(self):
         self.ws = await websockets.connect(
             f"{self.base_url}?model={self.model}",
             extra_headers={
@@ -43,33 +123,134 @@ class OpenAIRealtimeAudioTextClient:
             await self.ws.send(json.dumps({
                 "type": "session.update",
                 "session": {
-                    "modalities": modalities,
+                    "modalities": self.modalities,
                     "input_audio_format": "pcm16",
                     "input_audio_transcription": None,
                     "turn_detection": None,
                 }
             }))
-        
-        # Register the default handler
-        self.register_handler("default", self.default_handler)
-        
-        # Start the receiver coroutine
-        self.receive_task = asyncio.create_task(self.receive_messages())
     
     async def receive_messages(self):
         try:
-            async for message in self.ws:
-                data = json.loads(message)
-                message_type = data.get("type", "default")
-                handler = self.handlers.get(message_type, self.handlers.get("default"))
-                if handler:
-                    await handler(data)
-                else:
-                    logger.warning(f"No handler for message type: {message_type}")
-        except websockets.exceptions.ConnectionClosed as e:
-            logger.error(f"OpenAI WebSocket connection closed: {e}")
-        except Exception as e:
-            logger.error(f"Error in receive_messages: {e}", exc_info=True)
+            while True:
+                try:
+                    async for message in self.ws:
+                        event = realtime_frames.json_loads(message)
+                        event_type = event.get("type")
+                        if self.timeline and event_type in TIMELINE_EVENTS:
+                            self.timeline.mark(TIMELINE_EVENTS[event_type])
+                        if event_type == "response.done":
+                            self._forget_response()
+                        await self.dispatcher.put(event)
+                except websockets.exceptions.ConnectionClosed as e:
+                    logger.error(f"OpenAI WebSocket connection closed: {e}")
+                except Exception as e:
+                    logger.error(f"Error in receive_messages: {e}", exc_info=True)
+                    break
+                if self.closing:
+                    break
+                if not await self._reconnect():
+                    # Nothing will answer what was sent; let handlers give up on it
+                    await self.dispatcher.put({"type": "session.failed", "session_id": self.session_id})
+                    break
+            # Let handlers finish the events that arrived before the socket ended
+            await self.dispatcher.join()
+        finally:
+            await self.dispatcher.close()
+    
+    async def _reconnect(self) -> bool:
+        """Open a new session and replay what the lost one had not answered"""
+        if self.reconnect_attempts <= 0:
+            return False
+        self.reconnecting = True
+        await self.dispatcher.put({"type": "session.reconnecting", "session_id": self.session_id})
+        delay = self.reconnect_delay
+        for attempt in range(1, self.reconnect_attempts + 1):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+            try:
+                await self._open_session()
+            except Exception as e:
+                logger.warning(f"Reconnect attempt {attempt}/{self.reconnect_attempts} failed: {e}")
+                continue
+            async with self.send_lock:
+                try:
+                    await self._replay()
+                except websockets.exceptions.ConnectionClosed as e:
+                    logger.warning(f"Connection closed during replay: {e}")
+                    continue
+                self.reconnecting = False
+            self.reconnects += 1
+            logger.info(f"Reconnected to OpenAI as session {self.session_id} after {attempt} attempt(s)")
+            await self.dispatcher.put({"type": "session.reconnected", "session_id": self.session_id})
+            return True
+        self.reconnecting = False
+        logger.error(f"Giving up on OpenAI session after {self.reconnect_attempts} reconnect attempts")
+        return False
+    
+    async def _replay(self):
+        replayed = 0
+        for entry in self.replay_log:
+            if entry[0] == "audio":
+                audio = memoryview(entry[1])
+                for start in range(0, len(audio), REPLAY_APPEND_BYTES):
+                    await send_text_frame(self.ws, self.append_encoder.encode(audio[start:start + REPLAY_APPEND_BYTES]))
+                replayed += len(audio)
+            elif entry[0] == "commit":
+                await self.ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
+            else:
+                await self.ws.send(self._response_message(entry[1]))
+        self.replayed_bytes += replayed
+        logger.info(f"Replayed {replayed} bytes of audio and {len(self.replay_log)} events to the new session")
+    
+    def _record(self, entry: list):
+        if self.reconnect_attempts > 0:
+            self.replay_log.append(entry)
+    
+    def _record_audio(self, audio_data):
+        if self.reconnect_attempts <= 0:
+            return
+        if self.replay_log and self.replay_log[-1][0] == "audio":
+            self.replay_log[-1][1] += audio_data
+        else:
+            self.replay_log.append(["audio", bytearray(audio_data)])
+        self.replay_bytes += len(audio_data)
+        # Trim the oldest audio until the log fits again
+        for entry in self.replay_log:
+            excess = self.replay_bytes - self.replay_max_bytes
+            if excess <= 0:
+                break
+            if entry[0] == "audio":
+                dropped = min(excess, len(entry[1]))
+                if not self.dropped_replay_bytes:
+                    logger.warning(f"Replay buffer reached {self.replay_max_bytes} bytes, dropping the oldest audio")
+                del entry[1][:dropped]
+                self.replay_bytes -= dropped
+                self.dropped_replay_bytes += dropped
+    
+    def _forget_response(self):
+        """Drop everything up to the first pending response, which just completed"""
+        while self.replay_log:
+            entry = self.replay_log.popleft()
+            if entry[0] == "audio":
+                self.replay_bytes -= len(entry[1])
+            elif entry[0] == "response":
+                return
+    
+    def _forget_uncommitted_audio(self):
+        while self.replay_log and self.replay_log[-1][0] == "audio":
+            self.replay_bytes -= len(self.replay_log.pop()[1])
+    
+    def reconnect_stats(self) -> dict:
+        return {
+            "reconnects": self.reconnects,
+            "replay_bytes": self.replay_bytes,
+            "replayed_bytes": self.replayed_bytes,
+            "dropped_replay_bytes": self.dropped_replay_bytes,
+        }
+    
+    def get_handler(self, message_type: str):
+        return self.handlers.get(message_type, self.handlers.get("default"))
     
     def register_handler(self, message_type: str, handler: Callable[[dict], asyncio.Future]):
         self.handlers[message_type] = handler
@@ -79,56 +260,171 @@ class OpenAIRealtimeAudioTextClient:
         logger.warning(f"Unhandled message type received from OpenAI: {message_type}")
     
     async def send_audio(self, audio_data: bytes):
-        if self.ws and self.ws.open:
-            await self.ws.send(json.dumps({
-                "type": "input_audio_buffer.append",
-                "audio": base64.b64encode(audio_data).decode('utf-8')
-            }))
-            logger.info("Sent input_audio_buffer.append message to OpenAI")
-        else:
+        if self.ws is None:
             logger.error("WebSocket is not open. Cannot send audio.")
+            return
+        # A socket that just dropped may not be reconnecting yet; _send_append
+        # still records the audio so the replay can send it
+        self.audio_chunks += 1
+        if self.append_threshold_bytes <= 0 or (not self.pending_audio and len(audio_data) >= self.append_threshold_bytes):
+            # Nothing to merge with; skip the copy into the pending buffer
+            self._cancel_append_timer()
+            await self._send_append(audio_data, time.perf_counter())
+            return
+        if not self.pending_audio:
+            self.pending_since = time.perf_counter()
+        self.pending_audio += audio_data
+        if len(self.pending_audio) >= self.append_threshold_bytes:
+            await self.flush_audio()
+        elif self.append_timer is None:
+            self.append_timer = asyncio.get_running_loop().call_later(self.append_max_delay, self._on_append_timer)
+    
+    def _on_append_timer(self):
+        self.append_timer = None
+        task = asyncio.create_task(self.flush_audio())
+        self.append_tasks.add(task)
+        task.add_done_callback(self._on_append_done)
+
+    def _on_append_done(self, task: asyncio.Task):
+        self.append_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Failed to send coalesced audio: {task.exception()}")
+    
+    def _cancel_append_timer(self):
+        if self.append_timer:
+            self.append_timer.cancel()
+            self.append_timer = None
+    
+    async def flush_audio(self):
+        """Send any coalesced audio that is still pending"""
+        self._cancel_append_timer()
+        if not self.pending_audio:
+            return
+        audio_data, self.pending_audio = self.pending_audio, bytearray()
+        await self._send_append(audio_data, self.pending_since)
+    
+    async def _send_append(self, audio_data: bytes, queued_at: float):
+        # The lock keeps appends in the order their audio was taken
+        async with self.send_lock:
+            self._record_audio(audio_data)
+            if self.reconnecting:
+                return
+            if not (self.ws and self.ws.open):
+                logger.error("WebSocket is not open. Cannot send audio.")
+                return
+            if await self._send(self.append_encoder.encode(audio_data)):
+                self.append_messages += 1
+                if self.timeline:
+                    self.timeline.observe_chunk("append_wait", time.perf_counter() - queued_at)
+                logger.debug("Sent input_audio_buffer.append message to OpenAI")
+    
+    def uplink_stats(self) -> dict:
+        return {
+            "audio_chunks": self.audio_chunks,
+            "append_messages": self.append_messages,
+            "pending_bytes": len(self.pending_audio),
+        }
     
     async def commit_audio(self):
         """Commit the audio buffer and notify OpenAI"""
-        if self.ws and self.ws.open:
-            commit_message = json.dumps({"type": "input_audio_buffer.commit"})
-            await self.ws.send(commit_message)
-            logger.info("Sent input_audio_buffer.commit message to OpenAI")
-            # No recv call here. The receive_messages coroutine handles incoming messages.
-        else:
-            logger.error("WebSocket is not open. Cannot commit audio.")
+        await self.flush_audio()
+        async with self.send_lock:
+            self._record(["commit"])
+            if self.reconnecting:
+                return
+            if self.ws and self.ws.open:
+                commit_message = json.dumps({"type": "input_audio_buffer.commit"})
+                if await self._send(commit_message):
+                    if self.timeline:
+                        self.timeline.mark("commit_sent")
+                    logger.info("Sent input_audio_buffer.commit message to OpenAI")
+                # No recv call here. The receive_messages coroutine handles incoming messages.
+            else:
+                logger.error("WebSocket is not open. Cannot commit audio.")
     
     async def clear_audio_buffer(self):
         """Clear the audio buffer"""
+        # Coalesced audio not yet sent belongs to the buffer being cleared
+        self._cancel_append_timer()
+        self.pending_audio.clear()
+        async with self.send_lock:
+            self._forget_uncommitted_audio()
+            if self.reconnecting:
+                return
+            if self.ws and self.ws.open:
+                clear_message = json.dumps({"type": "input_audio_buffer.clear"})
+                await self.ws.send(clear_message)
+                logger.info("Sent input_audio_buffer.clear message to OpenAI")
+            else:
+                logger.error("WebSocket is not open. Cannot clear audio buffer.")
+    
+    async def delete_conversation_item(self, item_id: str):
+        """Remove an item so it no longer conditions later responses"""
+        if self.reconnecting:
+            # The item went away with the old session
+            return
         if self.ws and self.ws.open:
-            clear_message = json.dumps({"type": "input_audio_buffer.clear"})
-            await self.ws.send(clear_message)
-            logger.info("Sent input_audio_buffer.clear message to OpenAI")
+            await self.ws.send(json.dumps({"type": "conversation.item.delete", "item_id": item_id}))
+            logger.info(f"Sent conversation.item.delete message to OpenAI for {item_id}")
         else:
-            logger.error("WebSocket is not open. Cannot clear audio buffer.")
+            logger.error("WebSocket is not open. Cannot delete conversation item.")
     
     async def start_response(self, instructions: str):
         """Start a new response with given instructions"""
-        if self.ws and self.ws.open:
-            await self.ws.send(json.dumps({
-                "type": "response.create",
-                "response": {
-                    "modalities": ["text"],
-                    "instructions": instructions
-                }
-            }))
-            logger.info(f"Started response with instructions: {instructions}")
-        else:
-            logger.error("WebSocket is not open. Cannot start response.")
+        async with self.send_lock:
+            self._record(["response", instructions])
+            if self.reconnecting:
+                return
+            if self.ws and self.ws.open:
+                if await self._send(self._response_message(instructions)):
+                    logger.info(f"Started response with instructions: {instructions}")
+            else:
+                logger.error("WebSocket is not open. Cannot start response.")
+    
+    async def _send(self, message) -> bool:
+        """Send a recorded event; if the socket is dropping, leave it to the replay"""
+        try:
+            if isinstance(message, str):
+                await self.ws.send(message)
+            else:
+                await send_text_frame(self.ws, message)
+            return True
+        except websockets.exceptions.ConnectionClosed as e:
+            if self.reconnect_attempts <= 0:
+                raise
+            logger.warning(f"Send failed, will replay after reconnecting: {e}")
+            return False
+    
+    def _response_message(self, instructions: str) -> str:
+        return json.dumps({
+            "type": "response.create",
+            "response": {
+                "modalities": ["text"],
+                "instructions": instructions
+            }
+        })
     
     async def close(self):
         """Close the WebSocket connection"""
+        self.closing = True
+        self._cancel_append_timer()
+        for task in self.append_tasks:
+            task.cancel()
+        # From an event handler, the receive task's cleanup would cancel and
+        # wait for the very worker running this call, which is waiting for the
+        # receive task. Stop the other workers first and leave the receive
+        # task to finish on its own
+        in_handler = self.dispatcher.in_worker()
+        if in_handler:
+            await self.dispatcher.close()
         if self.ws:
             await self.ws.close()
             logger.info("Closed OpenAI WebSocket connection")
-        if self.receive_task:
+        if self.receive_task and self.receive_task is not asyncio.current_task():
             self.receive_task.cancel()
-            try:
-                await self.receive_task
-            except asyncio.CancelledError:
-                pass
+            if not in_handler:
+                try:
+                    await self.receive_task
+                except asyncio.CancelledError:
+                    pass
+        await self.dispatcher.close()
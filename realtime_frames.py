@@ -0,0 +1,77 @@
+import binascii
+import json
+import logging
+from websockets.frames import Opcode
+from websockets.legacy.protocol import WebSocketCommonProtocol
+
+logger = logging.getLogger(__name__)
+
+# Byte-for-byte what json.dumps produces for the append message
+APPEND_PREFIX = b'{"type": "input_audio_buffer.append", "audio": "'
+APPEND_SUFFIX = b'"}'
+
+def _json_backends():
+    backends = {"json": json.loads}
+    try:
+        import orjson
+        backends["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        backends["ujson"] = ujson.loads
+    except ImportError:
+        pass
+    return backends
+
+JSON_BACKENDS = _json_backends()
+JSON_BACKEND = next(name for name in ("orjson", "ujson", "json") if name in JSON_BACKENDS)
+json_loads = JSON_BACKENDS[JSON_BACKEND]
+
+def set_json_backend(name: str):
+    """Switch the JSON library used to parse realtime events (json, orjson or ujson)"""
+    global JSON_BACKEND, json_loads
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"JSON backend {name} is not installed")
+    JSON_BACKEND = name
+    json_loads = JSON_BACKENDS[name]
+
+class AppendFrameEncoder:
+    """Builds input_audio_buffer.append messages in one reusable buffer.
+
+    The JSON envelope never changes, so it is written once and only the
+    base64 payload is replaced per message; no dict, str or json.dumps
+    pass over the audio is needed. The returned view aliases the buffer
+    and is only valid until the next encode().
+    """
+
+    def __init__(self, audio_bytes: int = 48000):
+        self.buffer = bytearray()
+        self._reserve(audio_bytes)
+
+    def _reserve(self, audio_bytes: int):
+        size = len(APPEND_PREFIX) + 4 * ((audio_bytes + 2) // 3) + len(APPEND_SUFFIX)
+        if size > len(self.buffer):
+            self.buffer = bytearray(size)
+            self.buffer[:len(APPEND_PREFIX)] = APPEND_PREFIX
+
+    def encode(self, audio_data) -> memoryview:
+        self._reserve(len(audio_data))
+        payload = binascii.b2a_base64(audio_data, newline=False)
+        end = len(APPEND_PREFIX) + len(payload)
+        self.buffer[len(APPEND_PREFIX):end] = payload
+        self.buffer[end:end + len(APPEND_SUFFIX)] = APPEND_SUFFIX
+        return memoryview(self.buffer)[:end + len(APPEND_SUFFIX)]
+
+async def send_text_frame(ws, message: memoryview):
+    """Send an ASCII message held in a buffer as a WebSocket text frame"""
+    if isinstance(ws, WebSocketCommonProtocol):
+        # write_frame skips the state check send() does and raises
+        # InvalidState on a closing socket; check first so callers see
+        # ConnectionClosed either way
+        await ws.ensure_open()
+        # Frame the buffer directly instead of round-tripping through str;
+        # the frame is serialized before write_frame first yields
+        await ws.write_frame(True, Opcode.TEXT, message)
+    else:
+        await ws.send(str(message, 'ascii'))
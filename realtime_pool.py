@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+from openai_realtime_client import OpenAIRealtimeAudioTextClient
+
+logger = logging.getLogger(__name__)
+
+def is_healthy(client: OpenAIRealtimeAudioTextClient) -> bool:
+    """A session is usable while its socket is open and its receiver is running.
+
+    websockets sends keepalive pings on its own and closes the socket when
+    they go unanswered, so a dead upstream shows up here as a closed socket.
+    """
+    return (client.ws is not None and client.ws.open
+            and client.receive_task is not None and not client.receive_task.done())
+
+# Setup events a warm session receives before anyone has registered handlers
+WARMUP_EVENTS = ("session.created", "session.updated")
+
+async def log_warmup_event(data: dict):
+    logger.debug(f"Pooled realtime session received {data.get('type')}")
+
+class RealtimeSessionPool:
+    """Keeps connected, configured realtime sessions warm for start_recording.
+
+    At least `min_size` idle sessions are kept ready. When a burst drains the
+    pool, the target grows by one per cold start, up to `max_size`, and
+    shrinks back as the extra sessions sit idle. A session idle for longer
+    than `idle_timeout` seconds is closed and replaced, so no handed-out
+    session is close to the upstream session lifetime. Every
+    `health_check_interval` seconds dead sessions are dropped and the pool
+    is topped up.
+    """
+
+    def __init__(self, factory: Callable[[], Awaitable[OpenAIRealtimeAudioTextClient]],
+                 min_size: int = 2, max_size: int = 8, idle_timeout: float = 300.0,
+                 health_check_interval: float = 15.0):
+        if min_size < 0 or max_size < max(min_size, 1):
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.target = min_size
+        self.idle = deque()  # (client, time it became idle)
+        self.warming = 0
+        self.tasks = set()
+        self.maintenance_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def start(self):
+        self.maintenance_task = asyncio.create_task(self._maintain())
+        self._fill()
+        return self
+
+    async def acquire(self) -> OpenAIRealtimeAudioTextClient:
+        """Hand out a warm session, or connect a new one if none is ready"""
+        while self.idle:
+            client, _ = self.idle.popleft()
+            if is_healthy(client):
+                self.hits += 1
+                self._fill()
+                return client
+            self._spawn(self._close(client))
+
+        self.misses += 1
+        self.target = min(self.target + 1, self.max_size)
+        self._fill()
+        return await self.factory()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _fill(self):
+        while len(self.idle) + self.warming < self.target:
+            self.warming += 1
+            self._spawn(self._warm_one())
+
+    async def _warm_one(self):
+        try:
+            client = await self.factory()
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Failed to warm realtime session: {e}")
+            return
+        finally:
+            self.warming -= 1
+        # Without these the default handler warns about every pooled session;
+        # the server registers its own handlers when the session is handed out
+        for event_type in WARMUP_EVENTS:
+            client.register_handler(event_type, log_warmup_event)
+        self.idle.append((client, time.monotonic()))
+
+    async def _close(self, client):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled realtime session: {e}")
+
+    def check(self):
+        """Drop dead and expired sessions, then top the pool back up"""
+        now = time.monotonic()
+        kept = deque()
+        expired = 0
+        for client, idle_since in self.idle:
+            if not is_healthy(client):
+                logger.info("Dropping unhealthy pooled realtime session")
+                self._spawn(self._close(client))
+            elif now - idle_since > self.idle_timeout:
+                expired += 1
+                self._spawn(self._close(client))
+            else:
+                kept.append((client, idle_since))
+        self.idle = kept
+        # Burst capacity that went unused for a whole idle period is released
+        self.target = max(self.min_size, self.target - expired)
+        self._fill()
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Realtime pool health check failed: {e}", exc_info=True)
+
+    async def close(self):
+        if self.maintenance_task:
+            self.maintenance_task.cancel()
+            self.maintenance_task = None
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        idle, self.idle = self.idle, deque()
+        await asyncio.gather(*(self._close(client) for client, _ in idle))
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self.idle),
+            "warming": self.warming,
+            "target": self.target,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+        }
+
+class SessionReuseStats:
+    """Process-wide counts of recordings that reused an open upstream session.
+
+    Setup latency is sampled from every recording that had to acquire a
+    session, and each reuse is credited with the mean of those samples.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.setup_seconds = 0.0
+
+    def record_reuse(self):
+        self.hits += 1
+
+    def record_setup(self, seconds: float):
+        self.misses += 1
+        self.setup_seconds += seconds
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def mean_setup_seconds(self) -> float:
+        return self.setup_seconds / self.misses if self.misses else 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        return self.hits * self.mean_setup_seconds
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "mean_setup_ms": self.mean_setup_seconds * 1000,
+            "saved_ms": self.saved_seconds * 1000,
+        }
@@ -1,22 +1,36 @@
 import asyncio
 import json
 import os
+import time
 import numpy as np
 from fastapi import FastAPI, WebSocket, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse
+from fastapi.responses import HTMLResponse, FileResponse, StreamingResponse, PlainTextResponse
 import uvicorn
 import logging
+from contextlib import asynccontextmanager
 from prompts import PROMPTS
 from openai_realtime_client import OpenAIRealtimeAudioTextClient
 from starlette.websockets import WebSocketState
-import wave
 import datetime
-import scipy.signal
 from openai import OpenAI, AsyncOpenAI
 from pydantic import BaseModel, Field
 from typing import Generator
 from llm_processor import get_llm_processor
+from audio_processor import AudioProcessor, SAMPLE_FORMATS
+from audio_executor import AudioExecutor
+from audio_buffer import AudioRingBuffer
+from audio_recorder import StreamingRecorder
+from audio_codecs import check_codec, decode_audio
+from realtime_pool import RealtimeSessionPool, SessionReuseStats, is_healthy
+from transcript_segmenter import TranscriptSegmenter
+from latency_tracker import LatencyStats, RecordingTimeline
+from delta_coalescer import DeltaCoalescer
+from session_manager import AdmissionError, SessionManager
+from audio_pipeline import AudioPipeline, PipelineStats
+from async_logging import AsyncLogging
+from metrics import MetricsRegistry
+from llm_cache import CachedLLMProcessor, LLMResponseCache
 from datetime import datetime, timedelta
 
 # Configure logging
@@ -26,6 +40,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# LOG_ASYNC=1 writes log records from a background thread through a bounded queue
+# of LOG_QUEUE_SIZE records (dropping when full), and caps INFO/DEBUG lines at
+# LOG_RATE_LIMIT per call site per second (0 = no cap)
+LOG_ASYNC = os.getenv("LOG_ASYNC", "0") == "1"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "20"))
+async_logging = AsyncLogging(LOG_QUEUE_SIZE, LOG_RATE_LIMIT).install() if LOG_ASYNC else None
+
 # Pydantic models for request and response schemas
 class ReadabilityRequest(BaseModel):
     text: str = Field(..., description="The text to improve readability for.")
@@ -45,15 +67,226 @@ class AskAIRequest(BaseModel):
 class AskAIResponse(BaseModel):
     answer: str = Field(..., description="AI's answer to the question.")
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global realtime_pool
+    if REALTIME_POOL_MIN_SIZE > 0:
+        realtime_pool = RealtimeSessionPool(
+            connect_realtime_client,
+            min_size=REALTIME_POOL_MIN_SIZE,
+            max_size=max(REALTIME_POOL_MAX_SIZE, REALTIME_POOL_MIN_SIZE),
+            idle_timeout=REALTIME_POOL_IDLE_TIMEOUT,
+        ).start()
+    yield
+    if realtime_pool:
+        await realtime_pool.close()
+        realtime_pool = None
+    if audio_executor:
+        audio_executor.shutdown()
+    if llm_cache:
+        llm_cache.close()
+    if async_logging:
+        log_stats = async_logging.stats()
+        logger.info(f"Logged {log_stats['enqueued']} records in the background, dropped {log_stats['dropped']}, "
+                    f"rate limited {log_stats['suppressed']}")
+        async_logging.uninstall()
+
+app = FastAPI(lifespan=lifespan)
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     logger.error("OPENAI_API_KEY is not set in environment variables.")
     raise EnvironmentError("OPENAI_API_KEY is not set.")
 
+# Server-side voice activity detection trims silence before audio is sent upstream
+VAD_ENABLED = os.getenv("VAD_ENABLED", "0") == "1"
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "300"))
+
+# Bound for audio received before OpenAI is ready (seconds of 24kHz PCM16)
+PENDING_AUDIO_SECONDS = int(os.getenv("PENDING_AUDIO_SECONDS", "10"))
+
+# Archive every recording to this directory for QA (disabled when unset)
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR")
+RECORDING_FORMAT = os.getenv("RECORDING_FORMAT", "wav")  # "wav" or "raw" (PCM + JSON sidecar)
+
+# Where audio DSP runs: "inline" on the event loop, a "thread" pool, a "process" pool,
+# or "batch" to resample all sessions' chunks together every AUDIO_BATCH_WINDOW_MS
+AUDIO_EXECUTION_MODE = os.getenv("AUDIO_EXECUTION_MODE", "thread")
+AUDIO_WORKERS = int(os.getenv("AUDIO_WORKERS", "0")) or None
+AUDIO_BATCH_WINDOW_MS = float(os.getenv("AUDIO_BATCH_WINDOW_MS", "5"))
+audio_executor = None
+
+def get_audio_executor():
+    global audio_executor
+    if audio_executor is None:
+        audio_executor = AudioExecutor(AUDIO_EXECUTION_MODE, AUDIO_WORKERS,
+                                       batch_window_ms=AUDIO_BATCH_WINDOW_MS, on_batch=observe_resample_batch)
+    return audio_executor
+
+# Warm, pre-configured OpenAI realtime sessions handed out on start_recording
+# (REALTIME_POOL_MIN_SIZE=0 connects a fresh session per recording instead)
+REALTIME_POOL_MIN_SIZE = int(os.getenv("REALTIME_POOL_MIN_SIZE", "2"))
+REALTIME_POOL_MAX_SIZE = int(os.getenv("REALTIME_POOL_MAX_SIZE", "8"))
+REALTIME_POOL_IDLE_TIMEOUT = float(os.getenv("REALTIME_POOL_IDLE_TIMEOUT", "300"))
+realtime_pool = None
+
+# Keep a connection's upstream session open between its recordings, clearing
+# the input buffer and conversation after each response, until idle this long
+REALTIME_SESSION_REUSE = os.getenv("REALTIME_SESSION_REUSE", "1") == "1"
+REALTIME_REUSE_IDLE_SECONDS = float(os.getenv("REALTIME_REUSE_IDLE_SECONDS", "60"))
+session_reuse_stats = SessionReuseStats()
+
+# Stop-to-text and per-chunk latency across recordings, served at /api/v1/latency
+latency_stats = LatencyStats()
+
+# Chunks each audio pipeline stage may queue before the stage feeding it waits;
+# a full first queue stops the server reading from that browser
+AUDIO_PIPELINE_QUEUE_SIZE = int(os.getenv("AUDIO_PIPELINE_QUEUE_SIZE", "32"))
+pipeline_stats = PipelineStats()
+
+# Coalesce audio into input_audio_buffer.append messages of about this size
+# (0 sends one message per chunk), waiting at most AUDIO_APPEND_MAX_DELAY_MS
+AUDIO_APPEND_THRESHOLD_BYTES = int(os.getenv("AUDIO_APPEND_THRESHOLD_BYTES", "48000"))
+AUDIO_APPEND_MAX_DELAY_MS = float(os.getenv("AUDIO_APPEND_MAX_DELAY_MS", "200"))
+
+# Text deltas are merged into one browser frame per window, or sooner once
+# this many characters are pending (0 ms sends every delta on its own)
+TEXT_DELTA_FLUSH_MS = float(os.getenv("TEXT_DELTA_FLUSH_MS", "50"))
+TEXT_DELTA_FLUSH_CHARS = int(os.getenv("TEXT_DELTA_FLUSH_CHARS", "200"))
+
+# Status frames never change, so they are serialized once
+STATUS_FRAMES = {status: json.dumps({"type": "status", "status": status})
+                 for status in ("idle", "connecting", "connected")}
+
+# Realtime API endpoint; point it at mock_realtime_server for local load tests
+OPENAI_REALTIME_URL = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime")
+
+# Reconnect a dropped OpenAI socket and replay the audio the new session is missing
+REALTIME_RECONNECT_ATTEMPTS = int(os.getenv("REALTIME_RECONNECT_ATTEMPTS", "5"))
+REALTIME_REPLAY_MAX_SECONDS = float(os.getenv("REALTIME_REPLAY_MAX_SECONDS", "300"))  # 48000 bytes per second of 24 kHz PCM16
+
+# Incremental commit: transcribe a recording in segments while it is still going,
+# committing at the first pause after SEGMENT_MIN_SECONDS or at SEGMENT_MAX_SECONDS
+INCREMENTAL_COMMIT = os.getenv("INCREMENTAL_COMMIT", "0") == "1"
+SEGMENT_MIN_SECONDS = float(os.getenv("SEGMENT_MIN_SECONDS", "5"))
+SEGMENT_MAX_SECONDS = float(os.getenv("SEGMENT_MAX_SECONDS", "15"))
+SEGMENT_PAUSE_MS = int(os.getenv("SEGMENT_PAUSE_MS", "300"))
+
+# Admission control: caps on browser connections, concurrent recordings and the
+# upstream sockets connections hold (idle pooled sessions are capped by
+# REALTIME_POOL_MAX_SIZE). Recordings over the cap wait in a FIFO queue
+MAX_CONNECTIONS = int(os.getenv("MAX_CONNECTIONS", "500"))
+MAX_ACTIVE_RECORDINGS = int(os.getenv("MAX_ACTIVE_RECORDINGS", "50"))
+MAX_UPSTREAM_SESSIONS = int(os.getenv("MAX_UPSTREAM_SESSIONS", "64"))
+RECORDING_QUEUE_SIZE = int(os.getenv("RECORDING_QUEUE_SIZE", "100"))
+RECORDING_QUEUE_TIMEOUT = float(os.getenv("RECORDING_QUEUE_TIMEOUT", "30"))
+
+# Per-recording budgets; a recording that reaches either is stopped and transcribed.
+# The audio a connection holds is already bounded by PENDING_AUDIO_SECONDS and
+# REALTIME_REPLAY_MAX_SECONDS (about 15 MB with the defaults), so the memory
+# cap is opt-in (0 disables it) and only bites below that
+MAX_RECORDING_SECONDS = float(os.getenv("MAX_RECORDING_SECONDS", "600"))
+MAX_SESSION_MEMORY_MB = float(os.getenv("MAX_SESSION_MEMORY_MB", "0"))
+
+session_manager = SessionManager(
+    max_connections=MAX_CONNECTIONS,
+    max_recordings=MAX_ACTIVE_RECORDINGS,
+    max_upstream=max(MAX_UPSTREAM_SESSIONS, MAX_ACTIVE_RECORDINGS),
+    max_queue=RECORDING_QUEUE_SIZE,
+    queue_timeout=RECORDING_QUEUE_TIMEOUT,
+    max_recording_seconds=MAX_RECORDING_SECONDS,
+    max_session_bytes=int(MAX_SESSION_MEMORY_MB * 2**20),
+)
+
+# Operational metrics, served in Prometheus text format at /metrics
+metrics = MetricsRegistry()
+metrics.gauge("brainwave_websocket_sessions", "Open browser WebSocket connections",
+              read=lambda: len(session_manager.leases))
+metrics.gauge("brainwave_active_recordings", "Recordings in progress", read=lambda: session_manager.recordings)
+metrics.gauge("brainwave_waiting_recordings", "Recordings queued for a free slot",
+              read=lambda: len(session_manager.queue))
+audio_ingested_seconds = metrics.counter("brainwave_audio_ingested_seconds_total", "Seconds of audio received from browsers")
+resample_seconds = metrics.histogram("brainwave_resample_seconds", "Time to resample (and VAD) one audio chunk")
+upstream_connect_seconds = metrics.histogram("brainwave_upstream_connect_seconds",
+                                             "Time to get a realtime session that could not be reused")
+first_delta_seconds = metrics.histogram("brainwave_stop_to_first_delta_seconds",
+                                        "Time from Stop to the first response.text.delta")
+request_seconds = metrics.histogram("brainwave_request_seconds",
+                                    "REST endpoint latency, to the end of a streamed body", ["route", "model"])
+llm_tokens_streamed = metrics.counter("brainwave_llm_tokens_streamed_total",
+                                      "Streamed LLM chunks from the model, about one token each; "
+                                      "cached answers are not counted", ["model"])
+
+def count_model_part(model: str):
+    llm_tokens_streamed.labels(model).inc()
+errors_total = metrics.counter("brainwave_errors_total", "Errors by type", ["type"])
+dispatcher_queue_depth = metrics.gauge("brainwave_realtime_event_queue_depth",
+                                       "Realtime events waiting for their handler, across connections, "
+                                       "by dispatcher lane", ["lane"])
+event_handler_seconds = metrics.histogram("brainwave_realtime_event_handler_seconds",
+                                          "Time a realtime event handler took, by event type", ["type"])
+
+resample_batches = metrics.counter("brainwave_resample_batches_total",
+                                   "Resample batches run in batch mode")
+resample_batch_chunks = metrics.counter("brainwave_resample_batch_chunks_total",
+                                        "Chunks resampled in batch mode; divided by batches, the mean batch size")
+resample_batch_wait_seconds = metrics.histogram("brainwave_resample_batch_wait_seconds",
+                                                "How long the oldest chunk of each resample batch waited for it")
+
+def observe_resample_batch(size: int, wait_seconds: float):
+    resample_batches.inc()
+    resample_batch_chunks.inc(size)
+    resample_batch_wait_seconds.observe(wait_seconds)
+
+def track_dispatch_depth(lane: str, change: int):
+    dispatcher_queue_depth.labels(lane).inc(change)
+
+def observe_event_handler(event_type: str, seconds: float):
+    event_handler_seconds.labels(event_type).observe(seconds)
+session_reuse_total = metrics.counter("brainwave_session_reuse_total",
+                                      "Recordings by whether they reused the connection's upstream session "
+                                      "(hit) or had to acquire one (miss)", ["result"])
+session_reuse_saved_seconds = metrics.histogram("brainwave_session_reuse_saved_seconds",
+                                                "Setup time credited to each reused session, "
+                                                "the mean of the acquisitions so far")
+
+async def connect_realtime_client():
+    client = OpenAIRealtimeAudioTextClient(OPENAI_API_KEY,
+                                           append_threshold_bytes=AUDIO_APPEND_THRESHOLD_BYTES,
+                                           append_max_delay=AUDIO_APPEND_MAX_DELAY_MS / 1000,
+                                           reconnect_attempts=REALTIME_RECONNECT_ATTEMPTS,
+                                           replay_max_bytes=int(REALTIME_REPLAY_MAX_SECONDS * 48000),
+                                           base_url=OPENAI_REALTIME_URL,
+                                           on_dispatch_depth=track_dispatch_depth,
+                                           on_event_handled=observe_event_handler)
+    await client.connect()
+    return client
+
+async def acquire_realtime_client():
+    if realtime_pool:
+        return await realtime_pool.acquire()
+    return await connect_realtime_client()
+
+# Cache readability, correctness and ask_ai answers for repeated identical text
+# (LLM_CACHE_TTL_SECONDS=0 disables it); LLM_CACHE_DB adds a persistent SQLite tier
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")
+llm_cache_lookups = metrics.counter("brainwave_llm_cache_lookups_total",
+                                    "LLM answer cache lookups by result (memory, disk or miss)", ["result"])
+llm_cache = None
+if LLM_CACHE_TTL_SECONDS > 0:
+    llm_cache = LLMResponseCache(ttl=LLM_CACHE_TTL_SECONDS, max_bytes=int(LLM_CACHE_MAX_MB * 2**20),
+                                 db_path=LLM_CACHE_DB,
+                                 on_lookup=lambda result: llm_cache_lookups.labels(result).inc())
+    metrics.gauge("brainwave_llm_cache_bytes", "Answer text held in the LLM cache's memory tier",
+                  read=lambda: llm_cache.memory_bytes)
+
 # Initialize with a default model
 llm_processor = get_llm_processor("gpt-4o")  # Default processor
+if llm_cache:
+    llm_processor = CachedLLMProcessor(llm_processor, llm_cache, on_model_part=count_model_part)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -61,70 +294,162 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 async def get_realtime_page(request: Request):
     return FileResponse("static/realtime.html")
 
-class AudioProcessor:
-    def __init__(self, target_sample_rate=24000):
-        self.target_sample_rate = target_sample_rate
-        self.source_sample_rate = 48000  # Most common sample rate for microphones
-        
-    def process_audio_chunk(self, audio_data):
-        # Convert binary audio data to Int16 array
-        pcm_data = np.frombuffer(audio_data, dtype=np.int16)
-        
-        # Convert to float32 for better precision during resampling
-        float_data = pcm_data.astype(np.float32) / 32768.0
-        
-        # Resample from 48kHz to 24kHz
-        resampled_data = scipy.signal.resample_poly(
-            float_data, 
-            self.target_sample_rate, 
-            self.source_sample_rate
-        )
-        
-        # Convert back to int16 while preserving amplitude
-        resampled_int16 = (resampled_data * 32768.0).clip(-32768, 32767).astype(np.int16)
-        return resampled_int16.tobytes()
-
-    def save_audio_buffer(self, audio_buffer, filename):
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(1)  # Mono audio
-            wf.setsampwidth(2)  # 2 bytes per sample (16-bit)
-            wf.setframerate(self.target_sample_rate)
-            wf.writeframes(b''.join(audio_buffer))
-        logger.info(f"Saved audio buffer to {filename}")
-
 @app.websocket("/api/v1/ws")
 async def websocket_endpoint(websocket: WebSocket):
     logger.info("New WebSocket connection attempt")
     await websocket.accept()
-    logger.info("WebSocket connection accepted")
+    try:
+        lease = session_manager.connect()
+    except AdmissionError as e:
+        logger.warning(f"Rejected WebSocket connection: {e}")
+        await websocket.send_text(json.dumps({"type": "error", "content": str(e)}))
+        await websocket.close(code=1013)  # Try again later
+        return
+    logger.info(f"WebSocket connection {lease.id} accepted")
     
+    timeline = None
+
+    async def send_text_to_browser(frame):
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_text(frame)
+            if timeline:
+                timeline.mark("first_text_sent")
+
+    # Pending deltas go out before any other frame, so text stays in order
+    text_deltas = DeltaCoalescer(send_text_to_browser, window=TEXT_DELTA_FLUSH_MS / 1000,
+                                 max_chars=TEXT_DELTA_FLUSH_CHARS)
+    browser_status = None
+
+    async def send_frame(frame):
+        await text_deltas.flush()
+        await websocket.send_text(frame)
+
+    async def send_status(status):
+        # The browser only needs to hear about changes
+        nonlocal browser_status
+        if status == browser_status:
+            return
+        browser_status = status
+        await send_frame(STATUS_FRAMES[status])
+
+    async def send_queue_position(position):
+        nonlocal browser_status
+        # The browser shows a queued recording as connecting
+        browser_status = "connecting"
+        await send_frame(json.dumps({"type": "queued", "position": position}))
+
     # Add initial status update here
-    await websocket.send_text(json.dumps({
-        "type": "status",
-        "status": "idle"  # Set initial status to idle (blue)
-    }))
+    await send_status("idle")  # Set initial status to idle (blue)
     
     client = None
-    audio_processor = AudioProcessor()
-    audio_buffer = []
+    vad_options = None
+    if VAD_ENABLED:
+        vad_options = {"threshold_db": VAD_THRESHOLD_DB, "hangover_ms": VAD_HANGOVER_MS}
+    # Resampling/VAD run through the executor so they don't block other sessions
+    audio_processor = await get_audio_executor().open_session(vad_options=vad_options)
+    # Audio received before OpenAI is ready
     recording_stopped = asyncio.Event()
     openai_ready = asyncio.Event()
-    pending_audio_chunks = []
-    # Add synchronization for audio sending operations
-    pending_audio_operations = 0
-    audio_send_lock = asyncio.Lock()
-    all_audio_sent = asyncio.Event()
-    all_audio_sent.set()  # Initially set since no audio is pending
+    pending_audio = AudioRingBuffer(PENDING_AUDIO_SECONDS * audio_processor.target_sample_rate)
+    recorder = None
+    # Uplink codec negotiated by start_recording, and bytes received vs. decoded
+    audio_codec = "pcm"
+    input_bytes_per_second = 48000 * 2
+    uplink_bytes = 0
+    decoded_bytes = 0
+    # Binary chunks received this recording; stop_recording carries the
+    # browser's count so a lost chunk shows up in the log
+    chunk_seq = 0
+    # Upstream session kept open after a response for the next recording
+    session_reusable = False
+    idle_close_task = None
+    # Admission and upstream setup of a starting recording, run beside the reader
+    setup_task = None
+    conversation_items = []
+    # Segments of the current recording (incremental commit mode)
+    segmenter = TranscriptSegmenter(sample_rate=audio_processor.target_sample_rate,
+                                    min_seconds=SEGMENT_MIN_SECONDS, max_seconds=SEGMENT_MAX_SECONDS,
+                                    pause_ms=SEGMENT_PAUSE_MS, threshold_db=VAD_THRESHOLD_DB)
+    answered_items = []
     
+    def start_archive():
+        nonlocal recorder
+        if not RECORDINGS_DIR:
+            return
+        try:
+            os.makedirs(RECORDINGS_DIR, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            filename = os.path.join(RECORDINGS_DIR, f"recording-{timestamp}.{RECORDING_FORMAT}")
+            recorder = StreamingRecorder(filename, sample_rate=audio_processor.target_sample_rate,
+                                         file_format=RECORDING_FORMAT).start()
+        except Exception as e:
+            logger.error(f"Failed to start recording archive: {e}")
+            recorder = None
+
+    async def close_archive():
+        nonlocal recorder
+        if recorder:
+            # Joining the writer thread waits on disk I/O, so keep it off the event loop
+            await asyncio.to_thread(recorder.close)
+            recorder = None
+
+    def session_memory_bytes():
+        """Audio this connection holds in its pending buffer and upstream replay log"""
+        held = pending_audio.allocated_bytes
+        if client:
+            held += client.replay_bytes
+        return held
+
+    def cancel_idle_close():
+        nonlocal idle_close_task
+        if idle_close_task:
+            idle_close_task.cancel()
+            idle_close_task = None
+
+    async def close_idle_client():
+        nonlocal client, session_reusable, idle_close_task
+        await asyncio.sleep(REALTIME_REUSE_IDLE_SECONDS)
+        idle_close_task = None
+        if client and session_reusable:
+            idle_client, client, session_reusable = client, None, False
+            session_manager.release_upstream(lease)
+            logger.info("Closing idle OpenAI session")
+            await idle_client.close()
+
+    def evict_idle_client():
+        """Give up the idle session at once so a waiting recording can have its socket"""
+        nonlocal client, session_reusable
+        cancel_idle_close()
+        if client and session_reusable:
+            idle_client, client, session_reusable = client, None, False
+            return idle_client.close()
+
     async def initialize_openai():
-        nonlocal client
+        nonlocal client, session_reusable
         try:
             # Clear the ready flag while initializing
             openai_ready.clear()
+            cancel_idle_close()
             
-            client = OpenAIRealtimeAudioTextClient(os.getenv("OPENAI_API_KEY"))
-            await client.connect()
-            logger.info("Successfully connected to OpenAI client")
+            if client and session_reusable and is_healthy(client):
+                session_reuse_stats.record_reuse()
+                session_reuse_total.labels("hit").inc()
+                session_reuse_saved_seconds.observe(session_reuse_stats.mean_setup_seconds)
+                logger.info(f"Reusing OpenAI session (hit rate {session_reuse_stats.hit_rate:.0%}, "
+                            f"~{session_reuse_stats.saved_seconds * 1000:.0f} ms setup saved so far)")
+            else:
+                if client:
+                    # Busy or dead; never let two recordings share a session
+                    await client.close()
+                    client = None
+                started = time.perf_counter()
+                client = await acquire_realtime_client()
+                session_reuse_stats.record_setup(time.perf_counter() - started)
+                session_reuse_total.labels("miss").inc()
+                upstream_connect_seconds.observe(time.perf_counter() - started)
+                logger.info(f"Successfully connected to OpenAI client in {(time.perf_counter() - started) * 1000:.1f} ms")
+            session_reusable = False
+            conversation_items.clear()
             
             # Register handlers after client is initialized
             client.register_handler("session.updated", lambda data: handle_generic_event("session.updated", data))
@@ -132,7 +457,8 @@ async def websocket_endpoint(websocket: WebSocket):
             client.register_handler("input_audio_buffer.speech_started", lambda data: handle_generic_event("input_audio_buffer.speech_started", data))
             client.register_handler("rate_limits.updated", lambda data: handle_generic_event("rate_limits.updated", data))
             client.register_handler("response.output_item.added", lambda data: handle_generic_event("response.output_item.added", data))
-            client.register_handler("conversation.item.created", lambda data: handle_generic_event("conversation.item.created", data))
+            client.register_handler("conversation.item.created", lambda data: handle_item_created(data))
+            client.register_handler("conversation.item.deleted", lambda data: handle_generic_event("conversation.item.deleted", data))
             client.register_handler("response.content_part.added", lambda data: handle_generic_event("response.content_part.added", data))
             client.register_handler("response.text.done", lambda data: handle_generic_event("response.text.done", data))
             client.register_handler("response.content_part.done", lambda data: handle_generic_event("response.content_part.done", data))
@@ -141,17 +467,18 @@ async def websocket_endpoint(websocket: WebSocket):
             client.register_handler("error", lambda data: handle_error(data))
             client.register_handler("response.text.delta", lambda data: handle_text_delta(data))
             client.register_handler("response.created", lambda data: handle_response_created(data))
+            client.register_handler("session.reconnecting", lambda data: handle_reconnecting(data))
+            client.register_handler("session.reconnected", lambda data: handle_reconnected(data))
+            client.register_handler("session.failed", lambda data: handle_session_failed(data))
             
-            openai_ready.set()  # Set ready flag after successful initialization
-            await websocket.send_text(json.dumps({
-                "type": "status",
-                "status": "connected"
-            }))
+            # openai_ready is set by the caller once the buffered audio is out
+            await send_status("connected")
             return True
         except Exception as e:
             logger.error(f"Failed to connect to OpenAI: {e}")
+            errors_total.labels("upstream_connect").inc()
             openai_ready.clear()  # Ensure flag is cleared on failure
-            await websocket.send_text(json.dumps({
+            await send_frame(json.dumps({
                 "type": "error",
                 "content": "Failed to initialize OpenAI connection"
             }))
@@ -159,60 +486,338 @@ async def websocket_endpoint(websocket: WebSocket):
 
     # Move the handler definitions here (before initialize_openai)
     async def handle_text_delta(data):
+        if INCREMENTAL_COMMIT:
+            segmenter.add_text(data.get("delta", ""))
         try:
-            if websocket.client_state == WebSocketState.CONNECTED:
-                await websocket.send_text(json.dumps({
-                    "type": "text",
-                    "content": data.get("delta", ""),
-                    "isNewResponse": False
-                }))
-                logger.info("Handled response.text.delta")
+            await text_deltas.add(data.get("delta", ""))
+            logger.debug("Handled response.text.delta")
         except Exception as e:
             logger.error(f"Error in handle_text_delta: {str(e)}", exc_info=True)
 
     async def handle_response_created(data):
-        await websocket.send_text(json.dumps({
+        text_deltas.start_response()
+        new_response = True
+        content = ""
+        if INCREMENTAL_COMMIT:
+            # Items committed so far are the input of this response
+            answered_items.extend(conversation_items)
+            conversation_items.clear()
+            if not segmenter.is_first_response:
+                # Later segments continue the transcript already on screen
+                new_response = False
+                content = segmenter.separator
+        await send_frame(json.dumps({
             "type": "text",
-            "content": "",
-            "isNewResponse": True
+            "content": content,
+            "isNewResponse": new_response
         }))
         logger.info("Handled response.created")
 
     async def handle_error(data):
         error_msg = data.get("error", {}).get("message", "Unknown error")
         logger.error(f"OpenAI error: {error_msg}")
-        await websocket.send_text(json.dumps({
+        errors_total.labels("upstream").inc()
+        await send_frame(json.dumps({
             "type": "error",
             "content": error_msg
         }))
         logger.info("Handled error message from OpenAI")
 
+    async def handle_reconnecting(data):
+        logger.warning(f"OpenAI session {data.get('session_id')} dropped, reconnecting")
+        await send_status("connecting")
+
+    async def handle_reconnected(data):
+        # Items of the old session are gone; the replay creates new ones
+        conversation_items.clear()
+        answered_items.clear()
+        if INCREMENTAL_COMMIT:
+            segmenter.restart_response()
+        logger.info(f"Resumed on OpenAI session {data.get('session_id')}")
+        await send_status("connected")
+
+    async def handle_session_failed(data):
+        nonlocal client, session_reusable
+        logger.error(f"OpenAI session {data.get('session_id')} was lost and could not be restored")
+        errors_total.labels("upstream").inc()
+        if lease.recording:
+            # No response will come; end the recording so a pending Stop returns
+            await send_frame(json.dumps({
+                "type": "error",
+                "content": "Lost the connection to OpenAI"
+            }))
+            await end_recording()
+        elif client and session_reusable:
+            cancel_idle_close()
+            failed_client, client, session_reusable = client, None, False
+            session_manager.release_upstream(lease)
+            await failed_client.close()
+
+    async def handle_item_created(data):
+        item_id = data.get("item", {}).get("id")
+        if item_id:
+            conversation_items.append(item_id)
+        await handle_generic_event("conversation.item.created", data)
+
+    async def release_session():
+        """Reset the upstream session so the next recording starts from a clean slate"""
+        nonlocal session_reusable, idle_close_task
+        await client.clear_audio_buffer()
+        for item_id in conversation_items:
+            await client.delete_conversation_item(item_id)
+        conversation_items.clear()
+        session_reusable = True
+        idle_close_task = asyncio.create_task(close_idle_client())
+
+    async def request_segment_response():
+        if segmenter.should_respond():
+            segmenter.response_started()
+            await client.start_response(PROMPTS['paraphrase-gpt-realtime'])
+
+    async def commit_segment():
+        logger.info(f"Committing {segmenter.segment_seconds:.1f}s segment")
+        await client.commit_audio()
+        segmenter.committed()
+        await request_segment_response()
+
+    async def finish_segment_response(data):
+        """Drop the answered segment from the conversation and start the next response"""
+        output_items = [item["id"] for item in data.get("response", {}).get("output", []) if "id" in item]
+        for item_id in answered_items + output_items:
+            await client.delete_conversation_item(item_id)
+        answered_items.clear()
+        conversation_items[:] = [item_id for item_id in conversation_items if item_id not in output_items]
+        segmenter.response_finished()
+        await request_segment_response()
+
+    async def finish_segmented_recording():
+        await send_frame(json.dumps({
+            "type": "transcript",
+            "content": segmenter.transcript()
+        }))
+        logger.info(f"Stitched {len(segmenter.texts)} segment transcripts")
+
     async def handle_response_done(data):
-        nonlocal client
         logger.info("Handled response.done")
+        if INCREMENTAL_COMMIT and client:
+            await finish_segment_response(data)
+            if not segmenter.done:
+                return
+            await finish_segmented_recording()
+        await end_recording()
+
+    async def end_recording():
+        nonlocal client, timeline
         recording_stopped.set()
+        if timeline:
+            summary = latency_stats.record(timeline, session_id=client.session_id if client else None,
+                                           codec=audio_codec, incremental=INCREMENTAL_COMMIT)
+            if "first_delta" in summary["since_stop_ms"]:
+                first_delta_seconds.observe(summary["since_stop_ms"]["first_delta"] / 1000)
+            timeline = None
+            if client:
+                client.timeline = None
         
         if client:
             try:
-                await client.close()
-                client = None
                 openai_ready.clear()
-                await websocket.send_text(json.dumps({
-                    "type": "status",
-                    "status": "idle"
-                }))
-                logger.info("Connection closed after response completion")
+                if REALTIME_SESSION_REUSE and is_healthy(client):
+                    await release_session()
+                    logger.info("Kept OpenAI session open for the next recording")
+                else:
+                    await client.close()
+                    client = None
+                    logger.info("Connection closed after response completion")
+                await send_status("idle")
             except Exception as e:
-                logger.error(f"Error closing client after response done: {str(e)}")
+                logger.error(f"Error releasing client after response done: {str(e)}")
+        session_manager.finish_recording(lease, release_idle=evict_idle_client if client and session_reusable else None)
 
     async def handle_generic_event(event_type, data):
-        logger.info(f"Handled {event_type} with data: {json.dumps(data, ensure_ascii=False)}")
+        # Payloads can be large; only serialize them when someone will read them
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Handled {event_type} with data: {json.dumps(data, ensure_ascii=False)}")
+        else:
+            logger.info(f"Handled {event_type}")
+
+    async def begin_recording():
+        """Wait for a recording slot, connect upstream and send what arrived meanwhile"""
+        try:
+            await start_upstream()
+        except Exception as e:
+            logger.error(f"Error starting recording: {e}", exc_info=True)
+            errors_total.labels("websocket").inc()
+
+    async def start_upstream():
+        try:
+            await session_manager.admit(lease, on_position=send_queue_position)
+        except AdmissionError as e:
+            logger.warning(f"Recording on connection {lease.id} not admitted: {e}")
+            errors_total.labels("admission").inc()
+            await send_frame(json.dumps({"type": "recording_limit", "content": str(e)}))
+            return
+        except asyncio.CancelledError:
+            # Stopped or gone while queued; give back a slot granted just now
+            session_manager.finish_recording(lease, release_idle=evict_idle_client if client and session_reusable else None)
+            raise
+        # Update status to connecting while initializing OpenAI
+        await send_status("connecting")
+        if not await initialize_openai():
+            session_manager.finish_recording(lease)
+            return
+        client.timeline = timeline
+
+        # Audio that arrived while queued or connecting goes first. The uplink
+        # stage keeps buffering until openai_ready is set, so chunks it adds
+        # while these are sent are picked up by the next pass, in order
+        segment_due = False
+        while len(pending_audio):
+            logger.info(f"Sending {pending_audio.nbytes} bytes of buffered audio")
+            chunks = [bytes(chunk) for chunk in pending_audio.segments()]
+            pending_audio.clear()
+            for chunk in chunks:
+                await client.send_audio(chunk)
+                if INCREMENTAL_COMMIT:
+                    segment_due = segmenter.add_audio(chunk) or segment_due
+        openai_ready.set()
+        if segment_due:
+            await commit_segment()
+
+    async def finish_setup() -> bool:
+        """Let a starting recording finish connecting, or drop it if it is still queued.
+
+        Returns True when a queued recording was dropped.
+        """
+        if not setup_task or setup_task.done():
+            return False
+        queued = not lease.recording
+        if queued:
+            setup_task.cancel()
+        await asyncio.gather(setup_task, return_exceptions=True)
+        return queued
+
+    async def stop_recording(last_seq=None):
+        if await finish_setup():
+            logger.info(f"Recording on connection {lease.id} stopped while queued")
+            await send_status("idle")
+            return
+        if timeline:
+            timeline.mark("stop_received")
+        # Messages are read in order, so once everything queued so far has
+        # left the pipeline, every chunk up to the browser's lastSeq is upstream
+        await audio_pipeline.flush()
+        if last_seq is not None and last_seq != chunk_seq:
+            logger.warning(f"Browser sent {last_seq} audio chunks but {chunk_seq} arrived")
+        if client and lease.recording:
+            logger.info(f"Stop recording received after {chunk_seq} audio chunks")
+            # Send the tail of the recording still held in the resampler filter
+            tail_audio = await audio_processor.flush()
+            if tail_audio:
+                await client.send_audio(tail_audio)
+                if INCREMENTAL_COMMIT:
+                    segmenter.add_audio(tail_audio)
+                if recorder:
+                    recorder.write(tail_audio)
+            await close_archive()
+            logger.info(f"Session audio memory: {session_memory_bytes()} bytes")
+            if uplink_bytes:
+                logger.info(f"Uplink ({audio_codec}) received {uplink_bytes} bytes for {decoded_bytes} "
+                            f"bytes of PCM, saved {100 * (1 - uplink_bytes / decoded_bytes):.1f}%")
+            if audio_processor.has_vad:
+                vad_stats = await audio_processor.stats()
+                logger.info(f"VAD trimmed {vad_stats['trimmed_seconds']:.2f}s of "
+                            f"{vad_stats['input_seconds']:.2f}s audio this session")
+            
+            # Every append is out before the ack and the commit
+            await client.flush_audio()
+            await send_frame(json.dumps({"type": "stop_ack", "seq": chunk_seq}))
+
+            if INCREMENTAL_COMMIT:
+                # Only the last segment is left to transcribe
+                segmenter.stopping = True
+                if segmenter.has_audio:
+                    await commit_segment()
+                else:
+                    await client.clear_audio_buffer()
+                    segmenter.discard_audio()
+                if segmenter.done:
+                    # Every segment was already answered
+                    await finish_segmented_recording()
+                    await end_recording()
+            else:
+                logger.info("All audio sent, committing audio buffer...")
+                await client.commit_audio()
+                await client.start_response(PROMPTS['paraphrase-gpt-realtime'])
+            uplink = client.uplink_stats()
+            stages = audio_pipeline.stats()
+            logger.info("Audio pipeline peak depths: " + ", ".join(
+                f"{name} {stage['max_depth']}" for name, stage in stages.items()))
+            logger.info(f"Sent {uplink['audio_chunks']} audio chunks in "
+                        f"{uplink['append_messages']} append messages so far")
+            await recording_stopped.wait()
+            if client:
+                dispatch = client.dispatcher.stats()
+                logger.info(f"OpenAI event queue peaked at {dispatch['max_queue_depth']} events, "
+                            f"{dispatch['merged_deltas']} deltas merged")
+            coalesced = text_deltas.stats()
+            logger.info(f"Sent {coalesced['deltas']} text deltas in {coalesced['frames']} frames")
+            # Don't close the client here, let the disconnect timer handle it
+            # Update client status to connected (waiting for response)
+            if client:
+                await send_status("connected")
+
+    # Audio path: the reader ingests chunks, then decode -> resample (and VAD,
+    # which runs in the same executor call) -> uplink, each in its own task
+    async def decode_stage(item):
+        nonlocal uplink_bytes, decoded_bytes
+        data, received_at = item
+        try:
+            pcm_audio = decode_audio(data, audio_codec)
+        except ValueError as e:
+            logger.warning(f"Dropping undecodable {audio_codec} audio chunk: {e}")
+            return None
+        uplink_bytes += len(data)
+        decoded_bytes += len(pcm_audio)
+        audio_ingested_seconds.inc(len(pcm_audio) / input_bytes_per_second)
+        return pcm_audio, received_at
+
+    async def resample_stage(item):
+        pcm_audio, received_at = item
+        started = time.perf_counter()
+        processed_audio = await audio_processor.process_audio_chunk(pcm_audio)
+        resample_seconds.observe(time.perf_counter() - started)
+        if timeline:
+            timeline.observe_chunk("resample", time.perf_counter() - received_at)
+        # Nothing left when the chunk was trimmed as silence (or held back by the filter)
+        return processed_audio or None
+
+    async def uplink_stage(processed_audio):
+        if recorder:
+            recorder.write(processed_audio)
+        if not openai_ready.is_set():
+            logger.debug("OpenAI not ready, buffering audio chunk")
+            pending_audio.append(processed_audio)
+        elif client:
+            send_started = time.perf_counter()
+            await client.send_audio(processed_audio)
+            if timeline:
+                timeline.observe_chunk("upstream_send", time.perf_counter() - send_started)
+            await send_status("connected")
+            logger.debug(f"Sent audio chunk, size: {len(processed_audio)} bytes")
+            if INCREMENTAL_COMMIT and segmenter.add_audio(processed_audio):
+                await commit_segment()
+        else:
+            logger.warning("Received audio but client is not initialized")
 
-    # Create a queue to handle incoming audio chunks
-    audio_queue = asyncio.Queue()
+    audio_pipeline = AudioPipeline([
+        ("decode", decode_stage),
+        ("resample", resample_stage),
+        ("uplink", uplink_stage),
+    ], maxsize=AUDIO_PIPELINE_QUEUE_SIZE).start()
 
     async def receive_messages():
-        nonlocal client
+        nonlocal client, audio_codec, input_bytes_per_second, uplink_bytes, decoded_bytes, timeline, chunk_seq
+        nonlocal setup_task
         
         try:
             while True:
@@ -226,105 +831,74 @@ async def websocket_endpoint(websocket: WebSocket):
                     data = await asyncio.wait_for(websocket.receive(), timeout=30.0)
                     
                     if "bytes" in data:
-                        processed_audio = audio_processor.process_audio_chunk(data["bytes"])
-                        if not openai_ready.is_set():
-                            logger.debug("OpenAI not ready, buffering audio chunk")
-                            pending_audio_chunks.append(processed_audio)
-                        elif client:
-                            # Track pending audio operations
-                            async with audio_send_lock:
-                                nonlocal pending_audio_operations
-                                pending_audio_operations += 1
-                                all_audio_sent.clear()  # Clear the event since we have pending operations
-                            
-                            try:
-                                await client.send_audio(processed_audio)
-                                await websocket.send_text(json.dumps({
-                                    "type": "status",
-                                    "status": "connected"
-                                }))
-                                logger.debug(f"Sent audio chunk, size: {len(processed_audio)} bytes")
-                            finally:
-                                # Mark operation as complete
-                                async with audio_send_lock:
-                                    pending_audio_operations -= 1
-                                    if pending_audio_operations == 0:
-                                        all_audio_sent.set()  # Set event when all operations complete
-                        else:
-                            logger.warning("Received audio but client is not initialized")
+                        chunk_seq += 1
+                        # Waits while the pipeline is full, which stops reading from the browser
+                        await audio_pipeline.put((data["bytes"], time.perf_counter()))
+                        over_budget = session_manager.over_budget(lease, session_memory_bytes())
+                        if over_budget:
+                            logger.warning(f"Connection {lease.id}: {over_budget}")
+                            await send_frame(json.dumps({"type": "recording_limit", "content": over_budget}))
+                            await stop_recording()
                             
                     elif "text" in data:
                         msg = json.loads(data["text"])
                         
                         if msg.get("type") == "start_recording":
-                            # Update status to connecting while initializing OpenAI
-                            await websocket.send_text(json.dumps({
-                                "type": "status",
-                                "status": "connecting"
-                            }))
-                            if not await initialize_openai():
+                            if setup_task and not setup_task.done():
+                                logger.warning(f"Connection {lease.id} is already starting a recording")
                                 continue
+                            # Chunks still in flight belong to the previous stream
+                            await audio_pipeline.flush()
+                            # A new recording is a new stream; the browser reports
+                            # how it captures so we can skip unneeded resampling
+                            try:
+                                codec = msg.get("codec", "pcm")
+                                check_codec(codec, msg.get("channels", 1), msg.get("sampleFormat", "pcm16"))
+                                await audio_processor.configure(
+                                    sample_rate=msg.get("sampleRate", 48000),
+                                    channels=msg.get("channels", 1),
+                                    sample_format=msg.get("sampleFormat", "pcm16"),
+                                )
+                            except ValueError as e:
+                                logger.error(f"Rejected audio format: {e}")
+                                await send_frame(json.dumps({
+                                    "type": "error",
+                                    "content": str(e)
+                                }))
+                                continue
+                            audio_codec = codec
+                            input_bytes_per_second = (msg.get("sampleRate", 48000) * msg.get("channels", 1)
+                                                      * np.dtype(SAMPLE_FORMATS[msg.get("sampleFormat", "pcm16")]).itemsize)
+                            uplink_bytes = decoded_bytes = 0
+                            chunk_seq = 0
+                            # Reset per-recording state before admission, so audio
+                            # that arrives while queued or connecting is kept and
+                            # sent once OpenAI is ready
                             recording_stopped.clear()
-                            pending_audio_chunks.clear()
-                            
-                            # Send any buffered chunks
-                            if pending_audio_chunks and client:
-                                logger.info(f"Sending {len(pending_audio_chunks)} buffered chunks")
-                                for chunk in pending_audio_chunks:
-                                    # Track each buffered chunk operation
-                                    async with audio_send_lock:
-                                        pending_audio_operations += 1
-                                        all_audio_sent.clear()
-                                    
-                                    try:
-                                        await client.send_audio(chunk)
-                                    finally:
-                                        async with audio_send_lock:
-                                            pending_audio_operations -= 1
-                                            if pending_audio_operations == 0:
-                                                all_audio_sent.set()
-                                pending_audio_chunks.clear()
+                            segmenter.reset()
+                            answered_items.clear()
+                            pending_audio.clear()
+                            await close_archive()
+                            start_archive()
+                            timeline = RecordingTimeline()
+                            # The reader keeps going while the recording waits for a
+                            # slot, so a Stop or disconnect is seen at once
+                            setup_task = asyncio.create_task(begin_recording())
                             
                         elif msg.get("type") == "stop_recording":
-                            if client:
-                                # CRITICAL FIX: Wait for all pending audio operations to complete
-                                # before committing to prevent data loss
-                                logger.info("Stop recording received, waiting for all audio to be sent...")
-                                
-                                # Wait for any pending audio chunks to be sent (with timeout for safety)
-                                try:
-                                    await asyncio.wait_for(all_audio_sent.wait(), timeout=5.0)
-                                    logger.info("All pending audio operations completed")
-                                except asyncio.TimeoutError:
-                                    logger.warning("Timeout waiting for audio operations to complete, proceeding anyway")
-                                    # Reset the pending counter to prevent deadlock
-                                    async with audio_send_lock:
-                                        pending_audio_operations = 0
-                                        all_audio_sent.set()
-                                
-                                # Add a small buffer to ensure network operations complete
-                                await asyncio.sleep(0.1)
-                                
-                                logger.info("All audio sent, committing audio buffer...")
-                                await client.commit_audio()
-                                await client.start_response(PROMPTS['paraphrase-gpt-realtime'])
-                                await recording_stopped.wait()
-                                # Don't close the client here, let the disconnect timer handle it
-                                # Update client status to connected (waiting for response)
-                                await websocket.send_text(json.dumps({
-                                    "type": "status",
-                                    "status": "connected"
-                                }))
+                            await stop_recording(msg.get("lastSeq"))
 
                 except asyncio.TimeoutError:
                     logger.debug("No message received for 30 seconds")
                     continue
                 except Exception as e:
                     logger.error(f"Error in receive_messages loop: {str(e)}", exc_info=True)
+                    errors_total.labels("websocket").inc()
                     break
                 
         finally:
             # Cleanup when the loop exits
+            await close_archive()
             if client:
                 try:
                     await client.close()
@@ -332,42 +906,64 @@ async def websocket_endpoint(websocket: WebSocket):
                     logger.error(f"Error closing client in receive_messages: {str(e)}")
             logger.info("Receive messages loop ended")
 
-    async def send_audio_messages():
-        while True:
-            try:
-                processed_audio = await audio_queue.get()
-                if processed_audio is None:
-                    break
-                
-                # Add validation
-                if len(processed_audio) == 0:
-                    logger.warning("Empty audio chunk received, skipping")
-                    continue
-                
-                # Append the processed audio to the buffer
-                audio_buffer.append(processed_audio)
+    try:
+        await receive_messages()
+    finally:
+        cancel_idle_close()
+        if setup_task and not setup_task.done():
+            setup_task.cancel()
+            await asyncio.gather(setup_task, return_exceptions=True)
+        session_manager.disconnect(lease)
+        await audio_pipeline.close()
+        pipeline_stats.merge(audio_pipeline)
+        text_deltas.close()
+        if client:
+            await client.close()
+            logger.info("OpenAI client connection closed")
+        await audio_processor.close()
 
-                await client.send_audio(processed_audio)
-                logger.info(f"Audio chunk sent to OpenAI client, size: {len(processed_audio)} bytes")
-                
-            except Exception as e:
-                logger.error(f"Error in send_audio_messages: {str(e)}", exc_info=True)
-                break
+@app.get("/api/v1/sessions")
+async def get_sessions():
+    """Live connection, recording and upstream socket counts against their limits"""
+    stats = session_manager.stats()
+    if realtime_pool:
+        stats["pool"] = realtime_pool.stats()
+    return stats
 
-        # After processing all audio, set the event
-        recording_stopped.set()
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Counters, gauges and histograms in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
-    # Start concurrent tasks for receiving and sending
-    receive_task = asyncio.create_task(receive_messages())
-    send_task = asyncio.create_task(send_audio_messages())
+@app.get("/api/v1/logging")
+async def get_logging():
+    """Background logging queue counts, or {"async": false} when LOG_ASYNC is off"""
+    if not async_logging:
+        return {"async": False}
+    return {"async": True, **async_logging.stats()}
 
+@app.get("/api/v1/latency")
+async def get_latency():
+    """Stop-to-text and per-chunk latency histograms, the latest recordings, audio pipeline stage totals
+    and upstream session reuse"""
+    return {**latency_stats.stats(), "pipeline": pipeline_stats.stats(),
+            "session_reuse": session_reuse_stats.stats()}
+
+async def stream_llm(route: str, text: str, prompt: str, model: str):
+    """Stream an LLM answer, timing the whole body and counting the chunks the model sent"""
+    started = time.perf_counter()
+    # Behind the cache, only parts that reach the model are counted, by the cache itself
+    tokens = None if isinstance(llm_processor, CachedLLMProcessor) else llm_tokens_streamed.labels(model)
     try:
-        # Wait for both tasks to complete
-        await asyncio.gather(receive_task, send_task)
+        async for part in llm_processor.process_text(text, prompt, model=model):
+            if tokens:
+                tokens.inc()
+            yield part
+    except Exception:
+        errors_total.labels("llm").inc()
+        raise
     finally:
-        if client:
-            await client.close()
-            logger.info("OpenAI client connection closed")
+        request_seconds.labels(route, model).observe(time.perf_counter() - started)
 
 @app.post(
     "/api/v1/readability",
@@ -381,12 +977,9 @@ async def enhance_readability(request: ReadabilityRequest):
         raise HTTPException(status_code=500, detail="Readability prompt not found.")
 
     try:
-        async def text_generator():
-            # Use gpt-4o specifically for readability
-            async for part in llm_processor.process_text(request.text, prompt, model="gpt-4o"):
-                yield part
-
-        return StreamingResponse(text_generator(), media_type="text/plain")
+        # Use gpt-4o specifically for readability
+        return StreamingResponse(stream_llm("/api/v1/readability", request.text, prompt, "gpt-4o"),
+                                 media_type="text/plain")
 
     except Exception as e:
         logger.error(f"Error enhancing readability: {e}", exc_info=True)
@@ -403,13 +996,17 @@ def ask_ai(request: AskAIRequest):
     if not prompt:
         raise HTTPException(status_code=500, detail="Ask AI prompt not found.")
 
+    started = time.perf_counter()
     try:
         # Use o1-mini specifically for ask_ai
         answer = llm_processor.process_text_sync(request.text, prompt, model="o1-mini")
         return AskAIResponse(answer=answer)
     except Exception as e:
         logger.error(f"Error processing AI question: {e}", exc_info=True)
+        errors_total.labels("llm").inc()
         raise HTTPException(status_code=500, detail="Error processing AI question.")
+    finally:
+        request_seconds.labels("/api/v1/ask_ai", "o1-mini").observe(time.perf_counter() - started)
 
 @app.post(
     "/api/v1/correctness",
@@ -423,12 +1020,9 @@ async def check_correctness(request: CorrectnessRequest):
         raise HTTPException(status_code=500, detail="Correctness prompt not found.")
 
     try:
-        async def text_generator():
-            # Specifically use gpt-4o for correctness checking
-            async for part in llm_processor.process_text(request.text, prompt, model="gpt-4o"):
-                yield part
-
-        return StreamingResponse(text_generator(), media_type="text/plain")
+        # Specifically use gpt-4o for correctness checking
+        return StreamingResponse(stream_llm("/api/v1/correctness", request.text, prompt, "gpt-4o"),
+                                 media_type="text/plain")
 
     except Exception as e:
         logger.error(f"Error checking correctness: {e}", exc_info=True)
@@ -0,0 +1,218 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class AdmissionError(Exception):
+    """The server is too busy to take this connection or recording"""
+
+class SessionLease:
+    """One browser connection's share of the server's capacity"""
+
+    def __init__(self, lease_id: int):
+        self.id = lease_id
+        self.recording = False
+        self.recording_started = None
+        self.upstream = False  # Holds an upstream socket, recording or kept idle
+        self.release_idle = None
+        self.wakeup = None
+
+    @property
+    def recording_seconds(self) -> float:
+        return time.monotonic() - self.recording_started if self.recording else 0.0
+
+class SessionManager:
+    """Admission control for browser connections, recordings and upstream sockets.
+
+    At most `max_connections` browser connections are accepted and at most
+    `max_recordings` recordings run at once. Upstream sockets held by
+    connections, whether recording or kept open for the next recording, are
+    capped at `max_upstream`; when a recording needs one and none is free, the
+    socket that has been idle longest is closed for it. Recordings that cannot
+    start wait in a FIFO queue of up to `max_queue` entries for at most
+    `queue_timeout` seconds. A running recording is over budget once it lasts
+    `max_recording_seconds` or, when `max_session_bytes` is set, once its
+    session holds that much audio.
+    """
+
+    def __init__(self, max_connections: int = 500, max_recordings: int = 50, max_upstream: int = 64,
+                 max_queue: int = 100, queue_timeout: float = 30.0,
+                 max_recording_seconds: float = 600.0, max_session_bytes: int = 0):
+        if max_recordings < 1 or max_upstream < max_recordings:
+            raise ValueError("Limits must satisfy 1 <= max_recordings <= max_upstream")
+        self.max_connections = max_connections
+        self.max_recordings = max_recordings
+        self.max_upstream = max_upstream
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_recording_seconds = max_recording_seconds
+        self.max_session_bytes = max_session_bytes
+        self.ids = itertools.count(1)
+        self.leases = {}
+        self.recordings = 0
+        self.upstream = 0
+        self.idle_upstream = OrderedDict()  # Leases keeping an idle socket, oldest first
+        self.queue = deque()
+        self.tasks = set()
+        self.rejected_connections = 0
+        self.rejected_recordings = 0
+        self.queued = 0
+        self.queue_timeouts = 0
+        self.evicted = 0
+        self.budget_stops = 0
+        self.max_wait_seconds = 0.0
+
+    def connect(self) -> SessionLease:
+        if len(self.leases) >= self.max_connections:
+            self.rejected_connections += 1
+            raise AdmissionError("Server is at capacity, please try again shortly")
+        lease = SessionLease(next(self.ids))
+        self.leases[lease.id] = lease
+        return lease
+
+    def disconnect(self, lease: SessionLease):
+        if self.leases.pop(lease.id, None) is None:
+            return
+        if lease in self.queue:
+            self.queue.remove(lease)
+        self.finish_recording(lease)
+
+    async def admit(self, lease: SessionLease, on_position: Optional[Callable[[int], Awaitable]] = None):
+        """Start a recording for the lease, waiting in line when the server is full"""
+        if lease.recording:
+            return
+        if not self.queue and self._can_admit(lease):
+            self._grant(lease)
+            return
+        if len(self.queue) >= self.max_queue:
+            self.rejected_recordings += 1
+            raise AdmissionError("Server is busy, please try again shortly")
+
+        self.queue.append(lease)
+        self.queued += 1
+        loop = asyncio.get_running_loop()
+        queued_at = loop.time()
+        position = None
+        try:
+            while not lease.recording:
+                remaining = queued_at + self.queue_timeout - loop.time()
+                if remaining <= 0:
+                    self.queue_timeouts += 1
+                    raise AdmissionError("Timed out waiting for a free recording slot")
+                if on_position and self.queue.index(lease) + 1 != position:
+                    position = self.queue.index(lease) + 1
+                    await on_position(position)
+                    continue
+                lease.wakeup = loop.create_future()
+                try:
+                    await asyncio.wait_for(lease.wakeup, remaining)
+                except asyncio.TimeoutError:
+                    pass
+            self.max_wait_seconds = max(self.max_wait_seconds, loop.time() - queued_at)
+        finally:
+            lease.wakeup = None
+            if lease in self.queue:
+                self.queue.remove(lease)
+                self._admit_waiting()
+
+    def finish_recording(self, lease: SessionLease, release_idle: Optional[Callable[[], Optional[Awaitable]]] = None):
+        """End the lease's recording, keeping its upstream socket open if `release_idle` is given.
+
+        `release_idle` must let go of the idle socket at once when called, and
+        may return an awaitable that finishes closing it.
+        """
+        if lease.recording:
+            lease.recording = False
+            self.recordings -= 1
+        if release_idle and lease.upstream and lease.id in self.leases:
+            lease.release_idle = release_idle
+            self.idle_upstream[lease.id] = lease
+        else:
+            self.release_upstream(lease)
+        self._admit_waiting()
+
+    def release_upstream(self, lease: SessionLease):
+        """The lease has closed its upstream socket"""
+        self.idle_upstream.pop(lease.id, None)
+        lease.release_idle = None
+        if lease.upstream:
+            lease.upstream = False
+            self.upstream -= 1
+            self._admit_waiting()
+
+    def over_budget(self, lease: SessionLease, session_bytes: int) -> Optional[str]:
+        """Why the lease's recording must stop now, or None while it is within budget"""
+        if not lease.recording:
+            return None
+        reason = None
+        if lease.recording_seconds >= self.max_recording_seconds:
+            reason = f"Recording stopped at the {self.max_recording_seconds:.0f}s limit"
+        elif self.max_session_bytes and session_bytes >= self.max_session_bytes:
+            reason = f"Recording stopped at the {self.max_session_bytes / 2**20:.0f} MiB audio memory limit"
+        if reason:
+            self.budget_stops += 1
+        return reason
+
+    def _can_admit(self, lease: SessionLease) -> bool:
+        return (self.recordings < self.max_recordings
+                and (lease.upstream or self.upstream < self.max_upstream or bool(self.idle_upstream)))
+
+    def _grant(self, lease: SessionLease):
+        if lease.upstream:
+            self.idle_upstream.pop(lease.id, None)
+            lease.release_idle = None
+        else:
+            if self.upstream >= self.max_upstream:
+                self._evict_idle()
+            lease.upstream = True
+            self.upstream += 1
+        lease.recording = True
+        lease.recording_started = time.monotonic()
+        self.recordings += 1
+
+    def _evict_idle(self):
+        _, idle = self.idle_upstream.popitem(last=False)
+        release, idle.release_idle = idle.release_idle, None
+        idle.upstream = False
+        self.upstream -= 1
+        self.evicted += 1
+        logger.info(f"Closing idle upstream session of connection {idle.id} for a waiting recording")
+        closing = release()
+        if closing is not None:
+            task = asyncio.ensure_future(closing)
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def _admit_waiting(self):
+        while self.queue and self._can_admit(self.queue[0]):
+            self._grant(self.queue.popleft())
+        # Granted leases stop waiting; the rest learn their new position
+        for lease in [*self.leases.values()]:
+            if lease.wakeup and not lease.wakeup.done():
+                lease.wakeup.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "connections": len(self.leases),
+            "recordings": self.recordings,
+            "upstream": self.upstream,
+            "idle_upstream": len(self.idle_upstream),
+            "waiting": len(self.queue),
+            "limits": {
+                "connections": self.max_connections,
+                "recordings": self.max_recordings,
+                "upstream": self.max_upstream,
+                "queue": self.max_queue,
+            },
+            "queued": self.queued,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "queue_timeouts": self.queue_timeouts,
+            "rejected_connections": self.rejected_connections,
+            "rejected_recordings": self.rejected_recordings,
+            "evicted_upstream": self.evicted,
+            "budget_stops": self.budget_stops,
+        }
@@ -7,6 +7,8 @@ let audioBuffer = new Int16Array(0);
 let wsConnected = false;
 let streamInitialized = false;
 let isAutoStarted = false;
+// Audio chunks sent this recording; stop_recording reports the count
+let chunkSeq = 0;
 
 // DOM elements
 const recordButton = document.getElementById('recordButton');
@@ -26,6 +28,72 @@ const autoStart = urlParams.get('start') === '1';
 // Utility functions
 const isMobileDevice = () => /Android|webOS|iPhone|iPad|iPod|BlackBerry|IEMobile|Opera Mini/i.test(navigator.userAgent);
 
+// Uplink codec: raw PCM, G.711 mu-law (2x smaller) or IMA-ADPCM (~4x smaller).
+// Mobile links default to ADPCM; override with ?codec=pcm|mulaw|adpcm
+const uplinkCodec = urlParams.get('codec') || (isMobileDevice() ? 'adpcm' : 'pcm');
+const ADPCM_BLOCK_BYTES = 68;
+const ADPCM_SAMPLES_PER_BLOCK = (ADPCM_BLOCK_BYTES - 4) * 2 + 1;
+const ADPCM_STEPS = [
+    7, 8, 9, 10, 11, 12, 13, 14, 16, 17, 19, 21, 23, 25, 28, 31, 34, 37, 41, 45,
+    50, 55, 60, 66, 73, 80, 88, 97, 107, 118, 130, 143, 157, 173, 190, 209, 230,
+    253, 279, 307, 337, 371, 408, 449, 494, 544, 598, 658, 724, 796, 876, 963,
+    1060, 1166, 1282, 1411, 1552, 1707, 1878, 2066, 2272, 2499, 2749, 3024, 3327,
+    3660, 4026, 4428, 4871, 5358, 5894, 6484, 7132, 7845, 8630, 9493, 10442, 11487,
+    12635, 13899, 15289, 16818, 18500, 20350, 22385, 24623, 27086, 29794, 32767
+];
+const ADPCM_INDEX_ADJUST = [-1, -1, -1, -1, 2, 4, 6, 8];
+let adpcmIndex = 0;
+
+function encodeMulaw(pcm) {
+    const out = new Uint8Array(pcm.length);
+    for (let i = 0; i < pcm.length; i++) {
+        const sample = pcm[i];
+        const sign = sample < 0 ? 0x80 : 0;
+        const magnitude = Math.min(Math.abs(sample), 32635) + 0x84;
+        const exponent = 31 - Math.clz32(magnitude >> 7);
+        const mantissa = (magnitude >> (exponent + 3)) & 0x0F;
+        out[i] = ~(sign | (exponent << 4) | mantissa) & 0xFF;
+    }
+    return out;
+}
+
+// Blocks of one int16 header sample, the step index, a reserved byte and
+// 4-bit codes (low nibble first); a short final block is zero-padded
+function encodeAdpcm(pcm) {
+    const blocks = Math.ceil(pcm.length / ADPCM_SAMPLES_PER_BLOCK);
+    const out = new Uint8Array(blocks * ADPCM_BLOCK_BYTES);
+    const view = new DataView(out.buffer);
+    for (let b = 0; b < blocks; b++) {
+        const base = b * ADPCM_SAMPLES_PER_BLOCK;
+        const offset = b * ADPCM_BLOCK_BYTES;
+        let predictor = pcm[base];
+        view.setInt16(offset, predictor, true);
+        out[offset + 2] = adpcmIndex;
+        for (let i = 1; i < ADPCM_SAMPLES_PER_BLOCK; i++) {
+            const sample = base + i < pcm.length ? pcm[base + i] : 0;
+            const step = ADPCM_STEPS[adpcmIndex];
+            let diff = sample - predictor;
+            let code = diff < 0 ? 8 : 0;
+            diff = Math.abs(diff);
+            let delta = step >> 3;
+            if (diff >= step) { code |= 4; diff -= step; delta += step; }
+            if (diff >= step >> 1) { code |= 2; diff -= step >> 1; delta += step >> 1; }
+            if (diff >= step >> 2) { code |= 1; delta += step >> 2; }
+            predictor += code & 8 ? -delta : delta;
+            predictor = Math.max(-32768, Math.min(32767, predictor));
+            adpcmIndex = Math.max(0, Math.min(88, adpcmIndex + ADPCM_INDEX_ADJUST[code & 7]));
+            out[offset + 4 + ((i - 1) >> 1)] |= (i - 1) & 1 ? code << 4 : code;
+        }
+    }
+    return out;
+}
+
+function encodeAudio(pcm) {
+    if (uplinkCodec === 'mulaw') return encodeMulaw(pcm).buffer;
+    if (uplinkCodec === 'adpcm') return encodeAdpcm(pcm).buffer;
+    return pcm.buffer;
+}
+
 async function copyToClipboard(text, button) {
     if (!text) return;
     try {
@@ -83,12 +151,17 @@ function createAudioProcessor() {
         combinedBuffer.set(pcmData, audioBuffer.length);
         audioBuffer = combinedBuffer;
         
-        if (audioBuffer.length >= 24000) {
-            const sendBuffer = audioBuffer.slice(0, 24000);
-            audioBuffer = audioBuffer.slice(24000);
+        // Send half a second of audio at a time, whatever the capture rate,
+        // in whole ADPCM blocks so only the final chunk is ever padded
+        let chunkSamples = Math.floor(audioContext.sampleRate / 2);
+        if (uplinkCodec === 'adpcm') chunkSamples -= chunkSamples % ADPCM_SAMPLES_PER_BLOCK;
+        if (audioBuffer.length >= chunkSamples) {
+            const sendBuffer = audioBuffer.slice(0, chunkSamples);
+            audioBuffer = audioBuffer.slice(chunkSamples);
             
             if (ws.readyState === WebSocket.OPEN) {
-                ws.send(sendBuffer.buffer);
+                ws.send(encodeAudio(sendBuffer));
+                chunkSeq++;
             }
         }
     };
@@ -96,8 +169,18 @@ function createAudioProcessor() {
 }
 
 async function initAudio(stream) {
-    audioContext = new AudioContext();
-    source = audioContext.createMediaStreamSource(stream);
+    // Capturing at the upstream rate lets the server skip resampling entirely.
+    // Some browsers refuse to connect a microphone to a context at a different
+    // rate, so fall back to the device default.
+    try {
+        audioContext = new AudioContext({ sampleRate: 24000 });
+        source = audioContext.createMediaStreamSource(stream);
+    } catch (error) {
+        console.warn('24 kHz capture not supported, using device rate:', error);
+        if (audioContext) audioContext.close();
+        audioContext = new AudioContext();
+        source = audioContext.createMediaStreamSource(stream);
+    }
     processor = createAudioProcessor();
     source.connect(processor);
     processor.connect(audioContext.destination);
@@ -141,6 +224,9 @@ function initializeWebSocket() {
         switch (data.type) {
             case 'status':
                 updateConnectionStatus(data.status);
+                if (data.status === 'connecting' && isRecording) {
+                    recordButton.textContent = 'Stop';
+                }
                 if (data.status === 'idle') {
                     copyToClipboard(transcript.value, copyButton);
                 }
@@ -148,12 +234,28 @@ function initializeWebSocket() {
             case 'text':
                 if (data.isNewResponse) {
                     transcript.value = data.content;
-                    stopTimer();
+                    // With incremental commit the first segment arrives mid-recording
+                    if (!isRecording) stopTimer();
                 } else {
                     transcript.value += data.content;
                 }
                 transcript.scrollTop = transcript.scrollHeight;
                 break;
+            case 'transcript':  // Stitched segments of an incremental recording
+                transcript.value = data.content;
+                transcript.scrollTop = transcript.scrollHeight;
+                break;
+            case 'queued':  // Server is full; the recording starts when a slot frees up
+                updateConnectionStatus('connecting');
+                recordButton.textContent = `Waiting (#${data.position})`;
+                break;
+            case 'recording_limit':  // Not admitted, or stopped by a session budget
+                endRecording();
+                alert(data.content);
+                break;
+            case 'stop_ack':  // All audio up to data.seq is upstream and committed next
+                console.debug(`Server acknowledged ${data.seq} audio chunks`);
+                break;
             case 'error':
                 alert(data.content);
                 updateConnectionStatus('idle');
@@ -192,7 +294,15 @@ async function startRecording() {
         if (!audioContext) await initAudio(stream);
 
         isRecording = true;
-        await ws.send(JSON.stringify({ type: 'start_recording' }));
+        adpcmIndex = 0;
+        chunkSeq = 0;
+        await ws.send(JSON.stringify({
+            type: 'start_recording',
+            sampleRate: audioContext.sampleRate,
+            channels: 1,
+            sampleFormat: 'pcm16',
+            codec: uplinkCodec
+        }));
         
         startTimer();
         recordButton.textContent = 'Stop';
@@ -211,17 +321,29 @@ async function stopRecording() {
     startTimer();
     
     if (audioBuffer.length > 0 && ws.readyState === WebSocket.OPEN) {
-        ws.send(audioBuffer.buffer);
+        ws.send(encodeAudio(audioBuffer));
+        chunkSeq++;
         audioBuffer = new Int16Array(0);
     }
     
-    await new Promise(resolve => setTimeout(resolve, 500));
-    await ws.send(JSON.stringify({ type: 'stop_recording' }));
+    // WebSocket messages arrive in order, so the server has every chunk up to
+    // lastSeq when it reads this and commits without waiting
+    await ws.send(JSON.stringify({ type: 'stop_recording', lastSeq: chunkSeq }));
     
     recordButton.textContent = 'Start';
     recordButton.classList.remove('recording');
 }
 
+// The server ended the recording itself; stop capturing without a stop message
+function endRecording() {
+    if (!isRecording) return;
+    isRecording = false;
+    audioBuffer = new Int16Array(0);
+    stopTimer();
+    recordButton.textContent = 'Start';
+    recordButton.classList.remove('recording');
+}
+
 // Event listeners
 recordButton.onclick = () => isRecording ? stopRecording() : startRecording();
 copyButton.onclick = () => copyToClipboard(transcript.value, copyButton);
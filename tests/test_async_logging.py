@@ -0,0 +1,73 @@
+import logging
+import queue
+import pytest
+from async_logging import AsyncLogging, DroppingQueueHandler, RateLimitFilter
+
+def make_record(level=logging.INFO, lineno=10, created=100.0, msg="chunk sent"):
+    record = logging.LogRecord("test", level, "hot.py", lineno, msg, None, None)
+    record.created = created
+    return record
+
+def test_rate_limit_per_call_site():
+    limiter = RateLimitFilter(rate=2)
+    assert [limiter.filter(make_record(created=100.0 + i / 10)) for i in range(5)] == [True, True, False, False, False]
+    # Another call site has its own budget, and warnings always pass
+    assert limiter.filter(make_record(lineno=11))
+    assert limiter.filter(make_record(level=logging.WARNING, created=100.5))
+    assert limiter.suppressed == 3
+
+    record = make_record(created=101.0)
+    assert limiter.filter(record)
+    assert record.getMessage() == "chunk sent (3 similar lines suppressed)"
+
+def test_rate_limit_zero_passes_everything():
+    limiter = RateLimitFilter(rate=0)
+    assert all(limiter.filter(make_record()) for _ in range(100))
+
+def test_full_queue_drops_records():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.enqueued == 2
+    assert handler.dropped == 3
+
+@pytest.fixture
+def isolated_root():
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    for handler in saved_handlers:
+        root.removeHandler(handler)
+    yield root
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in saved_handlers:
+        root.addHandler(handler)
+    root.setLevel(saved_level)
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+def test_install_moves_handlers_to_background_thread(isolated_root):
+    target = ListHandler()
+    isolated_root.addHandler(target)
+    isolated_root.setLevel(logging.INFO)
+    async_logging = AsyncLogging(queue_size=100, rate_limit=3).install()
+    assert target not in isolated_root.handlers
+    assert async_logging.handler in isolated_root.handlers
+
+    log = logging.getLogger("test_async_logging")
+    for i in range(10):
+        log.info(f"delta {i}")
+    log.error("upstream closed")
+    async_logging.uninstall()
+
+    assert target.lines == ["delta 0", "delta 1", "delta 2", "upstream closed"]
+    assert target in isolated_root.handlers
+    assert async_logging.handler not in isolated_root.handlers
+    assert async_logging.stats()["suppressed"] == 7
+    assert async_logging.stats()["enqueued"] == 4
@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+from audio_buffer import AudioRingBuffer
+
+def samples(start, stop):
+    return np.arange(start, stop, dtype=np.int16)
+
+def test_append_and_read():
+    buffer = AudioRingBuffer(capacity=100, initial_capacity=4)
+    buffer.append(samples(0, 10).tobytes())
+    buffer.append(samples(10, 25))
+
+    assert len(buffer) == 25
+    assert buffer.nbytes == 50
+    assert buffer.tobytes() == samples(0, 25).tobytes()
+    assert buffer.allocated_bytes >= buffer.nbytes
+
+def test_growth_is_bounded_by_capacity():
+    buffer = AudioRingBuffer(capacity=100, initial_capacity=4)
+    for i in range(0, 1000, 10):
+        buffer.append(samples(i, i + 10))
+
+    assert buffer.allocated_bytes == 200
+    assert len(buffer) == 100
+    assert buffer.dropped_samples == 900
+    assert buffer.tobytes() == samples(900, 1000).tobytes()
+
+def test_wrapped_segments_are_zero_copy_views():
+    buffer = AudioRingBuffer(capacity=10, initial_capacity=10)
+    buffer.append(samples(0, 8))
+    buffer.append(samples(8, 14))
+
+    segments = buffer.segments()
+    assert len(segments) == 2
+    assert all(isinstance(segment, memoryview) for segment in segments)
+    assert b''.join(segments) == samples(4, 14).tobytes()
+
+def test_view_linearizes_wrapped_contents():
+    buffer = AudioRingBuffer(capacity=10, initial_capacity=10)
+    buffer.append(samples(0, 8))
+    buffer.append(samples(8, 14))
+
+    view = buffer.view()
+    assert bytes(view) == samples(4, 14).tobytes()
+    assert len(buffer.segments()) == 1
+
+def test_oversized_chunk_keeps_newest_samples():
+    buffer = AudioRingBuffer(capacity=10, initial_capacity=2)
+    buffer.append(samples(0, 3))
+    buffer.append(samples(3, 30))
+
+    assert buffer.tobytes() == samples(20, 30).tobytes()
+    assert buffer.dropped_samples == 20
+
+def test_consume_and_clear():
+    buffer = AudioRingBuffer(capacity=10)
+    buffer.append(samples(0, 6))
+    buffer.consume(4)
+    assert buffer.tobytes() == samples(4, 6).tobytes()
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.segments() == []
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        AudioRingBuffer(capacity=0)
@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from audio_codecs import (
+    ADPCM_BLOCK_BYTES, ADPCM_SAMPLES_PER_BLOCK, adpcm_decode, adpcm_encode,
+    check_codec, decode_audio, mulaw_decode, mulaw_encode,
+)
+
+def speech_like(n=24000, sample_rate=24000):
+    t = np.arange(n) / sample_rate
+    rng = np.random.default_rng(0)
+    audio = 8000 * np.sin(2 * np.pi * 220 * t) + 2000 * np.sin(2 * np.pi * 1800 * t) + rng.normal(0, 300, n)
+    return audio.astype(np.int16)
+
+def snr_db(reference, decoded):
+    reference = reference.astype(np.float64)
+    noise = decoded.astype(np.float64) - reference
+    return 10 * np.log10(np.mean(reference ** 2) / np.mean(noise ** 2))
+
+def test_mulaw_reference_values():
+    # G.711 code points: silence, full scale, and the smallest step
+    assert mulaw_encode(np.array([0, 32767, -32768, 8], dtype=np.int16)) == bytes([0xFF, 0x80, 0x00, 0xFE])
+    np.testing.assert_array_equal(mulaw_decode(bytes([0xFF, 0x7F, 0x80, 0x00])), [0, 0, 32124, -32124])
+
+def test_mulaw_round_trip():
+    audio = speech_like()
+    encoded = mulaw_encode(audio)
+    assert len(encoded) == len(audio)
+    assert snr_db(audio, mulaw_decode(encoded)) > 30
+
+def test_adpcm_round_trip():
+    audio = speech_like()
+    encoded = adpcm_encode(audio)
+    blocks = -(-len(audio) // ADPCM_SAMPLES_PER_BLOCK)
+    assert len(encoded) == blocks * ADPCM_BLOCK_BYTES
+    decoded = adpcm_decode(encoded)
+    assert len(decoded) == blocks * ADPCM_SAMPLES_PER_BLOCK
+    assert snr_db(audio, decoded[:len(audio)]) > 20
+
+def test_adpcm_block_header():
+    audio = speech_like(ADPCM_SAMPLES_PER_BLOCK)
+    encoded = adpcm_encode(audio)
+    assert len(encoded) == ADPCM_BLOCK_BYTES
+    # The first sample is carried verbatim in the header
+    assert adpcm_decode(encoded)[0] == audio[0]
+
+def test_adpcm_rejects_partial_block():
+    with pytest.raises(ValueError):
+        adpcm_decode(b'\x00' * (ADPCM_BLOCK_BYTES - 1))
+
+def test_decode_audio():
+    audio = speech_like(1000)
+    assert decode_audio(audio.tobytes(), "pcm") == audio.tobytes()
+    assert decode_audio(mulaw_encode(audio), "mulaw") == mulaw_decode(mulaw_encode(audio)).tobytes()
+    assert len(decode_audio(adpcm_encode(audio), "adpcm")) == 2 * 8 * ADPCM_SAMPLES_PER_BLOCK
+    with pytest.raises(ValueError):
+        decode_audio(b'', "opus")
+
+def test_check_codec():
+    check_codec("pcm", channels=2, sample_format="float32")
+    check_codec("mulaw", channels=2)
+    with pytest.raises(ValueError, match="Unsupported codec"):
+        check_codec("opus")
+    with pytest.raises(ValueError):
+        check_codec("mulaw", sample_format="float32")
+    with pytest.raises(ValueError):
+        check_codec("adpcm", channels=2)
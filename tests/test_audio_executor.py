@@ -0,0 +1,117 @@
+import pytest
+import asyncio
+import numpy as np
+from audio_executor import AudioExecutor, SHARED_BUFFER_BYTES
+from audio_processor import AudioProcessor
+
+def make_chunks(count=6, size=4800):
+    t = np.arange(count * size) / 48000
+    audio = (np.sin(2 * np.pi * 440 * t) * 12000).astype(np.int16)
+    return [audio[i:i + size].tobytes() for i in range(0, len(audio), size)]
+
+def reference_output(chunks):
+    processor = AudioProcessor()
+    return b''.join(processor.process_audio_chunk(chunk) for chunk in chunks) + processor.flush()
+
+def test_unknown_mode():
+    with pytest.raises(ValueError, match="Unknown audio execution mode"):
+        AudioExecutor("gpu")
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "thread", "process", "batch"])
+async def test_modes_match_inline_processing(mode):
+    executor = AudioExecutor(mode, max_workers=2)
+    try:
+        session = await executor.open_session()
+        chunks = make_chunks()
+        output = b''
+        for chunk in chunks:
+            output += await session.process_audio_chunk(chunk)
+        output += await session.flush()
+        await session.close()
+        assert output == reference_output(chunks)
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["thread", "process", "batch"])
+async def test_concurrent_submissions_stay_in_order(mode):
+    executor = AudioExecutor(mode, max_workers=2)
+    try:
+        sessions = [await executor.open_session() for _ in range(3)]
+        chunks = make_chunks(count=8)
+
+        async def run(session):
+            results = await asyncio.gather(*(session.process_audio_chunk(chunk) for chunk in chunks))
+            return b''.join(results) + await session.flush()
+
+        outputs = await asyncio.gather(*(run(session) for session in sessions))
+        for session in sessions:
+            await session.close()
+        assert all(output == reference_output(chunks) for output in outputs)
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_process_mode_configure_errors_propagate():
+    executor = AudioExecutor("process", max_workers=1)
+    try:
+        session = await executor.open_session()
+        with pytest.raises(ValueError, match="Unsupported sample format"):
+            await session.configure(sample_format="mp3")
+        await session.close()
+        assert executor.worker_sessions == [0]
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_process_mode_shares_memory_only_once_audio_arrives():
+    executor = AudioExecutor("process", max_workers=1)
+    try:
+        session = await executor.open_session()
+        assert session.shm is None
+        # Half a second of 48 kHz PCM16, the browser's largest chunk, fits
+        chunks = make_chunks(count=2, size=24000)
+        assert len(chunks[0]) <= SHARED_BUFFER_BYTES // 2
+        output = b''.join([await session.process_audio_chunk(chunk) for chunk in chunks]) + await session.flush()
+        assert session.shm is not None
+        assert output == reference_output(chunks)
+        await session.close()
+        assert session.shm is None
+        assert executor.worker_sessions == [0]
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_process_mode_oversized_chunk_falls_back_to_pickling():
+    executor = AudioExecutor("process", max_workers=1)
+    try:
+        session = await executor.open_session()
+        await session.configure(sample_rate=24000)
+        chunk = np.ones(SHARED_BUFFER_BYTES // 2 + 2, dtype=np.int8).tobytes()
+        assert await session.process_audio_chunk(chunk) == chunk
+        await session.close()
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_batch_mode_sessions_with_staggered_starts():
+    executor = AudioExecutor("batch")
+    try:
+        first, second = [await executor.open_session() for _ in range(2)]
+        chunks = make_chunks(count=8, size=24000)
+        outputs = [b'', b'']
+        # The second session starts one chunk later, so every batch pairs
+        # chunks from different positions in the two streams
+        outputs[0] += await first.process_audio_chunk(chunks[0])
+        for a, b in zip(chunks[1:], chunks):
+            results = await asyncio.gather(first.process_audio_chunk(a), second.process_audio_chunk(b))
+            outputs[0] += results[0]
+            outputs[1] += results[1]
+        outputs[0] += await first.flush()
+        outputs[1] += await second.process_audio_chunk(chunks[-1]) + await second.flush()
+        for session in (first, second):
+            await session.close()
+        assert outputs == [reference_output(chunks)] * 2
+    finally:
+        executor.shutdown()
@@ -0,0 +1,121 @@
+import pytest
+import asyncio
+from audio_pipeline import AudioPipeline, PipelineStats
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_items_pass_through_stages_in_order():
+    out = []
+
+    async def double(x):
+        return x * 2
+
+    async def drop_odd(x):
+        return x if x % 4 == 0 else None
+
+    async def sink(x):
+        out.append(x)
+
+    pipeline = AudioPipeline([("double", double), ("filter", drop_odd), ("sink", sink)]).start()
+    for i in range(6):
+        await pipeline.put(i)
+    await pipeline.flush()
+    assert out == [0, 4, 8]
+    stats = pipeline.stats()
+    assert stats["double"]["items"] == 6
+    assert stats["filter"]["dropped"] == 3
+    assert stats["sink"]["items"] == 3
+    await pipeline.close()
+
+@pytest.mark.asyncio
+async def test_flush_waits_for_slow_stage():
+    out = []
+
+    async def slow(x):
+        await asyncio.sleep(0.01)
+        return x
+
+    async def sink(x):
+        out.append(x)
+
+    pipeline = AudioPipeline([("slow", slow), ("sink", sink)]).start()
+    for i in range(3):
+        await pipeline.put(i)
+    await pipeline.flush()
+    assert out == [0, 1, 2]
+    await pipeline.close()
+
+@pytest.mark.asyncio
+async def test_full_queue_pushes_back_on_put():
+    release = asyncio.Event()
+
+    async def blocked(x):
+        await release.wait()
+
+    pipeline = AudioPipeline([("blocked", blocked)], maxsize=2).start()
+    # One item in the handler, two queued; the next put has to wait
+    for i in range(3):
+        await pipeline.put(i)
+    await settle()
+    put = asyncio.create_task(pipeline.put(3))
+    await settle()
+    assert not put.done()
+    assert pipeline.stats()["blocked"]["max_depth"] == 2
+    release.set()
+    await put
+    await pipeline.flush()
+    await pipeline.close()
+
+@pytest.mark.asyncio
+async def test_handler_error_drops_item_and_keeps_running():
+    out = []
+
+    async def fragile(x):
+        if x == 1:
+            raise RuntimeError("bad chunk")
+        return x
+
+    async def sink(x):
+        out.append(x)
+
+    pipeline = AudioPipeline([("fragile", fragile), ("sink", sink)]).start()
+    for i in range(3):
+        await pipeline.put(i)
+    await pipeline.flush()
+    assert out == [0, 2]
+    assert pipeline.stats()["fragile"]["errors"] == 1
+    await pipeline.close()
+
+@pytest.mark.asyncio
+async def test_close_cancels_stages_and_pending_flush():
+    async def forever(x):
+        await asyncio.Event().wait()
+
+    pipeline = AudioPipeline([("forever", forever)]).start()
+    await pipeline.put(0)
+    flush = asyncio.create_task(pipeline.flush())
+    await settle()
+    await pipeline.close()
+    with pytest.raises(asyncio.CancelledError):
+        await flush
+    assert all(task.done() for task in pipeline.tasks)
+
+@pytest.mark.asyncio
+async def test_pipeline_stats_merge_sessions():
+    async def passthrough(x):
+        return x
+
+    totals = PipelineStats()
+    for _ in range(2):
+        pipeline = AudioPipeline([("a", passthrough), ("b", passthrough)]).start()
+        await pipeline.put(1)
+        await pipeline.flush()
+        await pipeline.close()
+        totals.merge(pipeline)
+    stats = totals.stats()
+    assert stats["sessions"] == 2
+    assert stats["stages"]["a"]["items"] == 2
+    assert stats["stages"]["b"]["latency"]["count"] == 2
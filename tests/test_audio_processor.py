@@ -3,6 +3,8 @@ import numpy as np
 import wave
 import os
 from realtime_server import AudioProcessor
+from voice_activity import VoiceActivityDetector
+from audio_buffer import AudioRingBuffer
 
 @pytest.fixture
 def audio_processor():
@@ -20,11 +22,14 @@ def test_process_audio_chunk(audio_processor):
     test_audio = np.sin(2 * np.pi * 440 * t)
     test_audio = (test_audio * 32767).astype(np.int16).tobytes()
 
-    # Process the audio chunk
+    # Process the audio chunk, then drain the samples held back by the filter
     processed_audio = audio_processor.process_audio_chunk(test_audio)
+    tail_audio = audio_processor.flush()
 
     # Check the output is bytes
     assert isinstance(processed_audio, bytes)
+    assert isinstance(tail_audio, bytes)
+    processed_audio += tail_audio
 
     # Convert processed audio back to numpy array for analysis
     processed_samples = np.frombuffer(processed_audio, dtype=np.int16)
@@ -33,6 +38,19 @@ def test_process_audio_chunk(audio_processor):
     expected_length = int(len(test_audio) / 2 * (24000 / 48000))
     assert len(processed_audio) == expected_length * 2  # *2 because int16 is 2 bytes
 
+def test_process_audio_chunk_is_continuous_across_chunks(audio_processor):
+    # Splitting a stream into chunks must not change the resampled output
+    t = np.arange(48000) / 48000
+    test_audio = (np.sin(2 * np.pi * 440 * t) * 16000).astype(np.int16)
+
+    whole = audio_processor.process_audio_chunk(test_audio.tobytes()) + audio_processor.flush()
+    chunked = b''.join(
+        audio_processor.process_audio_chunk(test_audio[i:i + 4096].tobytes())
+        for i in range(0, len(test_audio), 4096)
+    ) + audio_processor.flush()
+
+    assert chunked == whole
+
 def test_save_audio_buffer(audio_processor, tmp_path):
     # Create a test audio buffer
     duration = 0.1
@@ -62,3 +80,70 @@ def test_save_audio_buffer(audio_processor, tmp_path):
             np.frombuffer(audio_data, dtype=np.int16),
             np.frombuffer(test_audio, dtype=np.int16)
         )
+
+def test_configure_passthrough(audio_processor):
+    audio_processor.configure(sample_rate=24000, channels=1, sample_format="pcm16")
+    assert audio_processor.path == "passthrough"
+    assert audio_processor.resampler is None
+
+    test_audio = np.arange(-500, 500, dtype=np.int16).tobytes()
+    assert audio_processor.process_audio_chunk(test_audio) == test_audio
+    assert audio_processor.flush() == b''
+
+def test_configure_selects_path(audio_processor):
+    audio_processor.configure(sample_rate=48000)
+    assert audio_processor.path == "decimate"
+    audio_processor.configure(sample_rate=44100)
+    assert audio_processor.path == "resample"
+    audio_processor.configure(sample_rate=24000, sample_format="float32")
+    assert audio_processor.path == "convert"
+
+def test_configure_rejects_unknown_format(audio_processor):
+    with pytest.raises(ValueError, match="Unsupported sample format"):
+        audio_processor.configure(sample_format="mp3")
+    with pytest.raises(ValueError, match="Unsupported sample rate"):
+        audio_processor.configure(sample_rate=0)
+    with pytest.raises(ValueError, match="Unsupported channel count"):
+        audio_processor.configure(channels=0)
+
+def test_process_44100_chunk(audio_processor):
+    audio_processor.configure(sample_rate=44100)
+    test_audio = np.zeros(44100, dtype=np.int16).tobytes()
+    processed_audio = audio_processor.process_audio_chunk(test_audio) + audio_processor.flush()
+    assert len(processed_audio) == 24000 * 2
+
+def test_stereo_downmix(audio_processor):
+    audio_processor.configure(sample_rate=24000, channels=2)
+    left = np.full(100, 1000, dtype=np.int16)
+    right = np.full(100, 3000, dtype=np.int16)
+    interleaved = np.column_stack((left, right)).ravel()
+
+    processed = np.frombuffer(audio_processor.process_audio_chunk(interleaved.tobytes()), dtype=np.int16)
+    np.testing.assert_array_equal(processed, np.full(100, 2000, dtype=np.int16))
+
+def test_float32_input(audio_processor):
+    audio_processor.configure(sample_rate=24000, sample_format="float32")
+    test_audio = np.array([0.0, 0.5, -0.5, 1.0], dtype=np.float32)
+    processed = np.frombuffer(audio_processor.process_audio_chunk(test_audio.tobytes()), dtype=np.int16)
+    np.testing.assert_array_equal(processed, [0, 16384, -16384, 32767])
+
+def test_vad_trims_silence():
+    processor = AudioProcessor(vad=VoiceActivityDetector())
+    processor.configure(sample_rate=24000)
+
+    silence = np.zeros(24000, dtype=np.int16).tobytes()
+    assert processor.process_audio_chunk(silence) == b''
+    assert processor.flush() == b''
+    assert processor.stats()["trimmed_seconds"] == pytest.approx(1.0)
+
+def test_save_audio_ring_buffer(audio_processor, tmp_path):
+    buffer = AudioRingBuffer(capacity=1000, initial_capacity=1000)
+    buffer.append(np.arange(800, dtype=np.int16))
+    buffer.append(np.arange(800, 1200, dtype=np.int16))
+
+    test_filename = tmp_path / "ring.wav"
+    audio_processor.save_audio_buffer(buffer, str(test_filename))
+
+    with wave.open(str(test_filename), 'rb') as wav_file:
+        audio_data = wav_file.readframes(wav_file.getnframes())
+    np.testing.assert_array_equal(np.frombuffer(audio_data, dtype=np.int16), np.arange(200, 1200))
@@ -0,0 +1,69 @@
+import pytest
+import json
+import wave
+import numpy as np
+from audio_recorder import StreamingRecorder, open_recording
+
+def chunks(count=5, size=2400):
+    audio = np.arange(count * size, dtype=np.int64).astype(np.int16)
+    return audio, [audio[i:i + size].tobytes() for i in range(0, len(audio), size)]
+
+def test_wav_recording(tmp_path):
+    audio, parts = chunks()
+    filename = str(tmp_path / "recording.wav")
+    recorder = StreamingRecorder(filename).start()
+    for part in parts:
+        recorder.write(part)
+    recorder.close()
+
+    with wave.open(filename, 'rb') as wav_file:
+        assert wav_file.getnchannels() == 1
+        assert wav_file.getsampwidth() == 2
+        assert wav_file.getframerate() == 24000
+        assert wav_file.getnframes() == len(audio)
+        data = wav_file.readframes(wav_file.getnframes())
+    np.testing.assert_array_equal(np.frombuffer(data, dtype=np.int16), audio)
+    assert recorder.bytes_written == audio.nbytes
+    assert recorder.dropped_chunks == 0
+
+def test_raw_recording_with_sidecar(tmp_path):
+    audio, parts = chunks()
+    filename = str(tmp_path / "recording.raw")
+    recorder = StreamingRecorder(filename, file_format="raw").start()
+    for part in parts:
+        recorder.write(part)
+    recorder.close()
+
+    with open(filename + ".json") as f:
+        header = json.load(f)
+    assert header == {"sample_rate": 24000, "channels": 1, "sample_format": "pcm16", "frames": len(audio)}
+    np.testing.assert_array_equal(np.fromfile(filename, dtype=np.int16), audio)
+
+@pytest.mark.parametrize("extension,file_format", [("wav", "wav"), ("raw", "raw")])
+def test_open_recording_memory_maps_samples(tmp_path, extension, file_format):
+    audio, parts = chunks()
+    filename = str(tmp_path / f"recording.{extension}")
+    recorder = StreamingRecorder(filename, file_format=file_format).start()
+    for part in parts:
+        recorder.write(part)
+    recorder.close()
+
+    samples = open_recording(filename)
+    assert isinstance(samples, np.memmap)
+    np.testing.assert_array_equal(samples[:, 0], audio)
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    recorder = StreamingRecorder(str(tmp_path / "recording.wav"), max_queue_chunks=1)
+    recorder.thread = object()  # Pretend started, but nothing drains the queue
+    recorder.write(b"\x00\x00")
+    recorder.write(b"\x00\x00")
+    assert recorder.dropped_chunks == 1
+
+def test_write_before_start(tmp_path):
+    recorder = StreamingRecorder(str(tmp_path / "recording.wav"))
+    with pytest.raises(RuntimeError):
+        recorder.write(b"\x00\x00")
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        StreamingRecorder(str(tmp_path / "recording.mp3"), file_format="mp3")
@@ -0,0 +1,53 @@
+import pytest
+import numpy as np
+import scipy.signal
+from audio_resampler import StreamingResampler, design_polyphase_filter
+
+@pytest.fixture
+def test_signal():
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(30011) * 0.3).astype(np.float32)
+
+@pytest.mark.parametrize("source_rate,target_rate", [
+    (48000, 24000),
+    (44100, 24000),
+    (16000, 24000),
+    (24000, 24000),
+])
+@pytest.mark.parametrize("chunk_size", [977, 12000])
+def test_chunked_output_matches_one_pass(test_signal, source_rate, target_rate, chunk_size):
+    resampler = StreamingResampler(source_rate, target_rate)
+    chunks = []
+    for start in range(0, len(test_signal), chunk_size):
+        chunks.append(resampler.process(test_signal[start:start + chunk_size]))
+    chunks.append(resampler.flush())
+
+    expected = scipy.signal.resample_poly(test_signal, target_rate, source_rate)
+    actual = np.concatenate(chunks)
+    assert len(actual) == len(expected)
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+def test_tiny_chunks(test_signal):
+    resampler = StreamingResampler(48000, 24000)
+    signal = test_signal[:300]
+    chunks = [resampler.process(signal[i:i + 1]) for i in range(len(signal))]
+    chunks.append(resampler.flush())
+
+    expected = scipy.signal.resample_poly(signal, 24000, 48000)
+    np.testing.assert_allclose(np.concatenate(chunks), expected, atol=1e-5)
+
+def test_flush_resets_state(test_signal):
+    resampler = StreamingResampler(48000, 24000)
+    first = np.concatenate([resampler.process(test_signal), resampler.flush()])
+    second = np.concatenate([resampler.process(test_signal), resampler.flush()])
+    np.testing.assert_array_equal(first, second)
+
+def test_flush_without_input():
+    resampler = StreamingResampler(48000, 24000)
+    assert len(resampler.flush()) == 0
+
+def test_taps_are_shared_per_rate_pair():
+    first = StreamingResampler(48000, 24000)
+    second = StreamingResampler(96000, 48000)
+    assert first.polyphase is second.polyphase
+    assert design_polyphase_filter.cache_info().hits > 0
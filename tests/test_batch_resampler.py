@@ -0,0 +1,96 @@
+import pytest
+import asyncio
+import numpy as np
+import scipy.signal
+from audio_resampler import StreamingResampler
+from batch_resampler import BatchResampler, resample_batch
+
+@pytest.fixture
+def signals():
+    rng = np.random.default_rng(0)
+    return [(rng.standard_normal(9000) * 0.3).astype(np.float32) for _ in range(4)]
+
+def test_resample_batch_matches_one_pass(signals):
+    rates = [48000, 44100, 48000, 24000]
+    resamplers = [StreamingResampler(rate, 24000) for rate in rates]
+    outputs = [[] for _ in signals]
+    for start in range(0, 9000, 480):
+        results = resample_batch([(r, x[start:start + 480]) for r, x in zip(resamplers, signals)])
+        for output, result in zip(outputs, results):
+            output.append(result)
+
+    for resampler, signal, output, rate in zip(resamplers, signals, outputs, rates):
+        output.append(resampler.flush())
+        expected = scipy.signal.resample_poly(signal, 24000, rate)
+        np.testing.assert_allclose(np.concatenate(output), expected, atol=1e-5)
+
+def test_resample_batch_same_stream_twice_keeps_order(signals):
+    resampler = StreamingResampler(48000, 24000)
+    signal = signals[0]
+    first, second = resample_batch([(resampler, signal[:4000]), (resampler, signal[4000:])])
+    output = np.concatenate([first, second, resampler.flush()])
+    np.testing.assert_allclose(output, scipy.signal.resample_poly(signal, 24000, 48000), atol=1e-5)
+
+@pytest.mark.asyncio
+async def test_concurrent_chunks_share_a_batch(signals):
+    batcher = BatchResampler(window_ms=20)
+    resamplers = [StreamingResampler(48000, 24000) for _ in signals]
+    results = await asyncio.gather(*(
+        batcher.resample(r, x[:960]) for r, x in zip(resamplers, signals)
+    ))
+
+    assert batcher.stats()["batches"] == 1
+    assert batcher.stats()["chunks"] == len(signals)
+    for resampler, signal, result in zip(resamplers, signals, results):
+        reference = StreamingResampler(48000, 24000)
+        np.testing.assert_allclose(result, reference.process(signal[:960]), atol=1e-6)
+
+@pytest.mark.asyncio
+async def test_batches_report_size_and_wait(signals):
+    batches = []
+    batcher = BatchResampler(window_ms=5, on_batch=lambda size, wait: batches.append((size, wait)))
+    resamplers = [StreamingResampler(48000, 24000) for _ in signals]
+    # Several batches in a row, with each stream's chunks in order
+    for start in range(0, 4800, 960):
+        results = await asyncio.gather(*(
+            batcher.resample(r, x[start:start + 960]) for r, x in zip(resamplers, signals)))
+
+    assert [size for size, _ in batches] == [len(signals)] * 5
+    assert all(wait >= 0 for _, wait in batches)
+    for signal, result in zip(signals, results):
+        reference = StreamingResampler(48000, 24000)
+        expected = [reference.process(signal[start:start + 960]) for start in range(0, 4800, 960)][-1]
+        np.testing.assert_allclose(result, expected, atol=1e-6)
+
+@pytest.mark.asyncio
+async def test_full_batch_runs_without_waiting_for_window(signals):
+    batcher = BatchResampler(window_ms=10000, max_batch=2)
+    resamplers = [StreamingResampler(48000, 24000) for _ in range(2)]
+    await asyncio.wait_for(asyncio.gather(*(
+        batcher.resample(r, signals[0][:480]) for r in resamplers
+    )), timeout=1.0)
+    assert batcher.stats()["batches"] == 1
+
+@pytest.mark.parametrize("rate", [48000, 44100])
+def test_resample_batch_staggered_starts(signals, rate):
+    # Streams join the batch a few chunks apart, so they share an alignment
+    # key while sitting at different absolute positions in their streams
+    resamplers = [StreamingResampler(rate, 24000) for _ in signals[:3]]
+    joins = [0, 1, 3]
+    chunk = 480
+    outputs = [[] for _ in resamplers]
+    for step in range(0, 9000 // chunk + 3):
+        requests, members = [], []
+        for i, (resampler, join) in enumerate(zip(resamplers, joins)):
+            start = (step - join) * chunk
+            if 0 <= start and start + chunk <= 9000:
+                requests.append((resampler, signals[i][start:start + chunk]))
+                members.append(i)
+        for i, result in zip(members, resample_batch(requests)):
+            outputs[i].append(result)
+
+    for i, (resampler, output) in enumerate(zip(resamplers, outputs)):
+        output.append(resampler.flush())
+        signal = signals[i][:9000 // chunk * chunk]
+        expected = scipy.signal.resample_poly(signal, 24000, rate)
+        np.testing.assert_allclose(np.concatenate(output), expected, atol=1e-5)
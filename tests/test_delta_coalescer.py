@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+import json
+from delta_coalescer import DeltaCoalescer
+
+def contents(frames):
+    return [json.loads(frame)["content"] for frame in frames]
+
+@pytest.mark.asyncio
+async def test_deltas_within_window_share_a_frame():
+    frames = []
+    coalescer = DeltaCoalescer(lambda frame: asyncio.sleep(0, frames.append(frame)), window=0.02)
+    for delta in ("Hel", "lo", ", ", "world"):
+        await coalescer.add(delta)
+    assert contents(frames) == ["Hel"]
+    await asyncio.sleep(0.05)
+    assert contents(frames) == ["Hel", "lo, world"]
+    assert json.loads(frames[1])["isNewResponse"] is False
+    assert coalescer.stats() == {"deltas": 4, "frames": 2}
+
+@pytest.mark.asyncio
+async def test_first_delta_of_each_response_is_sent_at_once():
+    frames = []
+    coalescer = DeltaCoalescer(lambda frame: asyncio.sleep(0, frames.append(frame)), window=60)
+    await coalescer.add("First")
+    await coalescer.add(" held")
+    assert contents(frames) == ["First"]
+    await coalescer.flush()
+    coalescer.start_response()
+    await coalescer.add("Next")
+    await coalescer.add(" held")
+    assert contents(frames) == ["First", " held", "Next"]
+    assert coalescer.timer is not None
+    coalescer.close()
+
+@pytest.mark.asyncio
+async def test_char_threshold_and_flush_send_early():
+    frames = []
+    coalescer = DeltaCoalescer(lambda frame: asyncio.sleep(0, frames.append(frame)), window=60, max_chars=5)
+    await coalescer.add("first")
+    await coalescer.add("abc")
+    await coalescer.add("def")
+    await coalescer.add("g")
+    assert contents(frames) == ["first", "abcdef"]
+    await coalescer.flush()
+    await coalescer.flush()
+    assert contents(frames) == ["first", "abcdef", "g"]
+    assert coalescer.timer is None
+
+@pytest.mark.asyncio
+async def test_zero_window_sends_every_delta():
+    frames = []
+    coalescer = DeltaCoalescer(lambda frame: asyncio.sleep(0, frames.append(frame)), window=0)
+    await coalescer.add("a")
+    await coalescer.add("")
+    await coalescer.add("b")
+    assert contents(frames) == ["a", "b"]
+
+@pytest.mark.asyncio
+async def test_timer_flush_failure_is_logged_and_close_cancels_pending_send(caplog):
+    frames = []
+
+    async def failing_send(frame):
+        if frames:
+            raise ConnectionError("browser went away")
+        frames.append(frame)
+
+    coalescer = DeltaCoalescer(failing_send, window=0.01)
+    await coalescer.add("sent")  # The first delta goes out without the timer
+    await coalescer.add("lost")
+    await asyncio.sleep(0.05)
+    assert "browser went away" in caplog.text
+    assert not coalescer.tasks
+
+    release = asyncio.Event()
+    sent = []
+    coalescer = DeltaCoalescer(lambda frame: release.wait() if sent else asyncio.sleep(0, sent.append(frame)),
+                               window=0.01)
+    await coalescer.add("sent")
+    await coalescer.add("stuck")
+    await asyncio.sleep(0.05)
+    task, = coalescer.tasks
+    coalescer.close()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert task.cancelled() and not coalescer.tasks
@@ -0,0 +1,134 @@
+import pytest
+import asyncio
+from event_dispatcher import EventDispatcher, lane_for
+
+def delta(text, item="item_1"):
+    return {"type": "response.text.delta", "response_id": "resp_1", "item_id": item,
+            "output_index": 0, "content_index": 0, "delta": text}
+
+class Recorder:
+    def __init__(self):
+        self.events = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, event):
+        await self.gate.wait()
+        self.events.append(event)
+
+def test_lanes():
+    assert lane_for("response.text.delta") == lane_for("response.done") == lane_for("error")
+    assert lane_for("conversation.item.created") == lane_for("response.done")
+    assert lane_for("rate_limits.updated") != lane_for("response.done")
+
+@pytest.mark.asyncio
+async def test_slow_handler_does_not_block_put():
+    recorder = Recorder()
+    recorder.gate.clear()
+    dispatcher = EventDispatcher(lambda message_type: recorder)
+    for i in range(10):
+        await asyncio.wait_for(dispatcher.put(delta(str(i), item=f"item_{i}")), timeout=0.1)
+    await asyncio.sleep(0)
+    # One event is held by the stuck handler, the rest are queued
+    assert dispatcher.stats()["queue_depth"] == 9
+
+    recorder.gate.set()
+    await dispatcher.join()
+    assert [event["delta"] for event in recorder.events] == [str(i) for i in range(10)]
+    await dispatcher.close()
+
+@pytest.mark.asyncio
+async def test_lanes_run_concurrently():
+    ordered, other = Recorder(), Recorder()
+    ordered.gate.clear()
+    dispatcher = EventDispatcher(lambda message_type: ordered if message_type.startswith("response.") else other)
+    await dispatcher.put({"type": "response.created"})
+    await dispatcher.put({"type": "rate_limits.updated"})
+    await asyncio.sleep(0.01)
+    # The stuck response lane does not hold up unrelated events
+    assert [event["type"] for event in other.events] == ["rate_limits.updated"]
+    assert ordered.events == []
+
+    ordered.gate.set()
+    await dispatcher.join()
+    assert [event["type"] for event in ordered.events] == ["response.created"]
+    await dispatcher.close()
+
+@pytest.mark.asyncio
+async def test_full_queue_merges_deltas():
+    recorder = Recorder()
+    recorder.gate.clear()
+    dispatcher = EventDispatcher(lambda message_type: recorder, max_queue=2)
+    await dispatcher.put(delta("a"))
+    await dispatcher.put(delta("b"))
+    await dispatcher.put(delta("c"))
+    await dispatcher.put(delta("d"))
+    stats = dispatcher.stats()
+    assert stats["queue_depth"] == 2
+    assert stats["merged_deltas"] == 2
+
+    recorder.gate.set()
+    await dispatcher.join()
+    assert "".join(event["delta"] for event in recorder.events) == "abcd"
+    await dispatcher.close()
+
+@pytest.mark.asyncio
+async def test_full_queue_blocks_other_events():
+    recorder = Recorder()
+    recorder.gate.clear()
+    dispatcher = EventDispatcher(lambda message_type: recorder, max_queue=1)
+    await dispatcher.put({"type": "response.created"})
+    await asyncio.sleep(0)
+    await dispatcher.put({"type": "response.text.done"})
+    put = asyncio.create_task(dispatcher.put({"type": "response.done"}))
+    await asyncio.sleep(0.01)
+    assert not put.done()
+    assert dispatcher.stats()["blocked_puts"] == 1
+
+    recorder.gate.set()
+    await put
+    await dispatcher.join()
+    assert [event["type"] for event in recorder.events] == ["response.created", "response.text.done", "response.done"]
+    await dispatcher.close()
+
+@pytest.mark.asyncio
+async def test_handler_errors_and_latency_are_recorded():
+    async def failing(event):
+        raise RuntimeError("boom")
+
+    dispatcher = EventDispatcher(lambda message_type: failing)
+    await dispatcher.put({"type": "error"})
+    await dispatcher.put({"type": "error"})
+    await dispatcher.join()
+    handlers = dispatcher.stats()["handlers"]
+    assert handlers["error"]["calls"] == 2
+    assert handlers["error"]["max_ms"] >= 0
+    await dispatcher.close()
+
+@pytest.mark.asyncio
+async def test_hooks_follow_queue_depth_and_handler_time():
+    recorder = Recorder()
+    recorder.gate.clear()
+    depth, handled = {}, []
+    dispatcher = EventDispatcher(lambda message_type: recorder,
+                                 on_depth=lambda lane, change: depth.__setitem__(lane, depth.get(lane, 0) + change),
+                                 on_handled=lambda message_type, seconds: handled.append(message_type))
+    for i in range(3):
+        await dispatcher.put(delta(str(i), item=f"item_{i}"))
+    await dispatcher.put({"type": "rate_limits.updated"})
+    await asyncio.sleep(0)
+    # One response event is held by the stuck handler
+    assert depth == {"conversation": 2, "rate_limits.updated": 0}
+
+    recorder.gate.set()
+    await dispatcher.join()
+    assert depth == {"conversation": 0, "rate_limits.updated": 0}
+    assert sorted(handled) == ["rate_limits.updated"] + ["response.text.delta"] * 3
+
+    # Events still queued when the dispatcher closes are taken off the gauge
+    recorder.gate.clear()
+    for i in range(3):
+        await dispatcher.put(delta(str(i), item=f"item_{i}"))
+    await asyncio.sleep(0)
+    await dispatcher.close()
+    assert depth["conversation"] == 0
@@ -0,0 +1,59 @@
+import json
+import logging
+import pytest
+from latency_tracker import LatencyHistogram, RecordingTimeline, LatencyStats
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for ms in (3, 4, 40, 40, 700):
+        histogram.observe(ms)
+    stats = histogram.stats()
+    assert stats["count"] == 5
+    assert stats["mean_ms"] == pytest.approx(157.4)
+    assert stats["p50_ms"] == 50
+    assert stats["p99_ms"] == 700  # Capped at the max seen, not the 1000 ms bound
+    assert LatencyHistogram().stats()["p99_ms"] == 0.0
+
+def test_histogram_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.observe(1)
+    b.observe(20000)
+    a.merge(b)
+    assert a.count == 2
+    assert a.counts[-1] == 1
+    assert a.max_ms == 20000
+
+def test_timeline_only_marks_stages_after_stop():
+    timeline = RecordingTimeline()
+    timeline.mark("response_created", at=0.5)  # A segment answered mid-recording
+    timeline.mark("stop_received", at=1.0)
+    timeline.mark("commit_sent", at=1.01)
+    timeline.mark("first_delta", at=1.3)
+    timeline.mark("first_delta", at=1.4)
+    timeline.mark("response_done", at=1.5)
+    timeline.mark("response_done", at=2.0)
+    since_stop = timeline.since_stop_ms()
+    assert set(since_stop) == {"commit_sent", "first_delta", "response_done"}
+    assert since_stop["first_delta"] == pytest.approx(300)
+    assert since_stop["response_done"] == pytest.approx(1000)
+
+def test_stats_aggregate_recordings_and_log_one_line(caplog):
+    stats = LatencyStats(recent=1)
+    for done in (1.2, 1.8):
+        timeline = RecordingTimeline()
+        timeline.mark("stop_received", at=1.0)
+        timeline.mark("response_done", at=done)
+        timeline.observe_chunk("resample", 0.002)
+        with caplog.at_level(logging.INFO, logger="latency_tracker"):
+            stats.record(timeline, session_id="sess")
+
+    line = json.loads(caplog.records[-1].getMessage())
+    assert line["event"] == "recording_latency"
+    assert line["session_id"] == "sess"
+    assert line["since_stop_ms"]["response_done"] == pytest.approx(800)
+
+    result = stats.stats()
+    assert result["recordings"] == 2
+    assert result["since_stop"]["response_done"]["count"] == 2
+    assert result["chunks"]["resample"]["count"] == 2
+    assert len(result["recent"]) == 1
@@ -0,0 +1,157 @@
+import pytest
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from llm_cache import CachedLLMProcessor, LLMResponseCache, cache_key
+
+def test_key_normalizes_text_and_versions_prompt():
+    assert cache_key("gpt-4o", "Fix this:", "  Hello\r\nworld \n") == cache_key("gpt-4o", "Fix this:", "Hello\nworld")
+    assert cache_key("gpt-4o", "Fix this:", "café") == cache_key("gpt-4o", "Fix this:", "café")
+    assert cache_key("gpt-4o", "Fix this:", "Hello") != cache_key("gpt-4o", "Fix this!", "Hello")
+    assert cache_key("gpt-4o", "Fix this:", "Hello") != cache_key("o1-mini", "Fix this:", "Hello")
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    lookups = []
+    cache = LLMResponseCache(max_bytes=10, on_lookup=lookups.append)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"
+    cache.put("c", "cccc")  # Over 10 bytes; "b" is the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == "cccc"
+    assert cache.memory_bytes == 8
+    assert lookups == ["memory", "miss", "memory"]
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire():
+    cache = LLMResponseCache(ttl=60)
+    with patch("llm_cache.time.time", return_value=1000.0):
+        cache.put("a", "answer")
+    with patch("llm_cache.time.time", return_value=1059.0):
+        assert cache.get("a") == "answer"
+    with patch("llm_cache.time.time", return_value=1061.0):
+        assert cache.get("a") is None
+    assert cache.memory_bytes == 0
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    first = LLMResponseCache(db_path=path)
+    first.put("a", "answer")
+    first.close()
+
+    second = LLMResponseCache(db_path=path)
+    assert second.get("a") == "answer"
+    assert second.get("a") == "answer"
+    assert second.get("b") is None
+    assert second.stats() == {"entries": 1, "memory_bytes": 6, "memory_hits": 1, "disk_hits": 1,
+                              "misses": 1, "evictions": 0}
+    second.close()
+
+class FakeProcessor:
+    default_model = "gpt-4o"
+
+    def __init__(self, parts=("Hello", " world"), fail=False):
+        self.parts = parts
+        self.fail = fail
+        self.calls = 0
+
+    async def process_text(self, text, prompt, model=None):
+        self.calls += 1
+        for part in self.parts:
+            yield part
+        if self.fail:
+            raise RuntimeError("stream dropped")
+
+    def process_text_sync(self, text, prompt, model=None):
+        self.calls += 1
+        return "".join(self.parts)
+
+async def collect(stream):
+    return [part async for part in stream]
+
+@pytest.mark.asyncio
+async def test_streamed_answer_is_cached_and_replayed():
+    processor = FakeProcessor()
+    cached = CachedLLMProcessor(processor, LLMResponseCache(), replay_chunk_chars=4)
+    assert await collect(cached.process_text("text", "prompt")) == ["Hello", " world"]
+    assert await collect(cached.process_text(" text ", "prompt")) == ["Hell", "o wo", "rld"]
+    assert processor.calls == 1
+    # A different model is a different answer
+    await collect(cached.process_text("text", "prompt", model="gemini-1.5-pro"))
+    assert processor.calls == 2
+
+@pytest.mark.asyncio
+async def test_failed_or_abandoned_stream_is_not_cached():
+    processor = FakeProcessor(fail=True)
+    cached = CachedLLMProcessor(processor, LLMResponseCache())
+    with pytest.raises(RuntimeError):
+        await collect(cached.process_text("text", "prompt"))
+
+    processor.fail = False
+    stream = cached.process_text("text", "prompt")
+    await stream.__anext__()
+    await stream.aclose()
+    assert cached.cache.stats()["entries"] == 0
+
+def test_sync_answer_is_cached():
+    processor = FakeProcessor()
+    cached = CachedLLMProcessor(processor, LLMResponseCache())
+    assert cached.process_text_sync("question", "prompt", model="o1-mini") == "Hello world"
+    assert cached.process_text_sync("question", "prompt", model="o1-mini") == "Hello world"
+    assert processor.calls == 1
+
+class SlowProcessor(FakeProcessor):
+    async def process_text(self, text, prompt, model=None):
+        self.calls += 1
+        for part in self.parts:
+            await asyncio.sleep(0.01)
+            yield part
+        if self.fail:
+            self.fail = False
+            raise RuntimeError("stream dropped")
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_share_one_call():
+    processor = SlowProcessor()
+    cached = CachedLLMProcessor(processor, LLMResponseCache())
+    first, second = await asyncio.gather(collect(cached.process_text("text", "prompt")),
+                                         collect(cached.process_text("text", "prompt")))
+    assert "".join(first) == "".join(second) == "Hello world"
+    assert processor.calls == 1
+    assert cached.shared == 1
+    assert not cached.flights
+
+@pytest.mark.asyncio
+async def test_waiting_request_asks_the_model_when_the_first_fails():
+    processor = SlowProcessor(fail=True)
+    cached = CachedLLMProcessor(processor, LLMResponseCache())
+    first, second = await asyncio.gather(collect(cached.process_text("text", "prompt")),
+                                         collect(cached.process_text("text", "prompt")),
+                                         return_exceptions=True)
+    assert isinstance(first, RuntimeError)
+    assert "".join(second) == "Hello world"
+    assert processor.calls == 2
+
+def test_concurrent_sync_requests_share_one_call():
+    started = threading.Event()
+    release = threading.Event()
+
+    class BlockingProcessor(FakeProcessor):
+        def process_text_sync(self, text, prompt, model=None):
+            started.set()
+            release.wait()
+            return super().process_text_sync(text, prompt, model)
+
+    processor = BlockingProcessor()
+    cached = CachedLLMProcessor(processor, LLMResponseCache())
+    with ThreadPoolExecutor(2) as pool:
+        first = pool.submit(cached.process_text_sync, "question", "prompt")
+        started.wait()
+        second = pool.submit(cached.process_text_sync, "question", "prompt")
+        while not cached.shared:
+            time.sleep(0.001)
+        release.set()
+        assert first.result() == second.result() == "Hello world"
+    assert processor.calls == 1
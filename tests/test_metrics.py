@@ -0,0 +1,43 @@
+import pytest
+from metrics import MetricsRegistry
+
+def test_counter_and_labelled_children():
+    registry = MetricsRegistry()
+    chunks = registry.counter("chunks_total", "Chunks received")
+    errors = registry.counter("errors_total", "Errors by type", ["type"])
+    chunks.inc()
+    chunks.inc(2.5)
+    errors.labels("upstream").inc()
+    errors.labels("upstream").inc()
+    errors.labels('say "hi"').inc()
+    text = registry.render()
+    assert "# TYPE chunks_total counter\nchunks_total 3.5\n" in text
+    assert 'errors_total{type="upstream"} 2\n' in text
+    assert 'errors_total{type="say \\"hi\\""} 1\n' in text
+
+def test_gauge_reads_at_scrape_time():
+    registry = MetricsRegistry()
+    sessions = []
+    registry.gauge("sessions", "Open sessions", read=lambda: len(sessions))
+    sessions.extend([1, 2])
+    assert "sessions 2\n" in registry.render()
+
+def test_histogram_buckets_are_cumulative_seconds():
+    registry = MetricsRegistry()
+    latency = registry.histogram("request_seconds", "Request latency", ["route"])
+    for seconds in (0.004, 0.02, 3.0):
+        latency.labels("/a").observe(seconds)
+    text = registry.render()
+    assert "# TYPE request_seconds histogram" in text
+    assert 'request_seconds_bucket{route="/a",le="0.005"} 1\n' in text
+    assert 'request_seconds_bucket{route="/a",le="0.025"} 2\n' in text
+    assert 'request_seconds_bucket{route="/a",le="2.5"} 2\n' in text
+    assert 'request_seconds_bucket{route="/a",le="+Inf"} 3\n' in text
+    assert 'request_seconds_count{route="/a"} 3\n' in text
+    assert 'request_seconds_sum{route="/a"} 3.024' in text
+
+def test_duplicate_names_are_rejected():
+    registry = MetricsRegistry()
+    registry.counter("x_total", "x")
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "x")
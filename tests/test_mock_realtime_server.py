@@ -0,0 +1,113 @@
+import pytest
+import asyncio
+from mock_realtime_server import MockRealtimeServer
+from openai_realtime_client import OpenAIRealtimeAudioTextClient
+
+@pytest.mark.asyncio
+async def test_client_transcribes_against_mock_server():
+    async with MockRealtimeServer(token_rate=1000, first_token_delay=0, tokens_per_audio_second=4, seed=0) as server:
+        client = OpenAIRealtimeAudioTextClient("test", base_url=server.url)
+        events, done = [], asyncio.Event()
+
+        async def record(data):
+            events.append(data)
+            if data["type"] == "response.done":
+                done.set()
+        for event_type in ("response.created", "response.text.delta", "response.done", "conversation.item.created"):
+            client.register_handler(event_type, record)
+
+        await client.connect()
+        assert client.session_id.startswith("sess_")
+        for _ in range(10):
+            await client.send_audio(bytes(4800))  # 100 ms of 24 kHz PCM16
+        await client.commit_audio()
+        await client.start_response("transcribe")
+        await asyncio.wait_for(done.wait(), timeout=5)
+        await client.close()
+
+    types = [event["type"] for event in events]
+    assert types[0] == "conversation.item.created"
+    assert types[1] == "response.created"
+    assert types.count("response.text.delta") == 4
+    assert types[-1] == "response.done"
+    assert events[-1]["response"]["output"][0]["id"].startswith("item_")
+    assert (server.appends, server.audio_bytes, server.commits, server.responses) == (10, 48000, 1, 1)
+
+@pytest.mark.asyncio
+async def test_mock_server_reports_unsupported_events():
+    async with MockRealtimeServer() as server:
+        client = OpenAIRealtimeAudioTextClient("test", base_url=server.url)
+        errors = asyncio.Queue()
+        client.register_handler("error", errors.put)
+        await client.connect()
+        await client.ws.send('{"type": "response.cancel"}')
+        error = await asyncio.wait_for(errors.get(), timeout=5)
+        await client.close()
+    assert "response.cancel" in error["error"]["message"]
+
+@pytest.mark.asyncio
+async def test_client_reconnects_and_replays_after_drop():
+    async with MockRealtimeServer(token_rate=1000, first_token_delay=0, tokens_per_audio_second=10) as server:
+        client = OpenAIRealtimeAudioTextClient("test", base_url=server.url, reconnect_delay=0)
+        deltas, done = [], asyncio.Event()
+        client.register_handler("response.text.delta", lambda data: asyncio.sleep(0, deltas.append(data)))
+        client.register_handler("response.done", lambda data: asyncio.sleep(0, done.set()))
+        await client.connect()
+        await client.send_audio(bytes(24000))
+        await asyncio.sleep(0.05)
+
+        await server.drop_connections()
+        await client.send_audio(bytes(24000))
+        await client.commit_audio()
+        await client.start_response("transcribe")
+        await asyncio.wait_for(done.wait(), timeout=5)
+        await client.close()
+
+    assert server.connections == 2
+    assert client.reconnect_stats()["reconnects"] == 1
+    # The new session heard the whole second of audio
+    assert len(deltas) == 10
+
+@pytest.mark.asyncio
+async def test_client_closes_itself_from_response_done_handler():
+    async with MockRealtimeServer(token_rate=1000, first_token_delay=0, tokens_per_audio_second=4) as server:
+        client = OpenAIRealtimeAudioTextClient("test", base_url=server.url)
+        closed = asyncio.Event()
+
+        async def close_on_done(data):
+            # What end_recording does when the session is not kept for reuse
+            await client.close()
+            closed.set()
+        client.register_handler("response.done", close_on_done)
+
+        await client.connect()
+        await client.send_audio(bytes(24000))
+        await client.commit_audio()
+        await client.start_response("transcribe")
+        await asyncio.wait_for(closed.wait(), timeout=5)
+        await asyncio.wait({client.receive_task}, timeout=5)
+    assert client.receive_task.done()
+    assert not client.ws.open
+    assert not client.dispatcher.workers
+
+@pytest.mark.asyncio
+async def test_client_reports_failure_when_reconnects_run_out():
+    server = await MockRealtimeServer().start()
+    client = OpenAIRealtimeAudioTextClient("test", base_url=server.url, reconnect_attempts=2, reconnect_delay=0)
+    events = []
+    failed = asyncio.Event()
+    client.register_handler("session.reconnecting", lambda data: asyncio.sleep(0, events.append(data["type"])))
+
+    async def on_failed(data):
+        events.append(data["type"])
+        failed.set()
+    client.register_handler("session.failed", on_failed)
+    await client.connect()
+
+    # Every reconnect attempt is refused once the server is gone
+    await server.drop_connections()
+    await server.close()
+    await asyncio.wait_for(failed.wait(), timeout=5)
+    await client.close()
+    assert events == ["session.reconnecting", "session.failed"]
+    assert client.reconnect_stats()["reconnects"] == 0
@@ -40,6 +40,7 @@ async def test_connect_success(client):
             }
         }
         mock_ws.send.assert_awaited_with(json.dumps(expected_update))
+        await client.close()
 
 @pytest.mark.asyncio
 async def test_send_audio(client):
@@ -78,6 +79,17 @@ async def test_clear_audio_buffer(client):
     expected_message = {"type": "input_audio_buffer.clear"}
     mock_ws.send.assert_awaited_with(json.dumps(expected_message))
 
+@pytest.mark.asyncio
+async def test_delete_conversation_item(client):
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    client.ws = mock_ws
+    
+    await client.delete_conversation_item("item_123")
+    
+    expected_message = {"type": "conversation.item.delete", "item_id": "item_123"}
+    mock_ws.send.assert_awaited_with(json.dumps(expected_message))
+
 @pytest.mark.asyncio
 async def test_start_response(client):
     mock_ws = AsyncMock()
@@ -131,3 +143,171 @@ async def test_receive_messages(client):
         await receive_task
     except asyncio.CancelledError:
         pass
+
+@pytest.mark.asyncio
+async def test_send_audio_coalesces_until_threshold(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, append_threshold_bytes=8, append_max_delay=60)
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    await client.send_audio(b"def")
+    mock_ws.send.assert_not_awaited()
+
+    await client.send_audio(b"gh")
+    mock_ws.send.assert_awaited_once_with(json.dumps({
+        "type": "input_audio_buffer.append",
+        "audio": "YWJjZGVmZ2g="  # base64 encoded abcdefgh
+    }))
+    assert client.uplink_stats() == {"audio_chunks": 3, "append_messages": 1, "pending_bytes": 0}
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_send_audio_flushes_after_max_delay(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, append_threshold_bytes=1024, append_max_delay=0.01)
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    await asyncio.sleep(0.05)
+    mock_ws.send.assert_awaited_once()
+    assert client.uplink_stats()["pending_bytes"] == 0
+
+@pytest.mark.asyncio
+async def test_failed_timer_flush_is_logged(api_key, caplog):
+    client = OpenAIRealtimeAudioTextClient(api_key, append_threshold_bytes=1024, append_max_delay=0.01)
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    mock_ws.send.side_effect = RuntimeError("send failed")
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    await asyncio.sleep(0.05)
+    assert "Failed to send coalesced audio" in caplog.text
+    assert not client.append_tasks
+
+@pytest.mark.asyncio
+async def test_commit_flushes_pending_audio_first(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, append_threshold_bytes=1024, append_max_delay=60)
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    await client.commit_audio()
+    sent = [json.loads(call.args[0])["type"] for call in mock_ws.send.await_args_list]
+    assert sent == ["input_audio_buffer.append", "input_audio_buffer.commit"]
+    assert client.append_timer is None
+
+@pytest.mark.asyncio
+async def test_clear_drops_pending_audio(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, append_threshold_bytes=1024, append_max_delay=60)
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    await client.clear_audio_buffer()
+    mock_ws.send.assert_awaited_once_with(json.dumps({"type": "input_audio_buffer.clear"}))
+    assert client.uplink_stats()["pending_bytes"] == 0
+
+class FakeSocket:
+    """Stands in for an upstream socket; feed() delivers events, close() drops it"""
+
+    def __init__(self):
+        self.open = True
+        self.sent = []
+        self.incoming = asyncio.Queue()
+
+    async def recv(self):
+        return json.dumps({"type": "session.created", "session": {"id": f"session_{id(self)}"}})
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+    def feed(self, event):
+        self.incoming.put_nowait(json.dumps(event))
+
+    async def close(self):
+        self.open = False
+        self.incoming.put_nowait(None)
+
+    async def __aiter__(self):
+        while (message := await self.incoming.get()) is not None:
+            yield message
+
+def sent_summary(ws):
+    return [(m["type"], m.get("audio")) for m in ws.sent if m["type"] != "session.update"]
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_unanswered_audio(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, reconnect_delay=0)
+    first, second = FakeSocket(), FakeSocket()
+    reconnected = AsyncMock()
+    with patch('websockets.connect', AsyncMock(side_effect=[first, second])):
+        await client.connect()
+        client.register_handler("session.reconnected", reconnected)
+
+        # The first response completes, so only what follows it is replayed
+        await client.send_audio(b"old")
+        await client.commit_audio()
+        await client.start_response("first")
+        first.feed({"type": "response.done"})
+        await client.clear_audio_buffer()
+        await client.send_audio(b"abc")
+        await client.commit_audio()
+        await client.start_response("second")
+        await client.send_audio(b"def")
+        await asyncio.sleep(0.01)
+
+        await first.close()
+        await asyncio.sleep(0.05)
+        # Sent while reconnecting or after: goes out once, in order
+        await client.send_audio(b"ghi")
+
+    assert second.sent[0]["type"] == "session.update"
+    assert sent_summary(second) == [
+        ("input_audio_buffer.append", "YWJj"),
+        ("input_audio_buffer.commit", None),
+        ("response.create", None),
+        ("input_audio_buffer.append", "ZGVm"),
+        ("input_audio_buffer.append", "Z2hp"),
+    ]
+    reconnected.assert_awaited_once()
+    assert client.reconnect_stats()["reconnects"] == 1
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_replay_buffer_drops_oldest_audio(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, replay_max_bytes=4)
+    mock_ws = AsyncMock()
+    mock_ws.open = True
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    await client.send_audio(b"def")
+    assert b"".join(entry[1] for entry in client.replay_log) == b"cdef"
+    assert client.reconnect_stats()["dropped_replay_bytes"] == 2
+
+@pytest.mark.asyncio
+async def test_audio_sent_before_reconnect_starts_is_kept_for_replay(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, append_threshold_bytes=0)
+    mock_ws = AsyncMock()
+    mock_ws.open = False  # Closed, but the receive loop has not noticed yet
+    client.ws = mock_ws
+
+    await client.send_audio(b"abc")
+    mock_ws.send.assert_not_awaited()
+    assert b"".join(entry[1] for entry in client.replay_log) == b"abc"
+
+@pytest.mark.asyncio
+async def test_no_reconnect_after_close(api_key):
+    client = OpenAIRealtimeAudioTextClient(api_key, reconnect_delay=0)
+    connect = AsyncMock(side_effect=[FakeSocket(), FakeSocket()])
+    with patch('websockets.connect', connect):
+        await client.connect()
+        await client.close()
+    assert connect.await_count == 1
+    assert client.receive_task.done()
@@ -0,0 +1,68 @@
+import pytest
+import base64
+import json
+import websockets
+import realtime_frames
+from unittest.mock import AsyncMock
+from realtime_frames import AppendFrameEncoder, send_text_frame, set_json_backend
+
+def expected_append(audio):
+    return json.dumps({"type": "input_audio_buffer.append", "audio": base64.b64encode(audio).decode('utf-8')})
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 100, 48000, 100000])
+def test_append_matches_json_dumps(size):
+    audio = bytes(range(256)) * (size // 256) + bytes(size % 256)
+    encoder = AppendFrameEncoder(audio_bytes=1000)
+    assert str(encoder.encode(audio), 'ascii') == expected_append(audio)
+
+def test_buffer_is_reused():
+    encoder = AppendFrameEncoder(audio_bytes=3000)
+    buffer = encoder.buffer
+    encoder.encode(b'\x01' * 3000)
+    assert str(encoder.encode(b'\x02' * 30), 'ascii') == expected_append(b'\x02' * 30)
+    assert encoder.buffer is buffer
+
+@pytest.mark.asyncio
+async def test_send_text_frame_falls_back_to_str():
+    ws = AsyncMock()
+    await send_text_frame(ws, memoryview(b'{"a": 1}'))
+    ws.send.assert_awaited_once_with('{"a": 1}')
+
+@pytest.mark.asyncio
+async def test_send_text_frame_over_websocket():
+    received = []
+
+    async def handler(ws):
+        received.append(await ws.recv())
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+            audio = bytes(range(256)) * 40
+            await send_text_frame(ws, AppendFrameEncoder().encode(audio))
+            await ws.wait_closed()
+
+    # Arrives as a text frame carrying the same JSON as before
+    assert received == [expected_append(audio)]
+
+@pytest.mark.asyncio
+async def test_send_text_frame_on_closed_websocket_raises_connection_closed():
+    async def handler(ws):
+        await ws.close()
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+            await ws.wait_closed()
+            with pytest.raises(websockets.exceptions.ConnectionClosed):
+                await send_text_frame(ws, AppendFrameEncoder().encode(b'\x00' * 480))
+
+def test_set_json_backend():
+    original = realtime_frames.JSON_BACKEND
+    try:
+        set_json_backend("json")
+        assert realtime_frames.json_loads('{"type": "x"}') == {"type": "x"}
+        with pytest.raises(ValueError):
+            set_json_backend("simdjson")
+    finally:
+        set_json_backend(original)
@@ -0,0 +1,114 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from realtime_pool import RealtimeSessionPool, SessionReuseStats, is_healthy, log_warmup_event
+
+def make_client():
+    client = MagicMock()
+    client.ws = MagicMock(open=True)
+    client.receive_task = MagicMock()
+    client.receive_task.done.return_value = False
+    client.close = AsyncMock()
+    return client
+
+class Factory:
+    def __init__(self):
+        self.created = []
+
+    async def __call__(self):
+        await asyncio.sleep(0)
+        client = make_client()
+        self.created.append(client)
+        return client
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError):
+        RealtimeSessionPool(Factory(), min_size=3, max_size=2)
+
+def test_is_healthy():
+    client = make_client()
+    assert is_healthy(client)
+    client.ws.open = False
+    assert not is_healthy(client)
+
+@pytest.mark.asyncio
+async def test_warm_sessions_are_handed_out():
+    factory = Factory()
+    pool = RealtimeSessionPool(factory, min_size=2, max_size=4, health_check_interval=60).start()
+    await settle()
+    assert len(pool.idle) == 2
+    # Setup events on an idle session are not left to the warning default handler
+    pooled = pool.idle[0][0]
+    pooled.register_handler.assert_any_call("session.updated", log_warmup_event)
+
+    client = await pool.acquire()
+    assert client in factory.created
+    assert pool.stats()["hits"] == 1
+    await settle()
+    # The pool refills behind the handed-out session
+    assert len(pool.idle) == 2
+    assert len(factory.created) == 3
+    await pool.close()
+    assert all(c.close.await_count == 1 for c in factory.created if c is not client)
+    client.close.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_cold_start_grows_target_up_to_max():
+    factory = Factory()
+    pool = RealtimeSessionPool(factory, min_size=0, max_size=2, health_check_interval=60)
+    await pool.acquire()
+    assert pool.stats()["misses"] == 1
+    assert pool.target == 1
+    await settle()
+    assert len(pool.idle) == 1
+
+    # Draining the pool faster than it refills raises the target, capped at max_size
+    await asyncio.gather(pool.acquire(), pool.acquire(), pool.acquire())
+    assert pool.stats()["hits"] == 1
+    assert pool.target == 2
+    await settle()
+    assert len(pool.idle) == 2
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_unhealthy_and_expired_sessions_are_replaced():
+    factory = Factory()
+    pool = RealtimeSessionPool(factory, min_size=2, max_size=4, idle_timeout=60, health_check_interval=60).start()
+    await settle()
+    dead, old = [client for client, _ in pool.idle]
+    dead.ws.open = False
+    pool.idle[1] = (old, pool.idle[1][1] - 120)
+
+    pool.check()
+    await settle()
+    dead.close.assert_awaited_once()
+    old.close.assert_awaited_once()
+    assert len(pool.idle) == 2
+    assert all(client not in (dead, old) for client, _ in pool.idle)
+    await pool.close()
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_counted():
+    factory = AsyncMock(side_effect=ConnectionError("refused"))
+    pool = RealtimeSessionPool(factory, min_size=1, max_size=1, health_check_interval=60).start()
+    await settle()
+    assert pool.stats()["failures"] == 1
+    assert len(pool.idle) == 0
+    with pytest.raises(ConnectionError):
+        await pool.acquire()
+    await pool.close()
+
+def test_session_reuse_stats():
+    stats = SessionReuseStats()
+    assert stats.hit_rate == 0.0
+    stats.record_setup(0.4)
+    stats.record_setup(0.2)
+    stats.record_reuse()
+    stats.record_reuse()
+    assert stats.hit_rate == 0.5
+    assert stats.mean_setup_seconds == pytest.approx(0.3)
+    assert stats.stats()["saved_ms"] == pytest.approx(600)
@@ -1,8 +1,13 @@
 import pytest
+import asyncio
 from fastapi.testclient import TestClient
+import realtime_server
 from realtime_server import app, ReadabilityRequest, CorrectnessRequest, AskAIRequest
 import json
+import numpy as np
 from unittest.mock import patch, AsyncMock, MagicMock
+from session_manager import SessionManager
+from llm_cache import CachedLLMProcessor, LLMResponseCache
 
 client = TestClient(app)
 
@@ -21,6 +26,40 @@ def mock_llm_processor():
         
         yield mock
 
+@pytest.fixture
+def realtime_client():
+    """A connected upstream client whose start_response answers with response.done.
+
+    Registered handlers are kept in `handlers`; replace start_response's
+    side_effect to answer differently.
+    """
+    with patch('realtime_server.OpenAIRealtimeAudioTextClient') as mock_client:
+        mock_instance = MagicMock()
+        mock_client.return_value = mock_instance
+        for method in ("connect", "close", "send_audio", "flush_audio", "commit_audio", "clear_audio_buffer",
+                       "delete_conversation_item"):
+            setattr(mock_instance, method, AsyncMock())
+        mock_instance.ws.open = True
+        mock_instance.replay_bytes = 0
+        mock_instance.receive_task.done.return_value = False
+        mock_instance.handlers = {}
+        mock_instance.register_handler.side_effect = mock_instance.handlers.__setitem__
+
+        async def respond(instructions):
+            await mock_instance.handlers["response.done"]({})
+        mock_instance.start_response = AsyncMock(side_effect=respond)
+        yield mock_instance
+
+def record_and_stop(websocket):
+    """Start a recording, press Stop with no audio sent and wait for the session to be ready again"""
+    websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+    assert websocket.receive_json()["status"] == "connecting"
+    assert websocket.receive_json()["status"] == "connected"
+    websocket.send_json({"type": "stop_recording"})
+    assert websocket.receive_json() == {"type": "stop_ack", "seq": 0}
+    assert websocket.receive_json()["status"] == "idle"
+    assert websocket.receive_json()["status"] == "connected"
+
 def test_enhance_readability(mock_llm_processor):
     request = ReadabilityRequest(text="Test text")
     response = client.post("/api/v1/readability", json=request.model_dump())
@@ -33,6 +72,36 @@ def test_check_correctness(mock_llm_processor):
     assert response.status_code == 200
     assert "Mocked streaming response" in response.text
 
+def test_metrics_endpoint_reports_requests_and_tokens(mock_llm_processor):
+    client.post("/api/v1/readability", json={"text": "Test text"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'brainwave_request_seconds_count{route="/api/v1/readability",model="gpt-4o"}' in response.text
+    assert 'brainwave_llm_tokens_streamed_total{model="gpt-4o"}' in response.text
+    assert "brainwave_websocket_sessions 0" in response.text
+
+def test_repeated_readability_request_is_served_from_cache(mock_llm_processor):
+    async def text_generator():
+        yield "Cached"
+        yield " answer"
+    mock_llm_processor.process_text.side_effect = lambda *args, **kwargs: text_generator()
+    mock_llm_processor.default_model = "gpt-4o"
+    cache = LLMResponseCache(on_lookup=lambda result: realtime_server.llm_cache_lookups.labels(result).inc())
+    tokens = realtime_server.llm_tokens_streamed.labels("gpt-4o")
+    tokens_before = tokens.value
+    cached = CachedLLMProcessor(mock_llm_processor, cache, on_model_part=realtime_server.count_model_part)
+    with patch('realtime_server.llm_processor', cached):
+        for text in ("Same text", "Same text "):
+            response = client.post("/api/v1/readability", json={"text": text})
+            assert response.text == "Cached answer"
+
+    assert mock_llm_processor.process_text.call_count == 1
+    # The replayed answer is not counted as model tokens
+    assert tokens.value == tokens_before + 2
+    assert cache.stats()["memory_hits"] == 1
+    assert 'brainwave_llm_cache_lookups_total{result="memory"}' in client.get("/metrics").text
+
 def test_ask_ai(mock_llm_processor):
     request = AskAIRequest(text="What is the meaning of life?")
     response = client.post("/api/v1/ask_ai", json=request.model_dump())
@@ -60,6 +129,257 @@ async def test_websocket_endpoint():
             response = websocket.receive_json()
             assert "type" in response
 
+def test_websocket_rejects_unsupported_audio_format():
+    with patch('realtime_server.OpenAIRealtimeAudioTextClient') as mock_client:
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json() == {"type": "status", "status": "idle"}
+            websocket.send_json({"type": "start_recording", "sampleRate": 48000, "sampleFormat": "mp3"})
+
+            response = websocket.receive_json()
+            assert response["type"] == "error"
+            assert "Unsupported sample format" in response["content"]
+            mock_client.assert_not_called()
+
+def test_websocket_rejects_unsupported_codec():
+    with patch('realtime_server.OpenAIRealtimeAudioTextClient') as mock_client:
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json() == {"type": "status", "status": "idle"}
+            websocket.send_json({"type": "start_recording", "sampleRate": 48000, "codec": "opus"})
+
+            response = websocket.receive_json()
+            assert response["type"] == "error"
+            assert "Unsupported codec" in response["content"]
+            mock_client.assert_not_called()
+
+def test_websocket_reuses_session_across_recordings(realtime_client):
+    handlers = realtime_client.handlers
+
+    async def respond(instructions):
+        await handlers["conversation.item.created"]({"item": {"id": "item_1"}})
+        await handlers["response.done"]({})
+    realtime_client.start_response.side_effect = respond
+
+    hits = realtime_server.session_reuse_total.labels("hit").value
+    misses = realtime_server.session_reuse_total.labels("miss").value
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        assert websocket.receive_json()["status"] == "idle"
+        for _ in range(2):
+            record_and_stop(websocket)
+
+    assert realtime_server.OpenAIRealtimeAudioTextClient.call_count == 1
+    # Every client's event dispatcher reports into the metrics registry
+    hooks = realtime_server.OpenAIRealtimeAudioTextClient.call_args.kwargs
+    assert hooks["on_dispatch_depth"] is realtime_server.track_dispatch_depth
+    assert hooks["on_event_handled"] is realtime_server.observe_event_handler
+    realtime_client.connect.assert_awaited_once()
+    assert realtime_client.clear_audio_buffer.await_count == 2
+    realtime_client.delete_conversation_item.assert_awaited_with("item_1")
+    assert realtime_server.session_reuse_total.labels("hit").value == hits + 1
+    assert realtime_server.session_reuse_total.labels("miss").value == misses + 1
+    assert "brainwave_session_reuse_saved_seconds_count" in client.get("/metrics").text
+    assert client.get("/api/v1/latency").json()["session_reuse"]["hits"] >= 1
+
+def test_latency_endpoint_reports_recordings(realtime_client):
+    before = client.get("/api/v1/latency").json()["recordings"]
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        assert websocket.receive_json()["status"] == "idle"
+        for _ in range(2):
+            record_and_stop(websocket)
+
+    response = client.get("/api/v1/latency")
+    assert response.status_code == 200
+    assert response.json()["recordings"] == before + 2
+    assert "response_done" in response.json()["since_stop"]
+    assert "stages" in response.json()["pipeline"]
+
+def test_websocket_incremental_commit_stitches_segments(realtime_client):
+    mock_instance, handlers = realtime_client, realtime_client.handlers
+    with patch('realtime_server.INCREMENTAL_COMMIT', True), \
+         patch('realtime_server.SEGMENT_MIN_SECONDS', 0.2), \
+         patch('realtime_server.SEGMENT_MAX_SECONDS', 0.5):
+        async def respond(instructions):
+            n = mock_instance.start_response.await_count
+            await handlers["conversation.item.created"]({"item": {"id": f"input_{n}"}})
+            await handlers["response.created"]({})
+            await handlers["response.text.delta"]({"delta": f"Part {n}."})
+            await handlers["response.done"]({"response": {"output": [{"id": f"output_{n}"}]}})
+        mock_instance.start_response.side_effect = respond
+
+        t = np.arange(int(24000 * 0.6)) / 24000
+        tone = (np.sin(2 * np.pi * 300 * t) * 8000).astype(np.int16).tobytes()
+
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json()["status"] == "idle"
+            websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+            assert websocket.receive_json()["status"] == "connecting"
+            assert websocket.receive_json()["status"] == "connected"
+            websocket.send_bytes(tone)
+            websocket.send_bytes(tone)
+            websocket.send_json({"type": "stop_recording"})
+            texts = []
+            while (message := websocket.receive_json())["type"] != "transcript":
+                if message["type"] == "text":
+                    texts.append(message)
+
+        assert texts[0]["isNewResponse"] and all(not text["isNewResponse"] for text in texts[1:])
+        responses = mock_instance.start_response.await_count
+        assert responses >= 2
+        assert message["content"] == " ".join(f"Part {n}." for n in range(1, responses + 1))
+        mock_instance.delete_conversation_item.assert_any_await("input_1")
+        mock_instance.delete_conversation_item.assert_any_await("output_1")
+
+def test_websocket_sends_status_changes_and_coalesced_text(realtime_client):
+    mock_instance, handlers = realtime_client, realtime_client.handlers
+    with patch('realtime_server.TEXT_DELTA_FLUSH_MS', 10000):
+        async def respond(instructions):
+            await handlers["response.created"]({})
+            for word in ("one ", "two ", "three"):
+                await handlers["response.text.delta"]({"delta": word})
+            await handlers["response.done"]({})
+        mock_instance.start_response.side_effect = respond
+
+        t = np.arange(2400) / 24000
+        chunk = (np.sin(2 * np.pi * 300 * t) * 8000).astype(np.int16).tobytes()
+
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json()["status"] == "idle"
+            websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+            assert websocket.receive_json()["status"] == "connecting"
+            assert websocket.receive_json()["status"] == "connected"
+            for _ in range(5):
+                websocket.send_bytes(chunk)
+            websocket.send_json({"type": "stop_recording", "lastSeq": 5})
+            # Every chunk is upstream before the ack, and the commit follows it
+            assert websocket.receive_json() == {"type": "stop_ack", "seq": 5}
+            mock_instance.flush_audio.assert_awaited()
+            # No status per chunk, and the pending text is flushed before idle
+            assert websocket.receive_json() == {"type": "text", "content": "", "isNewResponse": True}
+            # The first delta goes out at once; the rest are coalesced
+            assert websocket.receive_json() == {"type": "text", "content": "one ", "isNewResponse": False}
+            assert websocket.receive_json() == {"type": "text", "content": "two three", "isNewResponse": False}
+            assert websocket.receive_json()["status"] == "idle"
+            assert websocket.receive_json()["status"] == "connected"
+
+        assert mock_instance.send_audio.await_count >= 5
+
+def test_websocket_stop_completes_when_upstream_is_lost(realtime_client):
+    handlers = realtime_client.handlers
+
+    async def lose_session(instructions):
+        # Every reconnect attempt failed while the response was pending
+        realtime_client.ws.open = False
+        await handlers["session.failed"]({"type": "session.failed", "session_id": "sess_1"})
+    realtime_client.start_response.side_effect = lose_session
+
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        assert websocket.receive_json()["status"] == "idle"
+        websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+        assert websocket.receive_json()["status"] == "connecting"
+        assert websocket.receive_json()["status"] == "connected"
+        websocket.send_json({"type": "stop_recording"})
+        assert websocket.receive_json() == {"type": "stop_ack", "seq": 0}
+        assert websocket.receive_json() == {"type": "error", "content": "Lost the connection to OpenAI"}
+        assert websocket.receive_json()["status"] == "idle"
+        sessions = client.get("/api/v1/sessions").json()
+        assert sessions["recordings"] == 0 and sessions["upstream"] == 0
+
+    realtime_client.close.assert_awaited()
+
+def test_websocket_rejects_connection_over_capacity():
+    with patch('realtime_server.session_manager', SessionManager(max_connections=0)):
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            response = websocket.receive_json()
+            assert response["type"] == "error"
+            assert "capacity" in response["content"]
+
+def test_websocket_sends_audio_received_while_connecting(realtime_client):
+    async def slow_connect(*args, **kwargs):
+        await asyncio.sleep(0.3)
+    realtime_client.connect.side_effect = slow_connect
+    t = np.arange(2400) / 24000
+    chunks = [(np.sin(2 * np.pi * f * t) * 8000).astype(np.int16).tobytes() for f in (300, 400, 500)]
+
+    with client.websocket_connect("/api/v1/ws") as websocket:
+        assert websocket.receive_json()["status"] == "idle"
+        websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+        assert websocket.receive_json()["status"] == "connecting"
+        # Read and buffered while the upstream session is still connecting
+        websocket.send_bytes(chunks[0])
+        websocket.send_bytes(chunks[1])
+        assert websocket.receive_json()["status"] == "connected"
+        websocket.send_bytes(chunks[2])
+        websocket.send_json({"type": "stop_recording", "lastSeq": 3})
+        assert websocket.receive_json() == {"type": "stop_ack", "seq": 3}
+
+    sent = [call.args[0] for call in realtime_client.send_audio.await_args_list]
+    assert b"".join(sent) == b"".join(chunks)
+
+def test_websocket_stop_while_queued_gives_up_the_place(realtime_client):
+    manager = SessionManager(max_recordings=1, max_upstream=1)
+    other = manager.connect()
+    asyncio.run(manager.admit(other))  # The only recording slot is taken
+    with patch('realtime_server.session_manager', manager):
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json()["status"] == "idle"
+            websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+            assert websocket.receive_json() == {"type": "queued", "position": 1}
+            # The reader is not stuck behind the queue, so audio and Stop are seen at once
+            websocket.send_bytes(np.zeros(2400, dtype=np.int16).tobytes())
+            websocket.send_json({"type": "stop_recording", "lastSeq": 1})
+            assert websocket.receive_json()["status"] == "idle"
+            stats = client.get("/api/v1/sessions").json()
+            assert stats["waiting"] == 0 and stats["recordings"] == 1
+
+        # Freeing the slot admits nobody, and no upstream session was opened
+        manager.finish_recording(other)
+        assert manager.stats()["recordings"] == 0
+        realtime_server.OpenAIRealtimeAudioTextClient.assert_not_called()
+
+def test_websocket_stops_recording_over_budget(realtime_client):
+    manager = SessionManager(max_recording_seconds=0)
+    with patch('realtime_server.session_manager', manager):
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json()["status"] == "idle"
+            websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+            assert websocket.receive_json()["status"] == "connecting"
+            assert websocket.receive_json()["status"] == "connected"
+            websocket.send_bytes(np.zeros(2400, dtype=np.int16).tobytes())
+            response = websocket.receive_json()
+            assert response["type"] == "recording_limit"
+            assert "limit" in response["content"]
+            # The recording is transcribed as if the user had pressed Stop
+            assert websocket.receive_json() == {"type": "stop_ack", "seq": 1}
+            assert websocket.receive_json()["status"] == "idle"
+            sessions = client.get("/api/v1/sessions").json()
+            assert sessions["connections"] == 1
+            assert sessions["recordings"] == 0
+            assert sessions["idle_upstream"] == 1
+
+        realtime_client.commit_audio.assert_awaited_once()
+        stats = manager.stats()
+        assert stats["budget_stops"] == 1
+        assert stats["connections"] == 0 and stats["upstream"] == 0
+
+def test_websocket_stops_recording_over_memory_budget(realtime_client):
+    # The upstream replay log alone is over the cap once audio arrives
+    realtime_client.replay_bytes = 2**20
+    manager = SessionManager(max_session_bytes=2**20)
+    with patch('realtime_server.session_manager', manager):
+        with client.websocket_connect("/api/v1/ws") as websocket:
+            assert websocket.receive_json()["status"] == "idle"
+            websocket.send_json({"type": "start_recording", "sampleRate": 24000})
+            assert websocket.receive_json()["status"] == "connecting"
+            assert websocket.receive_json()["status"] == "connected"
+            websocket.send_bytes(np.zeros(2400, dtype=np.int16).tobytes())
+            response = websocket.receive_json()
+            assert response == {"type": "recording_limit",
+                                "content": "Recording stopped at the 1 MiB audio memory limit"}
+            assert websocket.receive_json() == {"type": "stop_ack", "seq": 1}
+            assert websocket.receive_json()["status"] == "idle"
+
+        realtime_client.commit_audio.assert_awaited_once()
+        assert manager.stats()["budget_stops"] == 1
+
 def test_get_realtime_page():
     response = client.get("/")
     assert response.status_code == 200
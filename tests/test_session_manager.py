@@ -0,0 +1,121 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from session_manager import AdmissionError, SessionManager
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        SessionManager(max_recordings=4, max_upstream=2)
+
+def test_connection_cap():
+    manager = SessionManager(max_connections=2)
+    first = manager.connect()
+    manager.connect()
+    with pytest.raises(AdmissionError):
+        manager.connect()
+    manager.disconnect(first)
+    manager.connect()
+    assert manager.stats()["rejected_connections"] == 1
+
+@pytest.mark.asyncio
+async def test_recordings_wait_in_order_with_positions():
+    manager = SessionManager(max_recordings=1, max_upstream=1)
+    leases = [manager.connect() for _ in range(3)]
+    await manager.admit(leases[0])
+    positions = {1: [], 2: []}
+
+    async def waiter(i):
+        async def on_position(position):
+            positions[i].append(position)
+        await manager.admit(leases[i], on_position=on_position)
+
+    waiting = [asyncio.create_task(waiter(i)) for i in (1, 2)]
+    await settle()
+    assert manager.stats()["waiting"] == 2
+    assert positions == {1: [1], 2: [2]}
+
+    manager.finish_recording(leases[0])
+    await settle()
+    assert waiting[0].done() and not waiting[1].done()
+    assert leases[1].recording
+    assert positions[2] == [2, 1]
+
+    manager.finish_recording(leases[1])
+    await asyncio.gather(*waiting)
+    assert leases[2].recording
+    assert manager.stats()["recordings"] == 1
+    assert manager.stats()["upstream"] == 1
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_and_wait_times_out():
+    manager = SessionManager(max_recordings=1, max_upstream=1, max_queue=1, queue_timeout=0.05)
+    leases = [manager.connect() for _ in range(3)]
+    await manager.admit(leases[0])
+    waiting = asyncio.create_task(manager.admit(leases[1]))
+    await settle()
+    with pytest.raises(AdmissionError):
+        await manager.admit(leases[2])
+    with pytest.raises(AdmissionError):
+        await waiting
+    stats = manager.stats()
+    assert stats["rejected_recordings"] == 1
+    assert stats["queue_timeouts"] == 1
+    assert stats["waiting"] == 0
+
+@pytest.mark.asyncio
+async def test_idle_upstream_is_kept_then_evicted_for_waiting_recording():
+    manager = SessionManager(max_recordings=2, max_upstream=2)
+    idle, busy, waiting = (manager.connect() for _ in range(3))
+    release = MagicMock(return_value=AsyncMock()())
+    await manager.admit(idle)
+    await manager.admit(busy)
+    manager.finish_recording(idle, release_idle=release)
+    assert manager.stats()["idle_upstream"] == 1
+
+    # Reusing its own idle socket does not take another one
+    await manager.admit(idle)
+    assert manager.stats()["upstream"] == 2
+    release.assert_not_called()
+    manager.finish_recording(idle, release_idle=release)
+
+    await manager.admit(waiting)
+    await settle()
+    release.assert_called_once()
+    assert not idle.upstream and waiting.upstream
+    assert manager.stats()["upstream"] == 2
+    assert manager.stats()["evicted_upstream"] == 1
+
+@pytest.mark.asyncio
+async def test_disconnect_releases_everything():
+    manager = SessionManager(max_recordings=1, max_upstream=1)
+    first, second = manager.connect(), manager.connect()
+    await manager.admit(first)
+    waiting = asyncio.create_task(manager.admit(second))
+    await settle()
+    manager.disconnect(first)
+    await waiting
+    assert second.recording
+    assert manager.stats()["connections"] == 1
+
+@pytest.mark.asyncio
+async def test_budgets():
+    manager = SessionManager(max_recording_seconds=60, max_session_bytes=1000)
+    lease = manager.connect()
+    assert manager.over_budget(lease, 5000) is None  # Not recording
+    await manager.admit(lease)
+    assert manager.over_budget(lease, 10) is None
+    assert "memory" in manager.over_budget(lease, 1000)
+    lease.recording_started -= 61
+    assert "60s" in manager.over_budget(lease, 10)
+    assert manager.stats()["budget_stops"] == 2
+
+@pytest.mark.asyncio
+async def test_memory_budget_is_opt_in():
+    manager = SessionManager()
+    lease = manager.connect()
+    await manager.admit(lease)
+    assert manager.over_budget(lease, 2**40) is None
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+from transcript_segmenter import TranscriptSegmenter
+
+SAMPLE_RATE = 24000
+
+@pytest.fixture
+def segmenter():
+    return TranscriptSegmenter(sample_rate=SAMPLE_RATE, min_seconds=1.0, max_seconds=3.0, pause_ms=300)
+
+def make_tone(seconds, freq=300.0):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16).tobytes()
+
+def make_silence(seconds):
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * 10).astype(np.int16).tobytes()
+
+def test_commits_at_max_seconds_without_a_pause(segmenter):
+    assert not segmenter.add_audio(make_tone(2.5))
+    assert segmenter.add_audio(make_tone(0.5))
+    segmenter.committed()
+    assert segmenter.segment_seconds == 0
+    assert not segmenter.has_audio
+
+def test_commits_at_pause_only_after_min_seconds(segmenter):
+    # A pause before min_seconds does not end the segment
+    assert not segmenter.add_audio(make_tone(0.3) + make_silence(0.4))
+    assert not segmenter.add_audio(make_tone(0.5))
+    assert segmenter.add_audio(make_tone(0.2) + make_silence(0.4))
+
+def test_one_response_at_a_time(segmenter):
+    segmenter.committed()
+    assert segmenter.should_respond()
+    segmenter.response_started()
+    assert segmenter.is_first_response
+
+    # Segments committed while a response runs wait for the next one
+    segmenter.committed()
+    segmenter.committed()
+    assert not segmenter.should_respond()
+    segmenter.add_text("Hello ")
+    segmenter.add_text("there.")
+    segmenter.response_finished()
+    assert segmenter.should_respond()
+    segmenter.response_started()
+    assert not segmenter.is_first_response
+    assert not segmenter.should_respond()
+
+def test_transcript_is_stitched_when_done(segmenter):
+    for text in ("First part.", "", "Second part."):
+        segmenter.committed()
+        segmenter.response_started()
+        segmenter.add_text(text)
+        assert not segmenter.done
+        segmenter.stopping = True
+        segmenter.response_finished()
+    assert segmenter.done
+    assert segmenter.transcript() == "First part. Second part."
+
+    segmenter.reset()
+    assert not segmenter.done
+    assert segmenter.transcript() == ""
+
+def test_restarted_response_drops_partial_text(segmenter):
+    segmenter.committed()
+    segmenter.response_started()
+    segmenter.add_text("Lost ")
+    segmenter.restart_response()
+    segmenter.add_text("Redone.")
+    segmenter.response_finished()
+    assert segmenter.transcript() == "Redone."
@@ -0,0 +1,66 @@
+import pytest
+import numpy as np
+from voice_activity import VoiceActivityDetector
+
+SAMPLE_RATE = 24000
+
+@pytest.fixture
+def vad():
+    return VoiceActivityDetector(sample_rate=SAMPLE_RATE)
+
+def make_silence(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(SAMPLE_RATE * seconds)) * 10).astype(np.int16)
+
+def make_tone(seconds, freq=300.0):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * freq * t) * 8000).astype(np.int16)
+
+def run(vad, signal, chunk_size):
+    chunks = [vad.process(signal[i:i + chunk_size]) for i in range(0, len(signal), chunk_size)]
+    chunks.append(vad.flush())
+    return np.concatenate(chunks)
+
+def test_classify(vad):
+    frames = np.stack([make_silence(0.02), make_tone(0.02)])
+    np.testing.assert_array_equal(vad.classify(frames), [False, True])
+
+def test_soft_high_zcr_frames_count_as_speech(vad):
+    # Quiet alternating signal: below the energy threshold but within the ZCR margin
+    frame = np.tile(np.array([120, -120], dtype=np.int16), vad.frame_size // 2)
+    assert vad.classify(frame[np.newaxis, :])[0]
+
+def test_silence_is_trimmed_and_speech_kept(vad):
+    speech = make_tone(1.0)
+    signal = np.concatenate([make_silence(2.0), speech, make_silence(2.0, seed=1)])
+    output = run(vad, signal, 4800)
+
+    # Speech plus at most pre-roll and hangover survive
+    assert len(speech) <= len(output) <= len(speech) + int(0.4 * SAMPLE_RATE)
+    assert vad.stats()["input_seconds"] == pytest.approx(5.0)
+    assert vad.trimmed_seconds == pytest.approx(5.0 - len(output) / SAMPLE_RATE)
+
+def test_pause_between_sentences_is_compressed(vad):
+    signal = np.concatenate([make_tone(0.5), make_silence(3.0), make_tone(0.5)])
+    output = run(vad, signal, 4800)
+    assert len(output) < int(1.5 * SAMPLE_RATE)
+    assert len(output) > int(1.0 * SAMPLE_RATE)
+
+@pytest.mark.parametrize("chunk_size", [1, 333, 4800, 24000])
+def test_output_independent_of_chunking(chunk_size):
+    signal = np.concatenate([make_silence(0.7), make_tone(0.35), make_silence(0.9), make_tone(0.2)])
+    expected = run(VoiceActivityDetector(sample_rate=SAMPLE_RATE), signal, len(signal))
+    actual = run(VoiceActivityDetector(sample_rate=SAMPLE_RATE), signal, chunk_size)
+    np.testing.assert_array_equal(actual, expected)
+
+def test_counters_accumulate_across_streams(vad):
+    run(vad, make_silence(1.0), 4800)
+    run(vad, make_silence(1.0), 4800)
+    assert vad.trimmed_seconds == pytest.approx(2.0)
+
+def test_trailing_silence(vad):
+    signal = np.concatenate([make_tone(0.5), make_silence(0.4)])
+    assert vad.trailing_silence(signal) == pytest.approx(0.4, abs=vad.frame_size / SAMPLE_RATE)
+    assert vad.trailing_silence(make_tone(0.5)) == 0.0
+    assert vad.trailing_silence(make_silence(0.01)) == 0.0
+    assert vad.samples_in == 0
@@ -0,0 +1,92 @@
+import logging
+import numpy as np
+from voice_activity import VoiceActivityDetector
+
+logger = logging.getLogger(__name__)
+
+# The realtime API rejects commits of less than 100 ms of audio
+MIN_COMMIT_SECONDS = 0.1
+
+class TranscriptSegmenter:
+    """Splits a recording into segments that are transcribed while recording continues.
+
+    add_audio() tracks audio sent upstream since the last commit and says
+    when to commit: at the first pause of at least `pause_ms` once a segment
+    is `min_seconds` long, or unconditionally at `max_seconds`. Only one
+    response runs at a time; segments committed meanwhile are answered
+    together by the next one. Each response's text is kept in order and
+    transcript() joins them into the final text.
+    """
+
+    def __init__(self, sample_rate: int = 24000, min_seconds: float = 5.0, max_seconds: float = 15.0,
+                 pause_ms: int = 300, threshold_db: float = -45.0, separator: str = " "):
+        self.sample_rate = sample_rate
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.pause_seconds = pause_ms / 1000
+        self.separator = separator
+        self.detector = VoiceActivityDetector(sample_rate=sample_rate, threshold_db=threshold_db)
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.unanswered = 0
+        self.responding = False
+        self.stopping = False
+        self.texts = []
+        self.current = []
+
+    @property
+    def segment_seconds(self) -> float:
+        return self.samples / self.sample_rate
+
+    @property
+    def has_audio(self) -> bool:
+        return self.segment_seconds >= MIN_COMMIT_SECONDS
+
+    def add_audio(self, pcm_data) -> bool:
+        """Count audio sent upstream; True when the segment should be committed now"""
+        samples = np.frombuffer(pcm_data, dtype=np.int16)
+        self.samples += len(samples)
+        if self.segment_seconds >= self.max_seconds:
+            return True
+        return (self.segment_seconds >= self.min_seconds
+                and self.detector.trailing_silence(samples) >= self.pause_seconds)
+
+    def committed(self):
+        self.samples = 0
+        self.unanswered += 1
+
+    def discard_audio(self):
+        self.samples = 0
+
+    def should_respond(self) -> bool:
+        return self.unanswered > 0 and not self.responding
+
+    def response_started(self):
+        self.responding = True
+        self.unanswered = 0
+
+    @property
+    def is_first_response(self) -> bool:
+        return not self.texts
+
+    def add_text(self, delta: str):
+        self.current.append(delta)
+
+    def restart_response(self):
+        """The running response is being redone; drop the text it produced so far"""
+        self.current = []
+
+    def response_finished(self):
+        self.texts.append("".join(self.current).strip())
+        self.current = []
+        self.responding = False
+
+    @property
+    def done(self) -> bool:
+        """Stop was requested and every committed segment has been answered"""
+        return self.stopping and not self.responding and self.unanswered == 0
+
+    def transcript(self) -> str:
+        return self.separator.join(text for text in self.texts if text)
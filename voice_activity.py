@@ -0,0 +1,103 @@
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class VoiceActivityDetector:
+    """Frame-based energy + zero-crossing VAD that trims silence from a PCM16 stream.
+
+    Frames louder than threshold_db are speech. Quieter frames still count as
+    speech when they are within zcr_margin_db of the threshold and have a high
+    zero-crossing rate, which keeps soft fricatives ("s", "f") at word edges.
+    Silence is kept for hangover_ms after speech and pre_roll_ms before it, so
+    long pauses are compressed to a short gap rather than removed outright.
+    """
+
+    def __init__(self, sample_rate: int = 24000, frame_ms: int = 20, threshold_db: float = -45.0,
+                 zcr_threshold: float = 0.25, zcr_margin_db: float = 10.0,
+                 hangover_ms: int = 300, pre_roll_ms: int = 100):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.zcr_margin_db = zcr_margin_db
+        self.hangover_frames = hangover_ms // frame_ms
+        self.pre_roll_frames = pre_roll_ms // frame_ms
+        self.samples_in = 0
+        self.samples_trimmed = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new stream; the trim counters keep accumulating"""
+        self.remainder = np.zeros(0, dtype=np.int16)
+        self.pending = np.zeros(0, dtype=np.int16)
+        # Frames since the last speech frame, counted at the start of pending
+        self.frames_since_speech = self.hangover_frames + 1
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        """Return a boolean speech flag for each row of an int16 frame matrix"""
+        samples = frames.astype(np.float32)
+        power = np.mean(samples * samples, axis=1) / (32768.0 * 32768.0)
+        energy_db = 10.0 * np.log10(power + 1e-12)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frames.shape[1] - 1)
+        soft_speech = (energy_db > self.threshold_db - self.zcr_margin_db) & (zcr > self.zcr_threshold)
+        return (energy_db > self.threshold_db) | soft_speech
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Feed int16 samples, returning the samples that should be sent upstream"""
+        self.samples_in += len(samples)
+        data = np.concatenate((self.pending, self.remainder, samples))
+        n = len(data) // self.frame_size
+        self.remainder = data[n * self.frame_size:]
+        if n == 0:
+            return np.zeros(0, dtype=np.int16)
+        frames = data[:n * self.frame_size].reshape(n, self.frame_size)
+
+        speech = self.classify(frames)
+        idx = np.arange(n)
+        last_speech = np.maximum.accumulate(np.where(speech, idx, -1))
+        since = np.where(last_speech >= 0, idx - last_speech, self.frames_since_speech + idx)
+        next_speech = np.minimum.accumulate(np.where(speech, idx, n + self.pre_roll_frames + 1)[::-1])[::-1]
+        keep = (since <= self.hangover_frames) | (next_speech - idx <= self.pre_roll_frames)
+
+        # Trailing silence may turn out to be pre-roll for speech in the next
+        # chunk, so hold it back instead of deciding now
+        kept = np.flatnonzero(keep)
+        hold_from = max(n - self.pre_roll_frames, kept[-1] + 1 if len(kept) else 0)
+        self.pending = data[hold_from * self.frame_size:n * self.frame_size]
+        self.frames_since_speech = int(since[hold_from]) if hold_from < n else int(since[-1]) + 1
+
+        emitted = frames[:hold_from][keep[:hold_from]].ravel()
+        self.samples_trimmed += hold_from * self.frame_size - len(emitted)
+        return emitted
+
+    def flush(self) -> np.ndarray:
+        """End the stream: trailing silence is dropped, a partial frame in hangover is kept"""
+        if self.frames_since_speech <= self.hangover_frames and len(self.pending) == 0:
+            emitted = self.remainder
+        else:
+            emitted = np.zeros(0, dtype=np.int16)
+        self.samples_trimmed += len(self.pending) + len(self.remainder) - len(emitted)
+        self.reset()
+        return emitted
+
+    def trailing_silence(self, samples: np.ndarray) -> float:
+        """Seconds of non-speech at the end of samples; stream state is untouched"""
+        n = len(samples) // self.frame_size
+        if n == 0:
+            return 0.0
+        frames = samples[len(samples) - n * self.frame_size:].reshape(n, self.frame_size)
+        voiced = np.flatnonzero(self.classify(frames))
+        silent_frames = n - 1 - voiced[-1] if len(voiced) else n
+        return silent_frames * self.frame_size / self.sample_rate
+
+    @property
+    def trimmed_seconds(self) -> float:
+        return self.samples_trimmed / self.sample_rate
+
+    def stats(self) -> dict:
+        return {
+            "input_seconds": self.samples_in / self.sample_rate,
+            "trimmed_seconds": self.trimmed_seconds,
+        }